@@ -0,0 +1,135 @@
+"""Benchmark de concorrência das rotas assíncronas (modo ASGI).
+
+Uso:
+    python -m benchmarks.seed --db /tmp/clinica-bench.db --scale 0.01
+    python -m benchmarks.asgi --db /tmp/clinica-bench.db --concurrency 64 --requests 1024
+
+Chama o app de create_asgi_app direto (sem servidor HTTP) com
+`--concurrency` requisições em voo ao mesmo tempo sobre rotas de
+ASYNC_ROUTES, com o executor padrão do loop limitado a `--threads`
+threads. Reporta vazão, p50/p95, o pico de conexões assíncronas em uso ao
+mesmo tempo e quantas instruções passaram pelo engine síncrono: o pico
+deve passar de `--threads` e o engine síncrono deve ficar em zero (nem
+identidade nem before_request vão ao pool síncrono ou ao executor).
+"""
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event, select
+
+from src.main.server.asgi import create_asgi_app
+from src.main.repository.database import db
+from src.main.models.usuarios_model import Usuarios
+from benchmarks.run import percentile
+from benchmarks.seed import make_config
+
+PATHS = ['/atendimentos/?limit=20', '/atendimentos/?limit=20&fields=id,paciente_nome,criado_em',
+         '/especialidades/', '/usuarios/{admin_id}']
+
+
+class PeakCheckouts:
+    def __init__(self, pool):
+        self.current = self.peak = 0
+        event.listen(pool, 'checkout', self._checkout)
+        event.listen(pool, 'checkin', self._checkin)
+
+    def _checkout(self, *args):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def _checkin(self, *args):
+        self.current -= 1
+
+
+def _scope(path, cookie):
+    path, _, query = path.partition('?')
+    return {'type': 'http', 'method': 'GET', 'path': path, 'root_path': '', 'scheme': 'http',
+            'query_string': query.encode(), 'http_version': '1.1', 'server': ('localhost', 80),
+            'client': ('127.0.0.1', 1234), 'headers': [(b'cookie', cookie.encode())]}
+
+
+async def _request(asgi_app, path, cookie):
+    status = {}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status['code'] = message['status']
+
+    start = time.perf_counter()
+    await asgi_app(_scope(path, cookie), receive, send)
+    if status['code'] != 200:
+        raise SystemExit(f'{path}: status {status["code"]}')
+    return (time.perf_counter() - start) * 1000
+
+
+async def _run(asgi_app, paths, cookie, concurrency, requests, threads):
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(threads))
+    slots = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def one(i):
+        async with slots:
+            timings.append(await _request(asgi_app, paths[i % len(paths)], cookie))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    await asgi_app.engine.dispose()
+    return timings, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help='Arquivo SQLite gerado por benchmarks.seed.')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=1024)
+    parser.add_argument('--threads', type=int, default=1, help='Threads do executor padrão do loop.')
+    parser.add_argument('--pool-size', type=int, default=32, help='Conexões do pool (síncrono e assíncrono).')
+    parser.add_argument('--output', help='Grava o resultado em JSON neste arquivo.')
+    args = parser.parse_args(argv)
+
+    config = type('AsgiBenchConfig', (make_config(args.db),), {
+        'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': args.pool_size, 'max_overflow': 0}})
+    asgi_app = create_asgi_app(config)
+    app = asgi_app.flask_app
+    with app.app_context():
+        admin_id = db.session.scalar(select(Usuarios.id).where(Usuarios.cargo == 'admin').limit(1))
+        if admin_id is None:
+            raise SystemExit('banco vazio: rode benchmarks.seed antes')
+        sync_statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: sync_statements.append(a[2]))
+    cookie = 'session=' + app.session_interface.get_signing_serializer(app).dumps(
+        {'_user_id': str(admin_id), '_fresh': True})
+    paths = [p.format(admin_id=admin_id) for p in PATHS]
+    peak = PeakCheckouts(asgi_app.engine.sync_engine.pool)
+
+    timings, elapsed = asyncio.run(_run(asgi_app, paths, cookie, args.concurrency, args.requests, args.threads))
+    report = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'executor_threads': args.threads,
+        'pool_size': args.pool_size,
+        'req_per_s': round(args.requests / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'peak_async_connections': peak.peak,
+        'sync_statements': len(sync_statements),
+    }
+    print(f"{report['requests']} requisições, {report['concurrency']} em voo, executor com "
+          f"{report['executor_threads']} thread(s): {report['req_per_s']} req/s "
+          f"p50={report['p50_ms']:.2f}ms p95={report['p95_ms']:.2f}ms")
+    print(f"pico de conexões assíncronas em uso: {report['peak_async_connections']}; "
+          f"instruções no engine síncrono: {report['sync_statements']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
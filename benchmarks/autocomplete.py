@@ -0,0 +1,91 @@
+"""Benchmark do índice de autocomplete de pacientes: montagem, memória e latência.
+
+Uso:
+    python -m benchmarks.seed --db /tmp/clinica-bench.db
+    python -m benchmarks.autocomplete --db /tmp/clinica-bench.db
+    python -m benchmarks.autocomplete --db /tmp/clinica-bench.db --iterations 500 --projetar 500000
+
+Monta o índice a partir do banco gerado por benchmarks.seed, mostra o
+tempo de montagem, os bytes por parte (o mesmo relatório de
+GET /admin/autocomplete) e o crescimento do RSS do processo, e compara a
+latência de buscas típicas de digitação no índice e no banco
+(find_pacientes: FTS5 no SQLite). --projetar estima a memória para outro
+número de pacientes a partir dos bytes por paciente medidos.
+"""
+import argparse
+import json
+import resource
+import time
+
+from sqlalchemy import select
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.pacientes_model import Pacientes
+from src.main.services.autocomplete import build_index
+from src.main.services.paciente_search import find_pacientes
+from benchmarks.run import percentile
+from benchmarks.seed import make_config
+
+
+def _rss_mb():
+    # ru_maxrss em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _queries():
+    cpf = db.session.scalar(select(Pacientes.cpf).where(Pacientes.cpf.isnot(None)).order_by(Pacientes.id))
+    return ['ma', 'mar', 'mari', 'maria', 'maria sil', 'jo', 'jos', 'fer', 'san oli',
+            cpf[:3] if cpf else '100', cpf or '10000000000']
+
+
+def _timings(fn, queries, iterations):
+    results = {}
+    for q in queries:
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn(q)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[q] = {'p50_ms': round(percentile(timings, 50), 3), 'p95_ms': round(percentile(timings, 95), 3)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help='Arquivo SQLite gerado por benchmarks.seed.')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--projetar', type=int, default=500_000, help='Pacientes para a estimativa de memória.')
+    parser.add_argument('--output', help='Grava o resultado em JSON neste arquivo.')
+    args = parser.parse_args(argv)
+
+    app = create_app(make_config(args.db))
+    with app.app_context():
+        rss_before = _rss_mb()
+        index = build_index()
+        rss_after = _rss_mb()
+        memory = index.memory()
+        queries = _queries()
+        indexed = _timings(lambda q: index.search(q, 10), queries, args.iterations)
+        banco = _timings(lambda q: find_pacientes(q, limit=10), queries, max(1, args.iterations // 10))
+
+    projection_mb = memory['bytes_por_paciente'] * args.projetar / 2 ** 20 if memory['pacientes'] else None
+    print(f"{memory['pacientes']} pacientes, {memory['palavras']} palavras distintas: "
+          f"montagem {index.build_ms:.0f}ms")
+    print('bytes: ' + ', '.join(f'{k}={v / 2 ** 20:.1f}MB' for k, v in memory['bytes'].items())
+          + f" ({memory['bytes_por_paciente']} por paciente); RSS +{rss_after - rss_before:.1f}MB")
+    if projection_mb is not None:
+        print(f'estimativa para {args.projetar} pacientes: {projection_mb:.0f}MB por processo')
+    for q in queries:
+        print(f"{q!r:16s} índice p50={indexed[q]['p50_ms']:7.3f}ms p95={indexed[q]['p95_ms']:7.3f}ms   "
+              f"banco p50={banco[q]['p50_ms']:7.3f}ms p95={banco[q]['p95_ms']:7.3f}ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'memory': memory, 'build_ms': index.build_ms, 'rss_growth_mb': round(rss_after - rss_before, 1),
+                       'projection': {'pacientes': args.projetar, 'mb': projection_mb},
+                       'index': indexed, 'banco': banco}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark de login em rajada (troca de turno) por método de hash.
+
+Uso:
+    python -m benchmarks.login --db /tmp/clinica-bench.db
+    python -m benchmarks.login --db /tmp/clinica-bench.db --methods scrypt pbkdf2:sha256:600000 \\
+        --concurrency 8 --logins 10 --verify-workers 2 --verify-queue 4
+
+Para cada método as senhas dos usuários são regravadas com ele e
+`--concurrency` threads fazem `--logins` logins cada, enquanto uma thread
+mede a latência de GET /especialidades/ (rota barata) para mostrar quanto
+a rajada atrasa o resto da aplicação. Com --verify-workers a verificação
+roda no pool limitado de services/auth.py e os excedentes recebem 503.
+"""
+import argparse
+import json
+import threading
+import time
+
+from sqlalchemy import select, update
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.usuarios_model import Usuarios
+from benchmarks.run import percentile
+from benchmarks.seed import BENCH_PASSWORD, make_config
+
+
+def _set_passwords(app, method):
+    with app.app_context():
+        senha = generate_password_hash(BENCH_PASSWORD, method=method)
+        db.session.execute(update(Usuarios).values(senha=senha))
+        db.session.commit()
+        usuarios = list(db.session.scalars(select(Usuarios.usuario).order_by(Usuarios.id)))
+    start = time.perf_counter()
+    check_password_hash(senha, BENCH_PASSWORD)
+    return usuarios, (time.perf_counter() - start) * 1000
+
+
+def _burst(app, usuarios, concurrency, logins):
+    timings, statuses, probe = [], [], []
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def worker(n):
+        client = app.test_client()
+        usuario = usuarios[n % len(usuarios)]
+        for _ in range(logins):
+            start = time.perf_counter()
+            r = client.post('/usuarios/login', data={'usuario': usuario, 'senha': BENCH_PASSWORD})
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                timings.append(elapsed)
+                statuses.append(r.status_code)
+
+    def prober():
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = '1'
+            sess['_fresh'] = True
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/especialidades/')
+            probe.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    probe_thread = threading.Thread(target=prober)
+    probe_thread.start()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    done.set()
+    probe_thread.join()
+    ok = statuses.count(302)
+    return {
+        'logins': len(statuses),
+        'ok': ok,
+        'busy_503': statuses.count(503),
+        'logins_per_s': round(ok / wall, 2),
+        'login_p50_ms': round(percentile(timings, 50), 2),
+        'login_p95_ms': round(percentile(timings, 95), 2),
+        'probe_p50_ms': round(percentile(probe, 50), 2),
+        'probe_p95_ms': round(percentile(probe, 95), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help='Arquivo SQLite gerado por benchmarks.seed.')
+    parser.add_argument('--methods', nargs='+', default=['scrypt', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:100000'])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=5, help='Logins por thread.')
+    parser.add_argument('--verify-workers', type=int, default=0)
+    parser.add_argument('--verify-queue', type=int, default=0)
+    parser.add_argument('--output', help='Grava o resultado em JSON neste arquivo.')
+    args = parser.parse_args(argv)
+
+    results = []
+    for method in args.methods:
+        config = make_config(args.db)
+        config.PASSWORD_HASH_METHOD = method
+        config.PASSWORD_VERIFY_WORKERS = args.verify_workers
+        config.PASSWORD_VERIFY_QUEUE = args.verify_queue
+        app = create_app(config)
+        usuarios, verify_ms = _set_passwords(app, method)
+        result = {'method': method, 'verify_ms': round(verify_ms, 2),
+                  **_burst(app, usuarios, args.concurrency, args.logins)}
+        results.append(result)
+        print(f"{method:24s} verify={result['verify_ms']:8.2f}ms logins/s={result['logins_per_s']:7.2f} "
+              f"login p95={result['login_p95_ms']:9.2f}ms probe p95={result['probe_p95_ms']:8.2f}ms "
+              f"503={result['busy_503']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'concurrency': args.concurrency, 'logins_per_thread': args.logins,
+                       'verify_workers': args.verify_workers, 'verify_queue': args.verify_queue,
+                       'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Benchmark dos endpoints principais sobre um banco gerado por benchmarks.seed.
+
+Uso:
+    python -m benchmarks.seed --db /tmp/clinica-bench.db --scale 0.01
+    python -m benchmarks.run --db /tmp/clinica-bench.db --iterations 50 --output bench.json
+
+Cada cenário roda pelo test client do Flask (sem servidor HTTP), então os
+números medem aplicação + banco. Para cada um são reportados p50/p95/p99 em
+ms, média de consultas SQL por requisição e tamanho da resposta; o pico de
+RSS do processo vai no fim. Os cenários de escrita (create_atendimento)
+alteram o banco: gere-o de novo antes de comparar execuções.
+"""
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import event, func, select
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.pacientes_model import Pacientes
+from src.main.models.usuarios_model import Usuarios
+from benchmarks.seed import BENCH_PASSWORD, make_config
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def _fixtures(app):
+    """Valores reais do banco para montar os filtros dos cenários."""
+    with app.app_context():
+        paciente = db.session.scalars(select(Pacientes).order_by(Pacientes.id).limit(1)).first()
+        atendimento = db.session.scalars(
+            select(Atendimentos).where(Atendimentos.paciente_id.is_not(None))
+            .order_by(Atendimentos.id.desc()).limit(1)).first()
+        first, last = db.session.execute(
+            select(func.min(Atendimentos.criado_em), func.max(Atendimentos.criado_em))).one()
+        admin = db.session.scalars(select(Usuarios).where(Usuarios.cargo == 'admin').limit(1)).first()
+        if paciente is None or atendimento is None or admin is None:
+            raise SystemExit('banco vazio: rode benchmarks.seed antes')
+        meio = first + (last - first) / 2
+        return {
+            'admin_id': admin.id,
+            'admin_usuario': admin.usuario,
+            'paciente_id': atendimento.paciente_id,
+            'paciente_cpf': atendimento.paciente_cpf,
+            'especialidade_id': atendimento.especialidade_id,
+            'especialidade': atendimento.especialidade,
+            'busca': paciente.nome.split()[0][:4],
+            'start': meio.strftime('%Y-%m-%d'),
+            'end': meio.strftime('%Y-%m-%d'),
+        }
+
+
+def scenarios(fx):
+    """(nome, método, caminho, dados do form, status esperado)."""
+    return [
+        ('home', 'GET', '/', None, 200),
+        ('home_pacientes', 'GET', '/?view=pacientes', None, 200),
+        ('list_atendimentos', 'GET', '/atendimentos/', None, 200),
+        ('list_atendimentos_paciente_id', 'GET', f"/atendimentos/?paciente_id={fx['paciente_id']}", None, 200),
+        ('list_atendimentos_paciente_cpf', 'GET', f"/atendimentos/?paciente_cpf={fx['paciente_cpf']}", None, 200),
+        ('list_atendimentos_especialidade_id', 'GET',
+         f"/atendimentos/?especialidade_id={fx['especialidade_id']}", None, 200),
+        ('list_atendimentos_especialidade', 'GET', f"/atendimentos/?especialidade={fx['especialidade']}", None, 200),
+        ('list_atendimentos_periodo', 'GET', f"/atendimentos/?start={fx['start']}&end={fx['end']}", None, 200),
+        ('list_atendimentos_fields_200', 'GET', '/atendimentos/?limit=200&fields=id,paciente_nome,criado_em', None, 200),
+        ('search_pacientes', 'GET', f"/pacientes/search?q={fx['busca']}", None, 200),
+        ('login', 'POST', '/usuarios/login', {'usuario': fx['admin_usuario'], 'senha': BENCH_PASSWORD}, 302),
+        ('create_atendimento', 'POST', '/atendimentos/',
+         {'paciente_id': fx['paciente_id'], 'especialidade_id': fx['especialidade_id']}, 302),
+    ]
+
+
+def _login(client, user_id):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+
+def run(db_path, iterations=50, warmup=5, only=None):
+    app = create_app(make_config(db_path))
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+    fx = _fixtures(app)
+
+    results = []
+    for name, method, path, data, expected in scenarios(fx):
+        if only and name not in only:
+            continue
+        client = app.test_client()
+        if name != 'login':
+            _login(client, fx['admin_id'])
+        timings, queries, sizes = [], [], []
+        for i in range(warmup + iterations):
+            before = counter.count
+            start = time.perf_counter()
+            response = client.open(path, method=method, data=data)
+            body = response.get_data()
+            elapsed = time.perf_counter() - start
+            if response.status_code != expected:
+                raise SystemExit(f'{name}: status {response.status_code} (esperado {expected}): {body[:200]!r}')
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                queries.append(counter.count - before)
+                sizes.append(len(body))
+        results.append({
+            'name': name,
+            'method': method,
+            'path': path,
+            'iterations': iterations,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries_per_request': round(statistics.fmean(queries), 2),
+            'response_bytes': int(statistics.fmean(sizes)),
+        })
+        print(f"{name:40s} p50={results[-1]['p50_ms']:9.2f}ms p95={results[-1]['p95_ms']:9.2f}ms "
+              f"p99={results[-1]['p99_ms']:9.2f}ms queries={results[-1]['queries_per_request']:.1f}")
+
+    with app.app_context():
+        volumes = {
+            'pacientes': db.session.scalar(select(func.count()).select_from(Pacientes)),
+            'atendimentos': db.session.scalar(select(func.count()).select_from(Atendimentos)),
+        }
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+    return {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'database': db_path,
+        'volumes': volumes,
+        'warmup': warmup,
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'scenarios': results,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help='Arquivo SQLite gerado por benchmarks.seed.')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', action='append', help='Roda só o cenário indicado (pode repetir).')
+    parser.add_argument('--output', help='Grava o resultado em JSON neste arquivo.')
+    args = parser.parse_args(argv)
+
+    report = run(args.db, iterations=args.iterations, warmup=args.warmup, only=args.only)
+    print(f"pico de RSS: {report['peak_rss_mb']} MB")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Gerador de dados sintéticos para os benchmarks.
+
+Uso:
+    python -m benchmarks.seed --db /tmp/clinica-bench.db
+    python -m benchmarks.seed --db /tmp/clinica-bench.db --scale 0.01
+
+Volumes padrão: 200 mil pacientes e 2 milhões de atendimentos (multiplicados
+por --scale), 50 especialidades e 20 usuários. A geração é
+determinística (--seed), então duas execuções produzem o mesmo banco.
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.especialidades_model import Especialidades
+from src.main.models.pacientes_model import Pacientes
+from src.main.models.usuarios_model import Usuarios
+from src.main.services.resumo import rebuild_resumo
+from src.main.services.documentos import digits_only
+
+BENCH_PASSWORD = 'bench-senha'
+CHUNK = 10_000
+
+PRIMEIROS = ['Ana', 'João', 'Maria', 'José', 'Francisco', 'Antônia', 'Carlos', 'Paulo', 'Lúcia', 'Pedro',
+             'Luiz', 'Marcos', 'Luís', 'Gabriel', 'Rafael', 'Adriana', 'Juliana', 'Márcia', 'Fernanda', 'Patrícia',
+             'Aline', 'Sandra', 'Camila', 'Amanda', 'Bruna', 'Jéssica', 'Letícia', 'Júlia', 'Luciana', 'Vanessa']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+              'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+              'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques', 'Machado', 'Mendes', 'Freitas']
+RUAS = ['Rua das Flores', 'Av. Brasil', 'Rua São João', 'Rua Sete de Setembro', 'Av. Getúlio Vargas', 'Rua da Paz']
+
+
+class BenchConfig:
+    TESTING = True
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'bench-secret'
+    WTF_CSRF_ENABLED = False
+    SQL_INSTRUMENTATION = False
+
+
+def make_config(db_path: str):
+    return type('BenchConfig', (BenchConfig,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+
+
+def _cpf(n: int) -> str:
+    d = f'{n:011d}'
+    return f'{d[:3]}.{d[3:6]}.{d[6:9]}-{d[9:]}'
+
+
+def _chunks(rows, size=CHUNK):
+    buf = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= size:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+
+def seed(db_path: str, pacientes: int, atendimentos: int, especialidades: int, usuarios: int, rnd_seed: int = 42):
+    rnd = random.Random(rnd_seed)
+    app = create_app(make_config(db_path))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        senha = generate_password_hash(BENCH_PASSWORD)
+        db.session.execute(insert(Usuarios.__table__), [
+            {'usuario': f'user{i}', 'senha': senha, 'cargo': 'admin' if i == 0 else 'user'}
+            for i in range(usuarios)])
+        db.session.execute(insert(Especialidades.__table__), [
+            {'nome_especialidade': f'Especialidade {i:02d}'} for i in range(especialidades)])
+        db.session.commit()
+
+        t0 = time.perf_counter()
+        nascimento_base = date(1930, 1, 1)
+        paciente_rows = ({
+            'nome': f'{rnd.choice(PRIMEIROS)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}',
+            'data_nascimento': nascimento_base + timedelta(days=rnd.randrange(33_000)),
+            'cpf': _cpf(10_000_000 + i * 7),
+            'cpf_digits': digits_only(_cpf(10_000_000 + i * 7)),
+            'cartao_sus': f'7{i:014d}',
+            'cartao_sus_digits': f'7{i:014d}',
+            'endereco': f'{rnd.choice(RUAS)}, {rnd.randrange(1, 3000)}',
+        } for i in range(pacientes))
+        for chunk in _chunks(paciente_rows):
+            db.session.execute(insert(Pacientes.__table__), chunk)
+        db.session.commit()
+        print(f'{pacientes} pacientes em {time.perf_counter() - t0:.1f}s')
+
+        # atendimentos espalhados pelos últimos 2 anos, em ordem cronológica
+        t0 = time.perf_counter()
+        inicio = datetime.now() - timedelta(days=730)
+        passo = 730 * 86400 / max(atendimentos, 1)
+
+        def atendimento_rows():
+            for i in range(atendimentos):
+                pid = rnd.randrange(pacientes) + 1 if pacientes else None
+                eid = rnd.randrange(especialidades) + 1 if especialidades else None
+                uid = rnd.randrange(usuarios) + 1
+                yield {
+                    'paciente_nome': f'Paciente {pid}',
+                    'paciente_cpf': _cpf(10_000_000 + (pid - 1) * 7) if pid else None,
+                    'paciente_cpf_digits': digits_only(_cpf(10_000_000 + (pid - 1) * 7)) if pid else None,
+                    'paciente_id': pid,
+                    'especialidade': f'Especialidade {eid - 1:02d}' if eid else None,
+                    'especialidade_id': eid,
+                    'criado_por': f'user{uid - 1}',
+                    'criado_por_id': uid,
+                    'criado_em': inicio + timedelta(seconds=i * passo),
+                }
+
+        for chunk in _chunks(atendimento_rows()):
+            db.session.execute(insert(Atendimentos.__table__), chunk)
+        db.session.commit()
+        print(f'{atendimentos} atendimentos em {time.perf_counter() - t0:.1f}s')
+
+        rebuild_resumo()
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', required=True, help='Arquivo SQLite a (re)criar.')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplicador dos volumes padrão.')
+    parser.add_argument('--pacientes', type=int, default=200_000)
+    parser.add_argument('--atendimentos', type=int, default=2_000_000)
+    parser.add_argument('--especialidades', type=int, default=50)
+    parser.add_argument('--usuarios', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    seed(args.db,
+         pacientes=int(args.pacientes * args.scale),
+         atendimentos=int(args.atendimentos * args.scale),
+         especialidades=args.especialidades,
+         usuarios=args.usuarios,
+         rnd_seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Microbenchmark da serialização de listas: caminho antigo x services/serializacao.
+
+Uso:
+    python -m benchmarks.serializacao
+    python -m benchmarks.serializacao --rows 100000 --repeat 5 --output /tmp/serializacao.json
+
+Sem banco: gera `--rows` linhas sintéticas de atendimentos (tuplas como as
+do select() de colunas da listagem) e de pacientes (instâncias do modelo) e
+compara, dentro de um request context,
+
+- antigo: strftime por linha + jsonify da lista de dicts;
+- rápido: datas por fatias/cache + json_array_response (encoder único,
+  array em blocos).
+
+Antes de medir confere que os dois produzem exatamente os mesmos bytes.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from flask import jsonify
+
+from src.main.server import create_app
+from src.main.models.pacientes_model import Pacientes
+from src.main.routes.atendimentos import ATENDIMENTO_FIELDS, row_to_dict
+from src.main.services.serializacao import json_array_response
+
+
+class MicroConfig:
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'bench'
+    # muitas linhas numa resposta só: mede o corpo inteiro, sem streaming
+    JSON_ARRAY_CHUNK_SIZE = 10 ** 9
+
+
+def _atendimento_rows(n, rng):
+    base = datetime(2024, 1, 1, 7, 0, 0)
+    return [(i, f'Paciente {i}', f'{rng.randrange(10 ** 11):011d}', 'Clínica Geral', 'recepcao',
+             base + timedelta(seconds=rng.randrange(3 * 365 * 86400)), i, rng.randrange(1, 51), 1)
+            for i in range(1, n + 1)]
+
+
+def _pacientes(n, rng):
+    return [Pacientes(id=i, nome=f'Paciente {i}', cpf=f'{i:011d}', cartao_sus=None, endereco='Rua A, 1',
+                      data_nascimento=date(1940, 1, 1) + timedelta(days=rng.randrange(80 * 365)))
+            for i in range(1, n + 1)]
+
+
+def _legacy_atendimento(row):
+    d = dict(zip(ATENDIMENTO_FIELDS, row))
+    d['criado_em'] = d['criado_em'].strftime("%d-%m-%Y %H:%M:%S") if d['criado_em'] else None
+    return d
+
+
+def _legacy_paciente(p):
+    return {
+        'id': p.id,
+        'nome': p.nome,
+        'data_nascimento': p.data_nascimento.strftime("%d-%m-%Y") if p.data_nascimento else None,
+        'data_nascimento_form': p.data_nascimento.strftime("%Y-%m-%d") if p.data_nascimento else None,
+        'cpf': p.cpf,
+        'cartao_sus': p.cartao_sus,
+        'endereco': p.endereco,
+    }
+
+
+def _best_of(fn, repeat):
+    timings, body = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições; vale a melhor.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Grava o resultado em JSON neste arquivo.')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    app = create_app(MicroConfig)
+    cases = {
+        'atendimentos': (_atendimento_rows(args.rows, rng), _legacy_atendimento,
+                         lambda r: row_to_dict(r, ATENDIMENTO_FIELDS)),
+        'pacientes': (_pacientes(args.rows, rng), _legacy_paciente, Pacientes.to_dict),
+    }
+
+    results = []
+    with app.test_request_context():
+        for name, (items, legacy, fast) in cases.items():
+            legacy_ms, legacy_body = _best_of(lambda: jsonify([legacy(i) for i in items]).get_data(), args.repeat)
+            fast_ms, fast_body = _best_of(lambda: json_array_response(items, fast).get_data(), args.repeat)
+            if fast_body != legacy_body:
+                raise SystemExit(f'{name}: saída diferente do serializador atual')
+            result = {'case': name, 'rows': args.rows, 'bytes': len(fast_body),
+                      'legacy_ms': round(legacy_ms, 1), 'fast_ms': round(fast_ms, 1),
+                      'speedup': round(legacy_ms / fast_ms, 2)}
+            results.append(result)
+            print(f"{name:14s} {args.rows} linhas, {len(fast_body) / 1e6:.1f} MB: "
+                  f"antigo={legacy_ms:8.1f}ms rápido={fast_ms:8.1f}ms ({result['speedup']}x)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
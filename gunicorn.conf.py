@@ -0,0 +1,67 @@
+"""Configuração do gunicorn para produção.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Variáveis de ambiente: GUNICORN_BIND, GUNICORN_WORKERS (padrão: 2 x núcleos
++ 1), GUNICORN_THREADS, GUNICORN_MAX_REQUESTS e GUNICORN_MAX_REQUESTS_JITTER.
+
+Cada worker tem o próprio pool de conexões: workers x (DB_POOL_SIZE +
+DB_MAX_OVERFLOW) precisa caber no max_connections do MySQL (151 por padrão).
+Sem DB_POOL_SIZE/DB_MAX_OVERFLOW no ambiente, o pool de cada worker sai de
+DB_MAX_CONNECTIONS (padrão 140, deixando folga para CLI, migrações e
+administração):
+
+    por_worker   = DB_MAX_CONNECTIONS // workers
+    DB_POOL_SIZE = min(5, por_worker)
+    DB_MAX_OVERFLOW = min(10, por_worker - DB_POOL_SIZE)
+
+Ex.: 8 núcleos -> 17 workers -> 8 conexões por worker (5 + 3) -> até 136.
+No modo ASGI cada worker tem também o engine assíncrono, com as mesmas
+opções: use metade do limite em DB_MAX_CONNECTIONS.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+max_connections = int(os.getenv('DB_MAX_CONNECTIONS', '140'))
+# o padrão nunca passa de uma conexão por worker
+workers = int(os.getenv('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, max_connections)))
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+
+
+def pool_defaults(workers: int, max_connections: int) -> dict:
+    """DB_POOL_SIZE e DB_MAX_OVERFLOW que fazem workers x pool caber em max_connections."""
+    per_worker = max(max_connections // workers, 1)
+    pool_size = min(5, per_worker)
+    return {'DB_POOL_SIZE': pool_size, 'DB_MAX_OVERFLOW': min(10, per_worker - pool_size)}
+
+
+# antes do preload_app: o Config lê DB_POOL_* ao importar o app
+for _name, _value in pool_defaults(workers, max_connections).items():
+    os.environ.setdefault(_name, str(_value))
+
+# importa create_app uma vez no mestre, antes do fork
+preload_app = True
+
+# recicla cada worker depois de N requisições (o jitter evita que todos
+# reiniciem juntos); o worker termina as requisições em andamento antes
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # conexões abertas no mestre (ex.: por algum hook do preload) não podem
+    # ser usadas por dois processos: cada worker começa com o pool vazio
+    from src.main.repository.database import dispose_engines
+    app = worker.app.wsgi()
+    dispose_engines(getattr(app, 'flask_app', app))
+    # modo ASGI (-k uvicorn.workers.UvicornWorker): engine assíncrono também
+    engine = getattr(app, 'engine', None)
+    if engine is not None:
+        engine.sync_engine.dispose(close=False)
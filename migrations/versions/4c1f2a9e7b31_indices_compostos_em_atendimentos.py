@@ -0,0 +1,38 @@
+"""Índices compostos em atendimentos e remoção de data_hora
+
+A revisão d0e66419bb09 voltou a adicionar data_hora (NOT NULL), mas o
+modelo usa criado_em; a coluna é removida aqui para o schema bater com o
+modelo.
+
+Revision ID: 4c1f2a9e7b31
+Revises: d0e66419bb09
+Create Date: 2026-10-18 09:12:41.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1f2a9e7b31'
+down_revision = 'd0e66419bb09'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_column('data_hora')
+        batch_op.create_index('ix_atendimentos_criado_em', ['criado_em', 'id'], unique=False)
+        batch_op.create_index('ix_atendimentos_paciente_id_criado_em', ['paciente_id', 'criado_em'], unique=False)
+        batch_op.create_index('ix_atendimentos_paciente_cpf_criado_em', ['paciente_cpf', 'criado_em'], unique=False)
+        batch_op.create_index('ix_atendimentos_especialidade_id_criado_em', ['especialidade_id', 'criado_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_index('ix_atendimentos_especialidade_id_criado_em')
+        batch_op.drop_index('ix_atendimentos_paciente_cpf_criado_em')
+        batch_op.drop_index('ix_atendimentos_paciente_id_criado_em')
+        batch_op.drop_index('ix_atendimentos_criado_em')
+        batch_op.add_column(sa.Column('data_hora', sa.DateTime(), nullable=True))
@@ -0,0 +1,56 @@
+"""Índice textual de pacientes (FTS5 no SQLite, FULLTEXT ngram no MySQL)
+
+Revision ID: 8e3d5b0c41f7
+Revises: 4c1f2a9e7b31
+Create Date: 2026-10-18 10:02:17.448210
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3d5b0c41f7'
+down_revision = '4c1f2a9e7b31'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE pacientes_fts USING fts5("
+    "nome, cpf, content='pacientes', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER pacientes_fts_ai AFTER INSERT ON pacientes BEGIN "
+    "INSERT INTO pacientes_fts(rowid, nome, cpf) VALUES (new.id, new.nome, new.cpf); END",
+    "CREATE TRIGGER pacientes_fts_ad AFTER DELETE ON pacientes BEGIN "
+    "INSERT INTO pacientes_fts(pacientes_fts, rowid, nome, cpf) VALUES ('delete', old.id, old.nome, old.cpf); END",
+    "CREATE TRIGGER pacientes_fts_au AFTER UPDATE OF nome, cpf ON pacientes BEGIN "
+    "INSERT INTO pacientes_fts(pacientes_fts, rowid, nome, cpf) VALUES ('delete', old.id, old.nome, old.cpf); "
+    "INSERT INTO pacientes_fts(rowid, nome, cpf) VALUES (new.id, new.nome, new.cpf); END",
+    # indexa os pacientes já existentes
+    "INSERT INTO pacientes_fts(pacientes_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS pacientes_fts_au",
+    "DROP TRIGGER IF EXISTS pacientes_fts_ad",
+    "DROP TRIGGER IF EXISTS pacientes_fts_ai",
+    "DROP TABLE IF EXISTS pacientes_fts",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for stmt in SQLITE_UPGRADE:
+            op.execute(stmt)
+    elif dialect == 'mysql':
+        op.execute("CREATE FULLTEXT INDEX ft_pacientes_nome_cpf ON pacientes (nome, cpf) WITH PARSER ngram")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for stmt in SQLITE_DOWNGRADE:
+            op.execute(stmt)
+    elif dialect == 'mysql':
+        op.drop_index('ft_pacientes_nome_cpf', table_name='pacientes')
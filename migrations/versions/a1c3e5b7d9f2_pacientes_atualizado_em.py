@@ -0,0 +1,30 @@
+"""pacientes.atualizado_em (releitura incremental do autocomplete)
+
+Revision ID: a1c3e5b7d9f2
+Revises: f5a7c9e1d3b4
+Create Date: 2026-10-19 10:12:31.508114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5b7d9f2'
+down_revision = 'f5a7c9e1d3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # linhas existentes ficam NULL: entram na montagem completa do índice,
+    # não nas releituras incrementais
+    with op.batch_alter_table('pacientes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('atualizado_em', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_pacientes_atualizado_em'), ['atualizado_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pacientes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_pacientes_atualizado_em'))
+        batch_op.drop_column('atualizado_em')
@@ -0,0 +1,36 @@
+"""Tabela atendimentos_resumo (contagem por dia/especialidade/usuário)
+
+Revision ID: a7b9c2d4e6f8
+Revises: 8e3d5b0c41f7
+Create Date: 2026-10-18 11:20:05.912733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7b9c2d4e6f8'
+down_revision = '8e3d5b0c41f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('atendimentos_resumo',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('especialidade_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('criado_por_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia', 'especialidade_id', 'criado_por_id')
+    )
+    # backfill a partir dos atendimentos existentes
+    op.execute(
+        "INSERT INTO atendimentos_resumo (dia, especialidade_id, criado_por_id, total) "
+        "SELECT date(criado_em), coalesce(especialidade_id, 0), criado_por_id, count(*) "
+        "FROM atendimentos GROUP BY date(criado_em), coalesce(especialidade_id, 0), criado_por_id"
+    )
+
+
+def downgrade():
+    op.drop_table('atendimentos_resumo')
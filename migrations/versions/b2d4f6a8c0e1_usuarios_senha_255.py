@@ -0,0 +1,34 @@
+"""usuarios.senha de 200 para 255 caracteres (hash configurável)
+
+Revision ID: b2d4f6a8c0e1
+Revises: a1c3e5b7d9f2
+Create Date: 2026-10-19 15:40:07.214395
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d4f6a8c0e1'
+down_revision = 'a1c3e5b7d9f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # scrypt com salt de 16 já ocupa 162; sobra espaço para salts e métodos
+    # maiores (PASSWORD_HASH_METHOD/PASSWORD_SALT_LENGTH, conferidos no create_app)
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.alter_column('senha',
+               existing_type=sa.String(length=200),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('usuarios', schema=None) as batch_op:
+        batch_op.alter_column('senha',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=200),
+               existing_nullable=False)
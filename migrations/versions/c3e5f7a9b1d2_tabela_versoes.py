@@ -0,0 +1,29 @@
+"""Tabela tabela_versoes (versão por tabela para GETs condicionais)
+
+Revision ID: c3e5f7a9b1d2
+Revises: a7b9c2d4e6f8
+Create Date: 2026-10-18 19:02:41.327561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e5f7a9b1d2'
+down_revision = 'a7b9c2d4e6f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tabela_versoes',
+    sa.Column('nome', sa.String(length=64), nullable=False),
+    sa.Column('versao', sa.BigInteger(), nullable=False),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('nome')
+    )
+
+
+def downgrade():
+    op.drop_table('tabela_versoes')
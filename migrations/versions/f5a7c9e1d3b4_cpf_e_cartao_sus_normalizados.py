@@ -0,0 +1,100 @@
+"""CPF e cartão SUS normalizados (só dígitos) com índices
+
+Revision ID: f5a7c9e1d3b4
+Revises: e4f6a8c0b2d3
+Create Date: 2026-10-18 21:02:47.318206
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5a7c9e1d3b4'
+down_revision = 'e4f6a8c0b2d3'
+branch_labels = None
+depends_on = None
+
+# ids por lote no backfill; cada lote é um SELECT por faixa de id e um UPDATE executemany
+CHUNK_SIZE = 5000
+_NON_DIGITS = re.compile(r'[^0-9]')
+
+
+def _digits(value):
+    if value is None:
+        return None
+    return _NON_DIGITS.sub('', value) or None
+
+
+def _backfill(conn, table, columns, unique=False):
+    """Preenche as colunas *_digits de `table` por faixas de id.
+
+    `columns` é {origem: destino}. Com unique=True, um valor repetido (o
+    mesmo documento digitado com e sem pontuação) fica só no menor id; os
+    demais ficam NULL e são listados no fim, para correção manual.
+    """
+    t = sa.table(table, sa.column('id'), *(sa.column(c) for pair in columns.items() for c in pair))
+    seen = {dst: set() for dst in columns.values()}
+    duplicates = []
+    max_id = conn.execute(sa.select(sa.func.max(t.c.id))).scalar() or 0
+    for lo in range(1, max_id + 1, CHUNK_SIZE):
+        rows = conn.execute(
+            sa.select(t.c.id, *(t.c[src] for src in columns))
+            .where(t.c.id >= lo, t.c.id < lo + CHUNK_SIZE)
+            .where(sa.or_(*(t.c[src].isnot(None) for src in columns)))
+        ).all()
+        params = []
+        for row in rows:
+            values = {'_id': row.id}
+            for src, dst in columns.items():
+                digits = _digits(row._mapping[src])
+                if unique and digits is not None:
+                    if digits in seen[dst]:
+                        duplicates.append((row.id, src, row._mapping[src]))
+                        digits = None
+                    else:
+                        seen[dst].add(digits)
+                values[dst] = digits
+            params.append(values)
+        if params:
+            conn.execute(
+                t.update().where(t.c.id == sa.bindparam('_id'))
+                .values({dst: sa.bindparam(dst) for dst in columns.values()}),
+                params)
+    for row_id, src, value in duplicates:
+        print(f'{table}.id={row_id}: {src} {value!r} repetido (só dígitos); {src}_digits ficou NULL')
+
+
+def upgrade():
+    with op.batch_alter_table('pacientes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cpf_digits', sa.String(length=14), nullable=True))
+        batch_op.add_column(sa.Column('cartao_sus_digits', sa.String(length=30), nullable=True))
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('paciente_cpf_digits', sa.String(length=14), nullable=True))
+
+    conn = op.get_bind()
+    _backfill(conn, 'pacientes', {'cpf': 'cpf_digits', 'cartao_sus': 'cartao_sus_digits'}, unique=True)
+    _backfill(conn, 'atendimentos', {'paciente_cpf': 'paciente_cpf_digits'})
+
+    # índices criados depois do backfill: mais rápido que mantê-los linha a linha
+    with op.batch_alter_table('pacientes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_pacientes_cpf_digits'), ['cpf_digits'], unique=True)
+        batch_op.create_index(batch_op.f('ix_pacientes_cartao_sus_digits'), ['cartao_sus_digits'], unique=True)
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_index('ix_atendimentos_paciente_cpf_criado_em')
+        batch_op.create_index('ix_atendimentos_paciente_cpf_digits_criado_em',
+                              ['paciente_cpf_digits', 'criado_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('atendimentos', schema=None) as batch_op:
+        batch_op.drop_index('ix_atendimentos_paciente_cpf_digits_criado_em')
+        batch_op.create_index('ix_atendimentos_paciente_cpf_criado_em', ['paciente_cpf', 'criado_em'], unique=False)
+        batch_op.drop_column('paciente_cpf_digits')
+    with op.batch_alter_table('pacientes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_pacientes_cartao_sus_digits'))
+        batch_op.drop_index(batch_op.f('ix_pacientes_cpf_digits'))
+        batch_op.drop_column('cartao_sus_digits')
+        batch_op.drop_column('cpf_digits')
@@ -4,5 +4,6 @@ from src.main.server import create_app
 app = create_app()
 
 if __name__ == '__main__':
-    # O modo de debug nunca deve ser usado em produção!
+    # O modo de debug nunca deve ser usado em produção! Lá use o gunicorn:
+    #     gunicorn -c gunicorn.conf.py wsgi:app
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
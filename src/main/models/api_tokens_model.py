@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from src.main.repository.database import db
+
+
+class ApiTokens(db.Model):
+    """Token de API (Authorization: Bearer) emitido por um admin para um usuário.
+
+    Só o SHA-256 do token é gravado; o valor em claro aparece uma única vez,
+    na resposta da emissão. `prefixo` identifica o token nas listagens.
+    """
+    __tablename__ = 'api_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False, index=True)
+    nome = db.Column(db.String(80), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    prefixo = db.Column(db.String(16), nullable=False)
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    expira_em = db.Column(db.DateTime, nullable=True)
+    revogado_em = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'usuario_id': self.usuario_id,
+            'nome': self.nome,
+            'prefixo': self.prefixo,
+            'criado_em': self.criado_em.strftime("%d-%m-%Y %H:%M:%S") if self.criado_em else None,
+            'expira_em': self.expira_em.strftime("%d-%m-%Y %H:%M:%S") if self.expira_em else None,
+            'revogado': self.revogado_em is not None,
+        }
+
+    def __repr__(self):
+        return f"<ApiToken id={self.id} usuario_id={self.usuario_id} prefixo={self.prefixo}>"
@@ -1,19 +1,36 @@
+from sqlalchemy.orm import validates
 from src.main.repository.database import db
+from src.main.services.serializacao import format_datetime
+from src.main.services.documentos import digits_only
 from datetime import datetime
 
 
 class Atendimentos(db.Model):
     __tablename__ = 'atendimentos'
+    # Índices compostos terminando em criado_em: cada filtro da listagem
+    # (paciente, cpf, especialidade) + intervalo de datas + ordenação keyset
+    # vira um range scan no índice em vez de full scan na tabela.
+    __table_args__ = (
+        db.Index('ix_atendimentos_criado_em', 'criado_em', 'id'),
+        db.Index('ix_atendimentos_paciente_id_criado_em', 'paciente_id', 'criado_em'),
+        db.Index('ix_atendimentos_paciente_cpf_digits_criado_em', 'paciente_cpf_digits', 'criado_em'),
+        db.Index('ix_atendimentos_especialidade_id_criado_em', 'especialidade_id', 'criado_em'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     paciente_nome = db.Column(db.String(120), nullable=False)
     paciente_cpf = db.Column(db.String(14), nullable=True)
+    # paciente_cpf só com dígitos (mantido por _sync_cpf_digits), usado no
+    # filtro por CPF; fora do SELECT das instâncias como em Pacientes
+    paciente_cpf_digits = db.deferred(db.Column(db.String(14), nullable=True))
     paciente_id = db.Column(db.Integer, db.ForeignKey('pacientes.id'), nullable=True)
     especialidade = db.Column(db.String(120), nullable=True)
     especialidade_id = db.Column(db.Integer, db.ForeignKey('especialidades.id'), nullable=True)
     criado_por = db.Column(db.String(80), nullable=False)
     criado_por_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
-    criado_em = db.Column(db.DateTime, nullable=False,server_default=db.func.now())
+    # default no Python além do server_default: o valor fica com o mesmo formato
+    # (inclusive no SQLite) do parâmetro do cursor da paginação keyset
+    criado_em = db.Column(db.DateTime, nullable=False, default=datetime.now, server_default=db.func.now())
 
     def to_dict(self):
         return {
@@ -22,13 +39,40 @@ class Atendimentos(db.Model):
             'paciente_cpf': self.paciente_cpf,
             'especialidade': self.especialidade,
             'criado_por': self.criado_por,
-            'criado_em': self.criado_em.strftime("%d-%m-%Y %H:%M:%S") if self.criado_em else None,
+            'criado_em': format_datetime(self.criado_em),
         }
 
     def __repr__(self):
         return f"<Atendimento id={self.id} paciente={self.paciente_nome} especialidade={self.especialidade}>"
 
-  
+    @validates('paciente_cpf')
+    def _sync_cpf_digits(self, key, value):
+        self.paciente_cpf_digits = digits_only(value)
+        return value
+
+    DATETIME_FORMATS = (
+        "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M",
+        "%d-%m-%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%Y-%m-%d", "%d-%m-%Y",
+    )
+
+    @classmethod
+    def _parse_datetime(cls, value):
+        """Parse a datetime from the formats accepted by the API.
+
+        Accepts YYYY-MM-DD and DD-MM-YYYY, with optional HH:MM[:SS].
+        Returns a datetime or raises ValueError.
+        """
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, str):
+            value = value.strip()
+            for fmt in cls.DATETIME_FORMATS:
+                try:
+                    return datetime.strptime(value, fmt)
+                except ValueError:
+                    continue
+        raise ValueError(f"Invalid datetime format: {value}")
+
 
     @classmethod
     def from_dict(cls, data: dict):
@@ -62,6 +106,8 @@ class Atendimentos(db.Model):
         # Valida especialidade_id e busca nome
         especialidade = data.get('especialidade')
         if especialidade_id:
+            # do banco, não do cache de especialidades: o snapshot de outro
+            # processo pode estar atrasado e o nome fica gravado na cópia
             from src.main.models.especialidades_model import Especialidades
             e = db.session.get(Especialidades, int(especialidade_id))
             if e is None:
@@ -75,12 +121,12 @@ class Atendimentos(db.Model):
             raise ValueError(f'Usuário com ID {criado_por_id} não existe')
         criado_por = u.usuario
         
-        # Lógica para data_hora
+        # A coluna data_hora foi removida; o valor (se enviado) vira o criado_em
         data_hora_raw = data.get('data_hora')
         if data_hora_raw:
-            data_hora = cls._parse_datetime(data_hora_raw)
+            criado_em = cls._parse_datetime(data_hora_raw)
         else:
-            data_hora = datetime.now()
+            criado_em = datetime.now()
 
         return cls(
             paciente_nome=paciente_nome,
@@ -88,11 +134,91 @@ class Atendimentos(db.Model):
             paciente_id=paciente_id,
             especialidade=especialidade,
             especialidade_id=especialidade_id,
-            data_hora=data_hora,
+            criado_em=criado_em,
             criado_por=criado_por,
             criado_por_id=criado_por_id,
         )
     
+    @classmethod
+    def bulk_rows_from_dicts(cls, items, criado_por_id: int, criado_por: str):
+        """Valida um lote de dicts e devolve (rows, errors).
+
+        Faz o mesmo que from_dict para cada item, mas resolve os pacientes e
+        as especialidades com uma única consulta IN (...) por tabela. `rows`
+        são dicts prontos para um insert em lote (executemany); `errors` é
+        uma lista de {'index': i, 'error': mensagem}. Não faz commit no DB.
+        """
+        from src.main.models.pacientes_model import Pacientes
+        from src.main.models.especialidades_model import Especialidades
+
+        def _id(value):
+            return int(value) if value not in (None, '') else None
+
+        # 1ª passada: coleta os ids referenciados
+        parsed, errors = [], []
+        for i, data in enumerate(items):
+            if not isinstance(data, dict):
+                errors.append({'index': i, 'error': 'Cada atendimento deve ser um objeto JSON.'})
+                continue
+            try:
+                parsed.append((i, data, _id(data.get('paciente_id')), _id(data.get('especialidade_id'))))
+            except (TypeError, ValueError):
+                errors.append({'index': i, 'error': 'paciente_id e especialidade_id devem ser números inteiros.'})
+
+        paciente_ids = {p for _, _, p, _ in parsed if p}
+        especialidade_ids = {e for _, _, _, e in parsed if e}
+        pacientes = {}
+        if paciente_ids:
+            pacientes = {r.id: r for r in db.session.execute(
+                db.select(Pacientes.id, Pacientes.nome, Pacientes.cpf).where(Pacientes.id.in_(paciente_ids)))}
+        especialidades = {}
+        if especialidade_ids:
+            # do banco, como em from_dict (o cache é só para leitura)
+            especialidades = {r.id: r.nome_especialidade for r in db.session.execute(
+                db.select(Especialidades.id, Especialidades.nome_especialidade)
+                .where(Especialidades.id.in_(especialidade_ids)))}
+
+        # 2ª passada: monta as linhas com as mesmas regras de from_dict
+        rows = []
+        for i, data, paciente_id, especialidade_id in parsed:
+            try:
+                if paciente_id:
+                    p = pacientes.get(paciente_id)
+                    if p is None:
+                        raise ValueError(f'Paciente com ID {paciente_id} não existe')
+                    paciente_nome, paciente_cpf = p.nome, p.cpf
+                else:
+                    paciente_nome, paciente_cpf = data.get('paciente_nome'), None
+                if not paciente_nome:
+                    raise ValueError('É necessário selecionar um paciente (paciente_id) ou informar um nome (paciente_nome).')
+
+                especialidade = data.get('especialidade')
+                if especialidade_id:
+                    if especialidade_id not in especialidades:
+                        raise ValueError(f'Especialidade com ID {especialidade_id} não existe')
+                    especialidade = especialidades[especialidade_id]
+
+                data_hora_raw = data.get('data_hora')
+                criado_em = cls._parse_datetime(data_hora_raw) if data_hora_raw else datetime.now()
+            except ValueError as e:
+                errors.append({'index': i, 'error': str(e)})
+                continue
+
+            rows.append({
+                'paciente_nome': paciente_nome,
+                'paciente_cpf': paciente_cpf,
+                'paciente_cpf_digits': digits_only(paciente_cpf),
+                'paciente_id': paciente_id,
+                'especialidade': especialidade,
+                'especialidade_id': especialidade_id,
+                'criado_em': criado_em,
+                'criado_por': criado_por,
+                'criado_por_id': criado_por_id,
+            })
+
+        errors.sort(key=lambda e: e['index'])
+        return rows, errors
+
     def update_from_dict(self, data: dict):
         if 'paciente_nome' in data and data['paciente_nome'] is not None:
             self.paciente_nome = data['paciente_nome']
@@ -104,7 +230,7 @@ class Atendimentos(db.Model):
             d = data.get('data_hora')
             if d is None or d == '':
                 raise ValueError('data_hora cannot be empty')
-            self.data_hora = self._parse_datetime(d)
+            self.criado_em = self._parse_datetime(d)
         if 'criado_por' in data and data['criado_por'] is not None:
             self.criado_por = data['criado_por']
         return self
@@ -0,0 +1,27 @@
+from src.main.repository.database import db
+
+
+class AtendimentosResumo(db.Model):
+    """Contagem de atendimentos por dia, especialidade e usuário criador.
+
+    Mantida incrementalmente a cada flush (ver services/resumo.py) e
+    reconstruível com `flask relatorios rebuild`. Atendimentos sem
+    especialidade ficam com especialidade_id = 0.
+    """
+    __tablename__ = 'atendimentos_resumo'
+
+    dia = db.Column(db.Date, primary_key=True)
+    especialidade_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    criado_por_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'dia': self.dia.strftime("%d-%m-%Y") if self.dia else None,
+            'especialidade_id': self.especialidade_id or None,
+            'criado_por_id': self.criado_por_id,
+            'total': self.total,
+        }
+
+    def __repr__(self):
+        return f"<AtendimentosResumo dia={self.dia} especialidade={self.especialidade_id} total={self.total}>"
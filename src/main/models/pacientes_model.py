@@ -1,4 +1,8 @@
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import validates
 from src.main.repository.database import db
+from src.main.services.serializacao import date_strings
+from src.main.services.documentos import digits_only
 from datetime import datetime, date
 
 
@@ -11,13 +15,24 @@ class Pacientes(db.Model):
     cpf = db.Column(db.String(14), unique=True, nullable=True)
     cartao_sus = db.Column(db.String(30), unique=True, nullable=True)
     endereco = db.Column(db.String(255), nullable=True)
+    # cpf/cartao_sus só com dígitos, mantidos por _sync_digits: chaves das
+    # buscas por igualdade e prefixo (índices únicos). Só aparecem em WHERE,
+    # então ficam fora do SELECT das instâncias (deferred)
+    cpf_digits = db.deferred(db.Column(db.String(14), nullable=True, unique=True, index=True))
+    cartao_sus_digits = db.deferred(db.Column(db.String(30), nullable=True, unique=True, index=True))
+    # última gravação (ORM e inserts Core): o índice de autocomplete relê só
+    # as linhas alteradas desde a última sincronização. NULL = anterior à coluna
+    atualizado_em = db.deferred(db.Column(db.DateTime, nullable=True, index=True,
+                                          default=datetime.now, onupdate=datetime.now))
 
     def to_dict(self):
+        # DD-MM-YYYY para exibição e YYYY-MM-DD para o <input type="date">
+        nascimento, nascimento_form = date_strings(self.data_nascimento) if self.data_nascimento else (None, None)
         return {
             'id': self.id,
             'nome': self.nome,
-            'data_nascimento': self.data_nascimento.strftime("%d-%m-%Y") if self.data_nascimento else None,
-            'data_nascimento_form': self.data_nascimento.strftime("%Y-%m-%d") if self.data_nascimento else None,
+            'data_nascimento': nascimento,
+            'data_nascimento_form': nascimento_form,
             'cpf': self.cpf,
             'cartao_sus': self.cartao_sus,
             'endereco': self.endereco,
@@ -26,6 +41,12 @@ class Pacientes(db.Model):
     def __repr__(self):
         return f"<Paciente id={self.id} nome={self.nome}>"
 
+    @validates('cpf', 'cartao_sus')
+    def _sync_digits(self, key, value):
+        # vale para o construtor, from_dict, update_from_dict e atribuições diretas
+        setattr(self, f'{key}_digits', digits_only(value))
+        return value
+
     @staticmethod
     def _parse_date(value):
         """Parse a date from various formats. Accepts DD-MM-YYYY and YYYY-MM-DD.
@@ -84,3 +105,28 @@ class Pacientes(db.Model):
         if 'endereco' in data and data['endereco'] is not None:
             self.endereco = data['endereco']
         return self
+
+
+# --- Índice de busca textual (usado por /pacientes/search) ---
+# SQLite: tabela FTS5 de conteúdo externo, mantida por triggers em
+# insert/update/delete (inclusive inserts em lote feitos fora do ORM).
+# MySQL: índice FULLTEXT com parser ngram, mantido pelo próprio InnoDB.
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS pacientes_fts USING fts5("
+    "nome, cpf, content='pacientes', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS pacientes_fts_ai AFTER INSERT ON pacientes BEGIN "
+    "INSERT INTO pacientes_fts(rowid, nome, cpf) VALUES (new.id, new.nome, new.cpf); END",
+    "CREATE TRIGGER IF NOT EXISTS pacientes_fts_ad AFTER DELETE ON pacientes BEGIN "
+    "INSERT INTO pacientes_fts(pacientes_fts, rowid, nome, cpf) VALUES ('delete', old.id, old.nome, old.cpf); END",
+    "CREATE TRIGGER IF NOT EXISTS pacientes_fts_au AFTER UPDATE OF nome, cpf ON pacientes BEGIN "
+    "INSERT INTO pacientes_fts(pacientes_fts, rowid, nome, cpf) VALUES ('delete', old.id, old.nome, old.cpf); "
+    "INSERT INTO pacientes_fts(rowid, nome, cpf) VALUES (new.id, new.nome, new.cpf); END",
+)
+MYSQL_FULLTEXT_DDL = "CREATE FULLTEXT INDEX ft_pacientes_nome_cpf ON pacientes (nome, cpf) WITH PARSER ngram"
+
+for _stmt in SQLITE_FTS_DDL:
+    event.listen(Pacientes.__table__, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+event.listen(Pacientes.__table__, 'after_create', DDL(MYSQL_FULLTEXT_DDL).execute_if(dialect='mysql'))
+event.listen(Pacientes.__table__, 'after_drop',
+             DDL("DROP TABLE IF EXISTS pacientes_fts").execute_if(dialect='sqlite'))
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from src.main.repository.database import db
+
+
+class TabelaVersoes(db.Model):
+    """Versão de cada tabela, incrementada a cada escrita.
+
+    Usada nos GETs condicionais (ETag / Last-Modified, ver
+    services/versoes.py). Tabela sem linha aqui está na versão 0.
+    """
+    __tablename__ = 'tabela_versoes'
+
+    nome = db.Column(db.String(64), primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<TabelaVersoes {self.nome}={self.versao}>"
@@ -4,5 +4,7 @@ from src.main.repository.database import db
 class Usuarios(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     usuario = db.Column(db.String(20), unique=True, nullable=False)
-    senha = db.Column(db.String(200), nullable=False)
+    # hash do Werkzeug; o tamanho do método/salt configurado é conferido no
+    # create_app (services.auth.validate_hash_settings)
+    senha = db.Column(db.String(255), nullable=False)
     cargo = db.Column(db.String(20), nullable=False, default="admin")
\ No newline at end of file
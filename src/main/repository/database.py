@@ -1,3 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
+from src.main.repository.replica import RoutingSession
 
-db = SQLAlchemy()
\ No newline at end of file
+# a sessão escolhe entre o primário e a réplica (bind 'replica') por operação
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def dispose_engines(app):
+    """Esquece as conexões herdadas do processo pai; chamar logo após o fork.
+
+    close=False: o filho descarta o pool sem fechar os sockets, que
+    continuam sendo do processo pai.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
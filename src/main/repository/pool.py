@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Contadores acumulados de um pool (desde o início do processo)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede o tempo de espera por conexão e conta os timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() troca o pool; os contadores continuam valendo
+        new = super().recreate()
+        new.stats = self.stats
+        return new
+
+
+def pool_status(pool) -> dict:
+    """Estado atual e contadores de um pool, para o endpoint de administração."""
+    status = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        status.update(stats.to_dict())
+    return status
+
+
+def _env(name, cast, default):
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    if cast is bool:
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return cast(value)
+
+
+def engine_options_from_env(database_uri: str) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS do pool a partir das variáveis DB_POOL_*.
+
+    DB_POOL_SIZE (5), DB_MAX_OVERFLOW (10), DB_POOL_TIMEOUT (30 s),
+    DB_POOL_RECYCLE (1800 s, abaixo do wait_timeout do MySQL) e
+    DB_POOL_PRE_PING (true). SQLite em memória usa um pool próprio e fica
+    sem essas opções.
+    """
+    if database_uri.startswith('sqlite') and (':memory:' in database_uri or database_uri.rstrip('/') == 'sqlite:'):
+        return {}
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': _env('DB_POOL_SIZE', int, 5),
+        'max_overflow': _env('DB_MAX_OVERFLOW', int, 10),
+        'pool_timeout': _env('DB_POOL_TIMEOUT', float, 30),
+        'pool_recycle': _env('DB_POOL_RECYCLE', int, 1800),
+        'pool_pre_ping': _env('DB_POOL_PRE_PING', bool, True),
+    }
@@ -0,0 +1,117 @@
+"""Leituras numa réplica (bind 'replica'), escritas sempre no primário.
+
+Com SQLALCHEMY_REPLICA_URI configurado, a sessão do Flask-SQLAlchemy passa
+a escolher o engine por operação (RoutingSession.get_bind):
+
+- só as views marcadas com @read_replica (listagens, detalhes, busca, home)
+  leem da réplica; todo o resto, CLI e threads de fundo usam o primário;
+- flush, INSERT/UPDATE/DELETE Core e tudo o que vier depois de uma escrita
+  na mesma transação vão para o primário, mesmo dentro de uma view de
+  leitura;
+- depois de um commit com escrita, a sessão do usuário (cookie) guarda até
+  quando as leituras dele devem continuar no primário
+  (REPLICA_STICKY_SECONDS, padrão 5 s): quem acabou de gravar não lê da
+  réplica atrasada o que ainda não chegou lá. Integrações por token que
+  não devolvem o cookie não têm essa garantia entre requisições.
+
+Identidade (usuário da sessão, cargo, tokens de API) e os caches do
+processo leem sempre do primário, via primary().
+
+Sem o bind 'replica' nada muda: tudo vai para o engine padrão.
+"""
+import time
+from contextlib import contextmanager
+
+from flask import current_app, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+DEFAULT_STICKY_SECONDS = 5
+
+# chave no cookie de sessão: até quando (epoch) ler do primário
+SESSION_KEY = '_primary_until'
+# em session.info: houve escrita na transação atual / primary() ativo
+_WROTE = 'replica_wrote'
+_FORCED = 'replica_forced'
+
+
+def replica_binds(uri) -> dict:
+    """SQLALCHEMY_BINDS com a réplica, se houver URI."""
+    return {REPLICA_BIND: uri} if uri else {}
+
+
+def init_replica(app, db):
+    """Chamar logo após db.init_app(app).
+
+    O Flask-SQLAlchemy cria uma MetaData para cada bind; a réplica espelha o
+    esquema do primário e não tem tabelas próprias, então a dela é
+    descartada: create_all/drop_all (bind_key='__all__') e as migrações
+    continuam só no primário.
+    """
+    if REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {}):
+        db.metadatas.pop(REPLICA_BIND, None)
+
+
+def read_replica(view):
+    """Marca uma view como só-leitura: suas consultas podem ir para a réplica."""
+    # atributo na própria função: login_required/conditional (functools.wraps) o copiam
+    view.read_replica = True
+    return view
+
+
+def recently_wrote() -> bool:
+    """O usuário desta requisição gravou algo há menos de REPLICA_STICKY_SECONDS."""
+    return session.get(SESSION_KEY, 0) > time.time()
+
+
+def replica_allowed() -> bool:
+    """Se as leituras desta requisição podem ir para a réplica."""
+    if not has_request_context() or request.endpoint is None:
+        return False
+    view = current_app.view_functions.get(request.endpoint)
+    return getattr(view, 'read_replica', False) and not recently_wrote()
+
+
+@contextmanager
+def primary(db_session=None):
+    """Força o primário dentro do bloco, mesmo numa view de leitura."""
+    if db_session is None:
+        from src.main.repository.database import db
+        db_session = db.session()
+    db_session.info[_FORCED] = db_session.info.get(_FORCED, 0) + 1
+    try:
+        yield
+    finally:
+        db_session.info[_FORCED] -= 1
+
+
+def _is_write(clause) -> bool:
+    return clause is not None and getattr(clause, 'is_dml', False)
+
+
+class RoutingSession(Session):
+    """Session do Flask-SQLAlchemy que manda as leituras permitidas para a réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or _is_write(clause):
+                self.info[_WROTE] = True
+            elif not self.info.get(_WROTE) and not self.info.get(_FORCED):
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None and replica_allowed():
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(db_session):
+    wrote = db_session.info.pop(_WROTE, False)
+    if wrote and has_request_context() and REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        seconds = current_app.config.get('REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+        session[SESSION_KEY] = time.time() + seconds
+
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def _forget_write(db_session, previous_transaction):
+    db_session.info.pop(_WROTE, None)
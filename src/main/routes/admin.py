@@ -0,0 +1,76 @@
+from flask import Blueprint, jsonify, request, abort
+from flask_login import login_required
+from src.main.repository.database import db
+from src.main.repository.pool import pool_status
+from src.main.models.api_tokens_model import ApiTokens
+from src.main.models.usuarios_model import Usuarios
+from src.main.services.auth import is_admin
+from src.main.services.api_tokens import issue_token, revoke_token
+from src.main.services.autocomplete import memory_report
+
+admin_route_bp = Blueprint('admin_route', __name__)
+
+
+@admin_route_bp.route('/pool', methods=['GET'])
+@login_required
+def pool_stats():
+    """Estado dos pools de conexão de cada engine (checked out, overflow, espera, timeouts)."""
+    if not is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    return jsonify({
+        (key or 'default'): pool_status(engine.pool)
+        for key, engine in db.engines.items()
+    })
+
+
+@admin_route_bp.route('/autocomplete', methods=['GET'])
+@login_required
+def autocomplete_stats():
+    """Tamanho do índice de autocomplete de pacientes (contagens e bytes por parte)."""
+    if not is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    return jsonify(memory_report())
+
+
+@admin_route_bp.route('/tokens', methods=['POST'])
+@login_required
+def create_token():
+    """Emite um token de API; o valor em claro só aparece nesta resposta."""
+    if not is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    data = request.get_json(silent=True) or request.form.to_dict() or {}
+    nome = data.get('nome')
+    if not nome:
+        return jsonify({'error': 'nome is required'}), 400
+    try:
+        usuario = db.session.get(Usuarios, int(data.get('usuario_id')))
+        expira_em_dias = int(data['expira_em_dias']) if data.get('expira_em_dias') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'invalid usuario_id or expira_em_dias'}), 400
+    if usuario is None:
+        return jsonify({'error': 'usuario not found'}), 400
+    token, raw = issue_token(usuario, nome, expira_em_dias)
+    db.session.commit()
+    return jsonify({**token.to_dict(), 'token': raw}), 201
+
+
+@admin_route_bp.route('/tokens', methods=['GET'])
+@login_required
+def list_tokens():
+    if not is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    tokens = ApiTokens.query.order_by(ApiTokens.id).all()
+    return jsonify([t.to_dict() for t in tokens])
+
+
+@admin_route_bp.route('/tokens/<int:token_id>', methods=['DELETE'])
+@login_required
+def revoke_token_route(token_id):
+    if not is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    token = db.session.get(ApiTokens, token_id)
+    if token is None:
+        abort(404)
+    revoke_token(token)
+    db.session.commit()
+    return jsonify(token.to_dict())
@@ -1,24 +1,89 @@
-from flask import Blueprint, jsonify, request, abort, redirect, url_for
+import csv
+import io
+import click
+from datetime import timedelta
+from flask import Blueprint, jsonify, request, abort, redirect, url_for, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
+from sqlalchemy import insert, select
 from src.main.repository.database import db
+from src.main.repository.replica import read_replica
 from src.main.models.atendimentos_model import Atendimentos
 from src.main.services.auth import is_admin
+from src.main.services.resumo import apply_deltas, deltas_for_rows
+from src.main.services.pagination import parse_limit, keyset_paginate, split_page
+from src.main.services.versoes import bump_versions, conditional
+from src.main.services.propagacao import repair_copies, DEFAULT_REPAIR_CHUNK_SIZE
+from src.main.services.serializacao import format_datetime, json_array_response, json_encoder
+from src.main.services.documentos import CPF_LENGTH, digits_lookup, digits_only
 
-atendimentos_route_bp = Blueprint("atendimentos_route", __name__)
+atendimentos_route_bp = Blueprint("atendimentos_route", __name__, cli_group='atendimentos')
+
+
+# chave de ordenação da paginação keyset (mais recentes primeiro)
+PAGE_ORDER = (Atendimentos.criado_em, Atendimentos.id)
+
+
+# campos de um atendimento na API, na ordem de atendimento_to_dict; são
+# também os valores aceitos em ?fields= na listagem
+ATENDIMENTO_FIELDS = ('id', 'paciente_nome', 'paciente_cpf', 'especialidade', 'criado_por', 'criado_em',
+                      'paciente_id', 'especialidade_id', 'criado_por_id')
 
 
 def atendimento_to_dict(a: Atendimentos):
     d = a.to_dict()
-    # include FK ids if available
-    if hasattr(a, 'paciente_id'):
-        d['paciente_id'] = a.paciente_id
-    if hasattr(a, 'especialidade_id'):
-        d['especialidade_id'] = a.especialidade_id
-    if hasattr(a, 'criado_por_id'):
-        d['criado_por_id'] = a.criado_por_id
+    d['paciente_id'] = a.paciente_id
+    d['especialidade_id'] = a.especialidade_id
+    d['criado_por_id'] = a.criado_por_id
     return d
 
 
+def parse_fields(raw):
+    """Converte ?fields=id,paciente_nome numa tupla de ATENDIMENTO_FIELDS.
+
+    Sem o parâmetro, todos os campos. Levanta ValueError para campos desconhecidos.
+    """
+    if raw is None or raw == '':
+        return ATENDIMENTO_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in ATENDIMENTO_FIELDS]
+    if unknown or not fields:
+        raise ValueError('invalid fields: %s (expected some of %s)' % (
+            ','.join(unknown), ','.join(ATENDIMENTO_FIELDS)))
+    return fields
+
+
+def fields_select(fields):
+    """select() só das colunas de `fields`, seguidas das que faltarem da chave
+    de paginação: as linhas saem como tuplas, sem instâncias do ORM."""
+    extra = [c.key for c in PAGE_ORDER if c.key not in fields]
+    return select(*(getattr(Atendimentos, f) for f in (*fields, *extra)))
+
+
+def row_to_dict(row, fields):
+    """Dict de um atendimento a partir de uma linha de fields_select(fields)."""
+    d = dict(zip(fields, row))
+    if 'criado_em' in d:
+        d['criado_em'] = format_datetime(d['criado_em'])
+    return d
+
+
+def _range_bound(value: str, end: bool = False):
+    """Converte start/end da query string em limite do filtro de criado_em.
+
+    O filtro é semiaberto (start <= criado_em < end): um `end` só com data
+    inclui o dia inteiro e um `end` com horário inclui aquele minuto/segundo.
+    """
+    dt = Atendimentos._parse_datetime(value)
+    if not end:
+        return dt
+    value = value.strip()
+    if len(value) == 10:
+        return dt + timedelta(days=1)
+    if value.count(':') == 1:
+        return dt + timedelta(minutes=1)
+    return dt + timedelta(seconds=1)
+
+
 @atendimentos_route_bp.route('/', methods=['POST'])
 @login_required
 def create_atendimento():
@@ -53,54 +118,204 @@ def create_atendimento():
     return redirect(url_for('home_route.home'))
 
 
-@atendimentos_route_bp.route('/', methods=['GET'])
+# tamanho máximo de um lote em POST /atendimentos/bulk
+BULK_MAX_ITEMS = 1000
+
+
+@atendimentos_route_bp.route('/bulk', methods=['POST'])
 @login_required
-def list_atendimentos():
-    # Filters via query params
-    q = Atendimentos.query
-    paciente_id = request.args.get('paciente_id')
-    paciente_cpf = request.args.get('paciente_cpf')
-    especialidade_id = request.args.get('especialidade_id')
-    especialidade = request.args.get('especialidade')
-    start = request.args.get('start')
-    end = request.args.get('end')
+def create_atendimentos_bulk():
+    """Cria vários atendimentos de uma vez (ex.: lote da triagem).
+
+    Aceita um array JSON (ou {"atendimentos": [...]}) com os mesmos campos
+    do formulário. Tudo ou nada: se algum item for inválido nada é gravado
+    e a resposta lista os erros por índice.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('atendimentos')
+    if not isinstance(data, list) or not data:
+        return jsonify({'error': 'expected a non-empty JSON array of atendimentos'}), 400
+    if len(data) > BULK_MAX_ITEMS:
+        return jsonify({'error': f'at most {BULK_MAX_ITEMS} atendimentos per request'}), 413
+
+    rows, errors = Atendimentos.bulk_rows_from_dicts(data, current_user.id, current_user.usuario)
+    if errors:
+        return jsonify({'error': 'validation error', 'errors': errors}), 400
+
+    try:
+        # um único INSERT em lote (executemany) e um único commit
+        db.session.execute(insert(Atendimentos.__table__), rows)
+        # o insert Core não passa pelos eventos do ORM: atualiza o resumo aqui
+        apply_deltas(db.session.connection(), deltas_for_rows(rows))
+        bump_versions(db.session.connection(), ['atendimentos'])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'database error', 'detail': str(e)}), 500
+    return jsonify({'created': len(rows)}), 201
+
+
+def atendimento_filters(args):
+    """Monta as condições WHERE dos filtros da query string.
+
+    Compartilhado pela listagem e pela exportação. Levanta ValueError com a
+    mensagem de erro para parâmetros inválidos.
+    """
+    conditions = []
+    paciente_id = args.get('paciente_id')
+    paciente_cpf = args.get('paciente_cpf')
+    especialidade_id = args.get('especialidade_id')
+    especialidade = args.get('especialidade')
+    start = args.get('start')
+    end = args.get('end')
 
     if paciente_id:
         try:
-            q = q.filter(Atendimentos.paciente_id == int(paciente_id))
+            conditions.append(Atendimentos.paciente_id == int(paciente_id))
         except ValueError:
-            return jsonify({'error': 'invalid paciente_id'}), 400
+            raise ValueError('invalid paciente_id')
     if paciente_cpf:
-        q = q.filter(Atendimentos.paciente_cpf == paciente_cpf)
+        # com ou sem pontuação; menos de 11 dígitos busca por prefixo
+        conditions.append(digits_lookup(Atendimentos.paciente_cpf_digits, digits_only(paciente_cpf), CPF_LENGTH))
     if especialidade_id:
         try:
-            q = q.filter(Atendimentos.especialidade_id ==
-                         int(especialidade_id))
+            conditions.append(Atendimentos.especialidade_id == int(especialidade_id))
         except ValueError:
-            return jsonify({'error': 'invalid especialidade_id'}), 400
+            raise ValueError('invalid especialidade_id')
     if especialidade:
-        q = q.filter(Atendimentos.especialidade.ilike(f"%{especialidade}%"))
+        conditions.append(Atendimentos.especialidade.ilike(f"%{especialidade}%"))
 
-    # date range filtering (start/end are parsed using model helper)
+    # date range filtering on criado_em (start/end are parsed using model helper)
     if start:
-        try:
-            sdt = Atendimentos._parse_datetime(start)
-            q = q.filter(Atendimentos.data_hora >= sdt)
-        except ValueError as e:
-            return jsonify({'error': str(e)}), 400
+        conditions.append(Atendimentos.criado_em >= _range_bound(start))
     if end:
-        try:
-            edt = Atendimentos._parse_datetime(end)
-            q = q.filter(Atendimentos.data_hora <= edt)
-        except ValueError as e:
-            return jsonify({'error': str(e)}), 400
+        conditions.append(Atendimentos.criado_em < _range_bound(end, end=True))
+    return conditions
 
-    items = q.all()
-    return jsonify([atendimento_to_dict(i) for i in items])
+
+@atendimentos_route_bp.route('/', methods=['GET'])
+@login_required
+@read_replica
+@conditional('atendimentos')
+def list_atendimentos():
+    """Lista atendimentos (filtros + paginação keyset).
+
+    ?fields=id,paciente_nome,criado_em restringe as colunas buscadas e
+    devolvidas. As linhas vêm de um select() de colunas e viram JSON direto,
+    sem passar pelo ORM (identity map, instâncias, to_dict).
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        stmt, limit = atendimentos_page_query(fields_select(fields), request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return atendimentos_page_response(db.session.execute(stmt).all(), limit, fields)
+
+
+def atendimentos_page_query(stmt, args):
+    """Aplica os filtros e a paginação keyset da query string a `stmt`.
+
+    Aceita Query ou select() (o modo ASGI usa o mesmo caminho). Retorna
+    (stmt, limit); levanta ValueError para parâmetros inválidos.
+    """
+    stmt = stmt.filter(*atendimento_filters(args))
+    # keyset pagination: ?limit=N&cursor=<next_cursor da página anterior>
+    limit = parse_limit(args.get('limit'))
+    return keyset_paginate(stmt, PAGE_ORDER, args.get('cursor'), limit, descending=True), limit
+
+
+def atendimentos_page_response(rows, limit, fields=ATENDIMENTO_FIELDS):
+    """Resposta JSON de uma página de linhas de fields_select(fields), com
+    X-Next-Cursor e Link rel=next."""
+    items, next_cursor = split_page(rows, limit, lambda r: (r.criado_em, r.id))
+    response = json_array_response(items, lambda r: row_to_dict(r, fields))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        next_args = request.args.to_dict()
+        next_args.update(cursor=next_cursor, limit=limit)
+        response.headers['Link'] = '<%s>; rel="next"' % url_for(
+            'atendimentos_route.list_atendimentos', **next_args)
+    return response
+
+
+# colunas da exportação: as mesmas da listagem completa
+EXPORT_COLUMNS = ATENDIMENTO_FIELDS
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_rows(conditions):
+    """Gera dicts das linhas filtradas em lotes de EXPORT_BATCH_SIZE.
+
+    Usa um select() só das colunas (sem instâncias do ORM) com yield_per,
+    que no MySQL abre um cursor no servidor: a memória fica constante
+    independente do tamanho da exportação.
+    """
+    stmt = (fields_select(EXPORT_COLUMNS)
+            .where(*conditions)
+            .order_by(*PAGE_ORDER)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for row in db.session.execute(stmt):
+        yield row_to_dict(row, EXPORT_COLUMNS)
+
+
+def _ndjson_stream(rows):
+    encoder = json_encoder(compact=False)
+    dumps = encoder.encode if encoder is not None else current_app.json.dumps
+    buf = []
+    for d in rows:
+        buf.append(dumps(d))
+        if len(buf) >= EXPORT_BATCH_SIZE:
+            yield '\n'.join(buf) + '\n'
+            buf = []
+    if buf:
+        yield '\n'.join(buf) + '\n'
+
+
+def _csv_stream(rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for i, d in enumerate(rows, 1):
+        writer.writerow(d)
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    yield out.getvalue()
+
+
+@atendimentos_route_bp.route('/export', methods=['GET'])
+@login_required
+@read_replica
+def export_atendimentos():
+    """Exporta os atendimentos filtrados como NDJSON (padrão) ou CSV (?format=csv).
+
+    Aceita os mesmos filtros de list_atendimentos, sem paginação; a
+    resposta é gerada em streaming.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    try:
+        conditions = atendimento_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = _export_rows(conditions)
+    if fmt == 'csv':
+        body, mimetype = _csv_stream(rows), 'text/csv'
+    else:
+        body, mimetype = _ndjson_stream(rows), 'application/x-ndjson'
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=atendimentos.{fmt}'
+    return response
 
 
 @atendimentos_route_bp.route('/<int:att_id>', methods=['GET'])
 @login_required
+@read_replica
+@conditional('atendimentos')
 def get_atendimento(att_id):
     att = db.session.get(Atendimentos, att_id)
     if att is None:
@@ -142,3 +357,14 @@ def delete_atendimento(att_id):
     db.session.delete(att)
     db.session.commit()
     return jsonify({'message': 'deleted'})
+
+
+@atendimentos_route_bp.cli.command('repair-copies')
+@click.option('--chunk-size', default=DEFAULT_REPAIR_CHUNK_SIZE, show_default=True, help='Ids por lote.')
+def repair_copies_command(chunk_size):
+    """Corrige nome/CPF do paciente, especialidade e criado_por copiados em atendimentos."""
+    def progress(done, total, fixed):
+        click.echo(f'{done}/{total} ids verificados, {sum(fixed.values())} linhas corrigidas')
+
+    fixed = repair_copies(chunk_size=chunk_size, progress=progress)
+    click.echo('Concluído: ' + ', '.join(f'{fk}: {n}' for fk, n in fixed.items()))
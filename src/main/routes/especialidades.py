@@ -1,8 +1,11 @@
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, jsonify, request, abort, current_app
 from flask_login import login_required
 from src.main.repository.database import db
+from src.main.repository.replica import read_replica
 from src.main.models.especialidades_model import Especialidades
 from src.main.services.auth import is_admin
+from src.main.services import especialidades_cache
+from src.main.services.versoes import content_conditional
 
 especialidades_route_bp = Blueprint('especialidades_route', __name__)
 
@@ -27,23 +30,39 @@ def create_especialidade():
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'database error', 'detail': str(e)}), 500
+    especialidades_cache.invalidate()
     return jsonify(especialidade_to_dict(new_e)), 201
 
 
 @especialidades_route_bp.route('/', methods=['GET'])
 @login_required
+@read_replica
 def list_especialidades():
-    items = Especialidades.query.all()
-    return jsonify([especialidade_to_dict(i) for i in items])
+    # servida do cache (JSON já serializado) com ETag do conteúdo; If-None-Match
+    # -> 304. Não usa services/versoes: aqui o 304 sai sem nenhuma consulta.
+    # Comparação fraca: com compressão a ETag volta como W/"..."
+    snap = especialidades_cache.snapshot()
+    if request.if_none_match.contains_weak(snap.etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(snap.body, mimetype='application/json')
+    response.set_etag(snap.etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @especialidades_route_bp.route('/<int:esp_id>', methods=['GET'])
 @login_required
+@read_replica
 def get_especialidade(esp_id):
-    esp = db.session.get(Especialidades, esp_id)
+    esp = especialidades_cache.snapshot().by_id.get(esp_id)
     if esp is None:
-        abort(404)
-    return jsonify(especialidade_to_dict(esp))
+        # pode ter sido criada por outro processo depois da última carga
+        esp = db.session.get(Especialidades, esp_id)
+        if esp is None:
+            abort(404)
+        esp = especialidade_to_dict(esp)
+    return content_conditional(jsonify(esp))
 
 
 @especialidades_route_bp.route('/<int:esp_id>', methods=['PUT', 'PATCH'])
@@ -61,6 +80,7 @@ def update_especialidade(esp_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'database error', 'detail': str(e)}), 500
+    especialidades_cache.invalidate()
     return jsonify(especialidade_to_dict(esp))
 
 
@@ -74,4 +94,5 @@ def delete_especialidade(esp_id):
         abort(404)
     db.session.delete(esp)
     db.session.commit()
+    especialidades_cache.invalidate()
     return jsonify({'message': 'deleted'})
@@ -1,25 +1,84 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, render_template, request, make_response
 from flask_login import login_required
+from src.main.repository.replica import read_replica
 from src.main.models.atendimentos_model import Atendimentos
 from src.main.models.pacientes_model import Pacientes
-from src.main.models.especialidades_model import Especialidades
 from src.main.services.auth import is_admin
+from src.main.services.pagination import parse_limit, keyset_paginate, split_page
+from src.main.services.especialidades_cache import especialidades_by_nome
 
 home_route_bp = Blueprint("home_route", __name__)
 
+# Quantidade de linhas renderizadas na primeira carga e em cada fragmento
+HOME_PAGE_SIZE = 25
+
+ATENDIMENTOS_ORDER = (Atendimentos.criado_em, Atendimentos.id)
+PACIENTES_ORDER = (Pacientes.nome, Pacientes.id)
+
+
+def _atendimentos_page(cursor=None, limit=HOME_PAGE_SIZE):
+    q = keyset_paginate(Atendimentos.query, ATENDIMENTOS_ORDER, cursor, limit, descending=True)
+    return split_page(q.all(), limit, lambda a: (a.criado_em, a.id))
+
+
+def _pacientes_page(cursor=None, limit=HOME_PAGE_SIZE):
+    q = keyset_paginate(Pacientes.query, PACIENTES_ORDER, cursor, limit)
+    return split_page(q.all(), limit, lambda p: (p.nome, p.id))
+
 
 @home_route_bp.route('/', methods=['GET'])
 @login_required
+@read_replica
 def home():
-    
+
     view = request.args.get('view', 'atendimentos', type=str)
 
-    atendimentos = Atendimentos.query.order_by(Atendimentos.criado_em.desc()).all()
-    especialidades = Especialidades.query.order_by(Especialidades.nome_especialidade).all()
-    pacientes = Pacientes.query.order_by(Pacientes.nome).all()
+    # Cada aba carrega só a primeira página do que exibe; o restante da
+    # tabela vem sob demanda pelos fragmentos abaixo.
+    atendimentos, pacientes, especialidades = [], [], []
+    next_cursor = None
+    if view == 'atendimentos':
+        atendimentos, next_cursor = _atendimentos_page()
+        # usadas no <select> do modal de novo atendimento
+        especialidades = especialidades_by_nome()
+    elif view == 'pacientes':
+        pacientes, next_cursor = _pacientes_page()
+    elif view == 'especialidades':
+        especialidades = especialidades_by_nome()
 
     return render_template('home.html',
                             atendimentos=atendimentos,
                             especialidades=especialidades,
                             pacientes=pacientes,
-                            view=view)
\ No newline at end of file
+                            next_cursor=next_cursor,
+                            view=view)
+
+
+def _fragment(template, page_loader, **context):
+    """Renderiza as próximas linhas (<tr>) de uma tabela da home.
+
+    O cursor da página seguinte volta no header X-Next-Cursor.
+    """
+    try:
+        limit = parse_limit(request.args.get('limit'), default=HOME_PAGE_SIZE)
+        items, next_cursor = page_loader(request.args.get('cursor'), limit)
+    except ValueError as e:
+        return str(e), 400
+    response = make_response(render_template(template, items=items, **context))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@home_route_bp.route('/fragments/atendimentos', methods=['GET'])
+@login_required
+@read_replica
+def atendimentos_fragment():
+    return _fragment('_atendimentos_rows.html', _atendimentos_page)
+
+
+@home_route_bp.route('/fragments/pacientes', methods=['GET'])
+@login_required
+@read_replica
+def pacientes_fragment():
+    return _fragment('_pacientes_rows.html', _pacientes_page)
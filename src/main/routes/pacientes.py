@@ -1,16 +1,25 @@
+import csv
+import io
+import click
 from flask import Blueprint, jsonify, request, abort, render_template, redirect, url_for
 from flask_login import login_required
-from sqlalchemy import or_
 from src.main.repository.database import db
+from src.main.repository.replica import read_replica
 from src.main.models.pacientes_model import Pacientes
 from src.main.services.auth import is_admin
+from src.main.services.paciente_search import find_pacientes
+from src.main.services.paciente_import import import_pacientes_csv, DEFAULT_CHUNK_SIZE
+from src.main.services.versoes import conditional
+from src.main.services.serializacao import json_array_response
+from src.main.services import autocomplete
 
-pacientes_route_bp = Blueprint("pacientes_route", __name__)
+pacientes_route_bp = Blueprint("pacientes_route", __name__, cli_group='pacientes')
 
 
 # ROTA PARA LISTAR PACIENTES (GET)
 @pacientes_route_bp.route('/', methods=['GET'])
 @login_required
+@read_replica
 def list_pacientes():
     pacientes = Pacientes.query.order_by(Pacientes.nome).all()
     return render_template('pacientes.html', pacientes=pacientes)
@@ -59,14 +68,59 @@ def delete_paciente(paciente_id):
     return redirect(request.referrer or url_for('pacientes_route.list_pacientes'))
 
 
-# ROTA DE BUSCA (JSON) - SEM ALTERAÇÕES
+# ROTA DE BUSCA (JSON) - usa o índice textual (FTS5 / FULLTEXT ngram)
 @pacientes_route_bp.route('/search', methods=['GET'])
 @login_required
+@read_replica
 def search_pacientes():
     query = request.args.get('q', '', type=str)
     if not query:
         return jsonify([])
-    pacientes = Pacientes.query.filter(
-        or_(Pacientes.nome.ilike(f'%{query}%'), Pacientes.cpf.ilike(f'%{query}%'))
-    ).limit(10).all()
-    return jsonify([p.to_dict() for p in pacientes])
\ No newline at end of file
+    # com PACIENTES_AUTOCOMPLETE_INDEX a busca sai da memória, sem consulta
+    # ao banco (nem a da versão para o GET condicional)
+    index = autocomplete.active_index()
+    if index is not None:
+        return autocomplete.search_response(index, query, limit=10)
+    return _search_db(query)
+
+
+@conditional('pacientes')
+def _search_db(query):
+    pacientes = find_pacientes(query, limit=10)
+    return json_array_response(pacientes, Pacientes.to_dict)
+
+
+# ROTA DE IMPORTAÇÃO EM LOTE (CSV) - somente admin
+@pacientes_route_bp.route('/import', methods=['POST'])
+@login_required
+def import_pacientes():
+    if not is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'file is required'}), 400
+    delimiter = request.form.get('delimiter', ',')
+    # lê o upload em streaming, sem carregar o arquivo inteiro em memória
+    stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    try:
+        report = import_pacientes_csv(stream, delimiter=delimiter)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(report.to_dict())
+
+
+# COMANDO: flask pacientes import <arquivo.csv>
+@pacientes_route_bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, show_default=True, help='Linhas por lote.')
+@click.option('--delimiter', default=',', show_default=True)
+def import_pacientes_command(path, chunk_size, delimiter):
+    """Importa pacientes de um arquivo CSV."""
+    def progress(report):
+        click.echo(f'{report.processed} linhas lidas, {report.inserted} inseridas, {report.rejected} rejeitadas')
+
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        report = import_pacientes_csv(f, chunk_size=chunk_size, delimiter=delimiter, progress=progress)
+    for err in report.errors:
+        click.echo(f"linha {err['line']}: {err['error']}", err=True)
+    click.echo(f'Concluído: {report.inserted} inseridos, {report.rejected} rejeitados.')
@@ -0,0 +1,115 @@
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from flask import Blueprint, jsonify, request
+from flask_login import login_required
+from sqlalchemy import func, select
+from src.main.repository.database import db
+from src.main.repository.replica import read_replica
+from src.main.models.atendimentos_resumo_model import AtendimentosResumo
+from src.main.models.especialidades_model import Especialidades
+from src.main.models.usuarios_model import Usuarios
+from src.main.services.auth import is_admin
+from src.main.services.resumo import rebuild_resumo
+
+relatorios_route_bp = Blueprint('relatorios_route', __name__, cli_group='relatorios')
+
+# como cada dia vira o rótulo do período
+PERIODOS = {
+    'dia': lambda d: d.isoformat(),
+    'semana': lambda d: '%04d-W%02d' % d.isocalendar()[:2],
+    'mes': lambda d: d.strftime('%Y-%m'),
+}
+AGRUPAMENTOS = {
+    'especialidade': ('especialidade_id',),
+    'criado_por': ('criado_por_id',),
+    'ambos': ('especialidade_id', 'criado_por_id'),
+}
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'invalid date: {value} (expected YYYY-MM-DD)')
+
+
+@relatorios_route_bp.route('/atendimentos', methods=['GET'])
+@login_required
+@read_replica
+def relatorio_atendimentos():
+    """Totais de atendimentos por período e especialidade/usuário.
+
+    Lê só a tabela de resumo (uma linha por dia/especialidade/usuário),
+    então o custo depende do intervalo pedido e não do tamanho de
+    atendimentos. Parâmetros: start, end (YYYY-MM-DD), periodo
+    (dia|semana|mes) e por (especialidade|criado_por|ambos).
+    """
+    if not is_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    periodo = request.args.get('periodo', 'dia')
+    por = request.args.get('por', 'especialidade')
+    if periodo not in PERIODOS:
+        return jsonify({'error': 'periodo must be dia, semana or mes'}), 400
+    if por not in AGRUPAMENTOS:
+        return jsonify({'error': 'por must be especialidade, criado_por or ambos'}), 400
+
+    conditions = []
+    try:
+        if request.args.get('start'):
+            conditions.append(AtendimentosResumo.dia >= _parse_date(request.args['start']))
+        if request.args.get('end'):
+            conditions.append(AtendimentosResumo.dia <= _parse_date(request.args['end']))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    dims = AGRUPAMENTOS[por]
+    cols = [getattr(AtendimentosResumo, d) for d in dims]
+    stmt = (select(AtendimentosResumo.dia, *cols, func.sum(AtendimentosResumo.total))
+            .where(*conditions)
+            .group_by(AtendimentosResumo.dia, *cols))
+
+    # agrega dias em semanas/meses aqui: no máximo dias x grupos linhas
+    label = PERIODOS[periodo]
+    totals = defaultdict(int)
+    for dia, *keys, total in db.session.execute(stmt):
+        totals[(label(dia), *keys)] += int(total)
+
+    especialidades, usuarios = {}, {}
+    if 'especialidade_id' in dims:
+        especialidades = dict(db.session.execute(select(Especialidades.id, Especialidades.nome_especialidade)).all())
+    if 'criado_por_id' in dims:
+        ids = {k[dims.index('criado_por_id') + 1] for k in totals}
+        if ids:
+            usuarios = dict(db.session.execute(
+                select(Usuarios.id, Usuarios.usuario).where(Usuarios.id.in_(ids))).all())
+
+    result = []
+    for key in sorted(totals):
+        item = {'periodo': key[0], 'total': totals[key]}
+        for dim, value in zip(dims, key[1:]):
+            if dim == 'especialidade_id':
+                item['especialidade_id'] = value or None
+                item['especialidade'] = especialidades.get(value)
+            else:
+                item['criado_por_id'] = value
+                item['criado_por'] = usuarios.get(value)
+        result.append(item)
+    return jsonify(result)
+
+
+# COMANDO: flask relatorios rebuild [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+@relatorios_route_bp.cli.command('rebuild')
+@click.option('--start', help='Primeiro dia (YYYY-MM-DD); padrão: desde o início.')
+@click.option('--end', help='Último dia (YYYY-MM-DD); padrão: até hoje.')
+def rebuild_command(start, end):
+    """Recalcula a tabela atendimentos_resumo a partir de atendimentos."""
+    try:
+        start = _parse_date(start) if start else None
+        end = _parse_date(end) if end else None
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    rows = rebuild_resumo(start, end)
+    db.session.commit()
+    click.echo(f'Resumo reconstruído: {rows} linhas.')
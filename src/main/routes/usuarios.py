@@ -1,8 +1,13 @@
-from flask import Blueprint, jsonify, request, abort, redirect, url_for,render_template
+from flask import Blueprint, jsonify, request, abort, redirect, url_for,render_template, make_response, current_app
+from sqlalchemy.exc import SQLAlchemyError
 from flask_login import login_required, current_user
 from src.main.repository.database import db
+from src.main.repository.replica import read_replica
 from src.main.models.usuarios_model import Usuarios
-from src.main.services.auth import hash_password, verify_password, perform_login, perform_logout, is_admin
+from src.main.models.api_tokens_model import ApiTokens
+from src.main.services.auth import (hash_password, verify_password, perform_login, perform_logout, is_admin, forget_user,
+                                    rehash_if_needed, PasswordVerifierBusy)
+from src.main.services.versoes import content_conditional
 
 usuarios_route_bp = Blueprint("usuarios_route", __name__)
 
@@ -48,9 +53,26 @@ def login():
             return render_template('login.html', error='Usuário e senha são obrigatórios')
 
         user = Usuarios.query.filter_by(usuario=usuario).first()
-        if not user or not verify_password(user.senha, senha):
+        try:
+            valid = user is not None and verify_password(user.senha, senha)
+        except PasswordVerifierBusy:
+            # pool de verificação lotado (rajada de logins): o cliente tenta de novo
+            response = make_response(
+                render_template('login.html', error='Muitos logins simultâneos, tente novamente'), 503)
+            response.headers['Retry-After'] = '1'
+            return response
+        if not valid:
             return render_template('login.html', error='Credenciais inválidas')
 
+        # método/custo do hash mudou desde que a senha foi gravada; a senha
+        # conferiu, então uma falha ao regravar o hash não impede o login
+        if rehash_if_needed(user, senha):
+            try:
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                current_app.logger.exception('falha ao regravar o hash da senha de %s', usuario)
+
         perform_login(user)
 
         return redirect(url_for('home_route.home'))
@@ -67,6 +89,7 @@ def logout():
 
 @usuarios_route_bp.route('/', methods=['GET'])
 @login_required
+@read_replica
 def list_users():
     # only admin can list users
     if not is_admin():
@@ -77,6 +100,7 @@ def list_users():
 
 @usuarios_route_bp.route('/<int:user_id>', methods=['GET'])
 @login_required
+@read_replica
 def get_user(user_id):
     user = db.session.get(Usuarios, user_id)
     if user is None:
@@ -84,7 +108,7 @@ def get_user(user_id):
     # allow user to see own data or admin
     if current_user.id != user.id and not is_admin():
         return jsonify({'error': 'forbidden'}), 403
-    return jsonify(user_to_dict(user))
+    return content_conditional(jsonify(user_to_dict(user)))
 
 
 @usuarios_route_bp.route('/', methods=['POST'])
@@ -132,6 +156,7 @@ def update_user(user_id):
         # only admin can change cargo
         user.cargo = cargo
     db.session.commit()
+    forget_user(user.id)
     return jsonify(user_to_dict(user))
 
 
@@ -143,6 +168,8 @@ def delete_user(user_id):
         abort(404)
     if current_user.id != user.id and not is_admin():
         return jsonify({'error': 'forbidden'}), 403
+    ApiTokens.query.filter_by(usuario_id=user.id).delete()
     db.session.delete(user)
     db.session.commit()
+    forget_user(user_id)
     return jsonify({'message': 'deleted'})
@@ -1,6 +1,11 @@
-from flask import Flask
+from flask import Flask, request, session
 from flask_login import LoginManager
 from src.main.repository.database import db
+from src.main.repository.pool import engine_options_from_env
+from src.main.repository.replica import init_replica, replica_binds
+from src.main.services.sql_metrics import init_sql_instrumentation
+from src.main.services.compression import init_compression
+from src.main.services.autocomplete import init_autocomplete
 import os
 from dotenv import load_dotenv
 from flask_migrate import Migrate
@@ -12,6 +17,8 @@ from src.main.routes.pacientes import pacientes_route_bp
 from src.main.routes.atendimentos import atendimentos_route_bp
 from src.main.routes.especialidades import especialidades_route_bp
 from src.main.routes.home import home_route_bp
+from src.main.routes.relatorios import relatorios_route_bp
+from src.main.routes.admin import admin_route_bp
 
 load_dotenv()  # procura .env na árvore de diretórios
 
@@ -27,6 +34,32 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv(
         'SQLALCHEMY_DATABASE_URI') or f'mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DATABASE}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # pool de conexões configurável via DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    # DB_POOL_TIMEOUT, DB_POOL_RECYCLE e DB_POOL_PRE_PING
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env(SQLALCHEMY_DATABASE_URI)
+    # réplica de leitura opcional (repository/replica.py): as views de
+    # leitura consultam nela, exceto por REPLICA_STICKY_SECONDS depois de
+    # uma escrita do próprio usuário
+    SQLALCHEMY_REPLICA_URI = os.getenv('SQLALCHEMY_REPLICA_URI')
+    SQLALCHEMY_BINDS = replica_binds(SQLALCHEMY_REPLICA_URI)
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+
+    # hash de senhas: senhas gravadas com outro método/custo são regravadas
+    # no próximo login; com PASSWORD_VERIFY_WORKERS > 0 a verificação roda
+    # num pool limitado (PASSWORD_VERIFY_QUEUE à espera, além disso 503)
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', '16'))
+    PASSWORD_VERIFY_WORKERS = int(os.getenv('PASSWORD_VERIFY_WORKERS', '0'))
+    PASSWORD_VERIFY_QUEUE = int(os.getenv('PASSWORD_VERIFY_QUEUE', '0'))
+
+    # autocomplete de pacientes em memória (services/autocomplete.py); a
+    # versão da tabela é conferida a cada PACIENTES_AUTOCOMPLETE_REFRESH s e
+    # só as linhas alteradas são relidas; remoções de outros processos
+    # remontam o índice, no máximo a cada PACIENTES_AUTOCOMPLETE_REBUILD_INTERVAL s.
+    # Resultados em ordem de id (a busca no banco ordena por relevância)
+    PACIENTES_AUTOCOMPLETE_INDEX = os.getenv('PACIENTES_AUTOCOMPLETE_INDEX', 'false').lower() in ('1', 'true', 'yes')
+    PACIENTES_AUTOCOMPLETE_REFRESH = int(os.getenv('PACIENTES_AUTOCOMPLETE_REFRESH', '30'))
+    PACIENTES_AUTOCOMPLETE_REBUILD_INTERVAL = int(os.getenv('PACIENTES_AUTOCOMPLETE_REBUILD_INTERVAL', '600'))
 
 
 def create_app(config=None):
@@ -44,11 +77,40 @@ def create_app(config=None):
     else:
         app.config.from_object(Config)
 
+    # --- Hash de senhas: método/salt configurados cabem em usuarios.senha ---
+    from src.main.services.auth import validate_hash_settings
+    validate_hash_settings(app.config)
+
     # --- Inicialização de Extensões ---
     db.init_app(app)
+    init_replica(app, db)
+
+    # --- Métricas de SQL por requisição (Server-Timing + log) ---
+    init_sql_instrumentation(app)
+
+    # --- Compressão gzip/brotli das respostas ---
+    init_compression(app)
 
     #--- Inicialização do CSRF
+    # o hook padrão do Flask-WTF é trocado pelo de baixo, que dispensa o CSRF
+    # só das requisições autenticadas por token Bearer sem identidade de
+    # cookie: com sessão (ou remember-me) o Flask-Login usa o usuário do
+    # cookie e ignora o token, então o CSRF continua valendo
+    csrf_check_default = app.config.get('WTF_CSRF_CHECK_DEFAULT', True)
+    app.config['WTF_CSRF_CHECK_DEFAULT'] = False
     csrf = CSRFProtect(app)
+
+    @app.before_request
+    def _csrf_protect():
+        if not app.config['WTF_CSRF_ENABLED'] or not csrf_check_default:
+            return
+        from src.main.services.api_tokens import bearer_token, resolve_token
+        raw = bearer_token(request)
+        cookie_identity = (session.get('_user_id') or session.get('user_id')
+                           or request.cookies.get(app.config.get('REMEMBER_COOKIE_NAME', 'remember_token')))
+        if raw and not cookie_identity and resolve_token(raw) is not None:
+            return
+        csrf.protect(apply_exemptions=True)
     
     # --- Flask-Migrate ---
     migrate = Migrate()
@@ -68,25 +130,35 @@ def create_app(config=None):
 
     @login_manager.user_loader
     def load_user(user_id):
-        # Import model aqui para evitar import circular
-        from src.main.models.usuarios_model import Usuarios
+        # Import aqui para evitar import circular; o usuário fica em cache
+        # no escopo da requisição (compartilhado com is_admin)
+        from src.main.services.auth import load_user_by_id
         try:
-            return db.session.get(Usuarios, int(user_id))
+            return load_user_by_id(user_id)
         except Exception:
             return None
 
+    @login_manager.request_loader
+    def load_user_from_request(req):
+        # integrações: Authorization: Bearer <token>, resolvido via cache LRU validado por tabela_versoes
+        from src.main.services.api_tokens import bearer_token, resolve_token
+        raw = bearer_token(req)
+        return resolve_token(raw) if raw else None
+
     # Ensure session-based user id (set in tests) is loaded into current_user
-    from flask import session
     from flask_login import login_user, current_user
 
+    from src.main.services.auth import reset_identity_cache
+    app.before_request(reset_identity_cache)
+
     @app.before_request
     def _load_user_from_session():
         try:
             if not getattr(current_user, 'is_authenticated', False):
                 uid = session.get('_user_id') or session.get('user_id')
                 if uid:
-                    from src.main.models.usuarios_model import Usuarios
-                    u = db.session.get(Usuarios, int(uid))
+                    from src.main.services.auth import load_user_by_id
+                    u = load_user_by_id(uid)
                     if u:
                         # mark user as logged in for this request
                         login_user(u, remember=False)
@@ -99,6 +171,11 @@ def create_app(config=None):
     app.register_blueprint(atendimentos_route_bp, url_prefix='/atendimentos')
     app.register_blueprint(especialidades_route_bp,
                            url_prefix='/especialidades')
+    app.register_blueprint(relatorios_route_bp, url_prefix='/relatorios')
+    app.register_blueprint(admin_route_bp, url_prefix='/admin')
     app.register_blueprint(home_route_bp)
 
+    # --- Índice de autocomplete de pacientes (opcional) ---
+    init_autocomplete(app)
+
     return app
@@ -0,0 +1,336 @@
+"""Modo ASGI: rotas de leitura em SQLAlchemy assíncrono, o resto no Flask.
+
+Uso:
+    uvicorn --factory src.main.server.asgi:create_asgi_app --workers 2
+
+As rotas de ASYNC_ROUTES (listagem/detalhe de atendimentos, busca de
+pacientes, especialidades e detalhe de usuário) são atendidas direto no
+loop de eventos, com uma AsyncSession por requisição; assim um processo
+mantém muitas consultas em espera ao mesmo tempo. Filtros, paginação,
+serialização, GET condicional, compressão e erros são os mesmos da rota
+síncrona: a requisição roda dentro de um request context do Flask, passa
+pelos before_request do app (app.preprocess_request: CSRF, cache de
+identidade, métricas de SQL, Flask-Login com session protection) e a
+resposta por app.finalize_request (after_request incluído). Se um
+before_request responder, essa é a resposta e a rota não roda.
+
+O usuário da sessão é lido do primário pela AsyncSession antes dos hooks
+e entregue ao Flask-Login via auth.preload_identity, então os hooks rodam
+no próprio loop sem ir ao banco: nada passa pelo pool síncrono nem pelo
+executor de threads. Um before_request novo que consulte o banco
+bloquearia o loop.
+
+Todo o resto (escritas, HTML, login, requisições sem sessão de usuário)
+é repassado ao app WSGI de create_app, que continua funcionando sozinho.
+
+Com a réplica configurada (SQLALCHEMY_BINDS['replica'], ver
+repository/replica.py) as rotas assíncronas leem dela, salvo logo depois
+de uma escrita do usuário (REPLICA_STICKY_SECONDS) e nas de
+especialidades, que alimentam o cache do processo.
+"""
+import io
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import current_app, jsonify, request, session
+from flask_login import current_user
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import NotFound, HTTPException
+
+from src.main.server import create_app
+from src.main.repository.replica import REPLICA_BIND, recently_wrote
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.especialidades_model import Especialidades
+from src.main.models.pacientes_model import Pacientes
+from src.main.models.usuarios_model import Usuarios
+from src.main.routes.atendimentos import (atendimento_to_dict, atendimentos_page_query, atendimentos_page_response,
+                                         fields_select, parse_fields)
+from src.main.routes.usuarios import user_to_dict
+from src.main.services import auth, autocomplete, especialidades_cache, sql_metrics
+from src.main.services.paciente_search import search_statement
+from src.main.services.serializacao import json_array_response
+from src.main.services.versoes import (content_conditional, is_not_modified, set_validators, validators,
+                                       versions_statement)
+
+# driver síncrono -> equivalente assíncrono
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_uri(uri: str) -> str:
+    url = make_url(uri)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(
+        hide_password=False)
+
+
+async def list_atendimentos(db_session, user):
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        stmt, limit = atendimentos_page_query(fields_select(fields), request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return atendimentos_page_response((await db_session.execute(stmt)).all(), limit, fields)
+
+
+async def get_atendimento(db_session, user, att_id):
+    att = await db_session.get(Atendimentos, att_id)
+    if att is None:
+        raise NotFound()
+    return jsonify(atendimento_to_dict(att))
+
+
+async def search_pacientes(db_session, user):
+    built = search_statement(request.args.get('q', '', type=str), db_session.bind.dialect.name, limit=10)
+    if built is None:
+        return jsonify([])
+    stmt, params = built
+    pacientes = (await db_session.execute(stmt, params)).scalars().all()
+    return json_array_response(pacientes, Pacientes.to_dict)
+
+
+async def _especialidades_snapshot(db_session):
+    snap = especialidades_cache.cached_snapshot()
+    if snap is None:
+        rows = await db_session.scalars(select(Especialidades).order_by(Especialidades.id))
+        snap = especialidades_cache.store(especialidades_cache.build_snapshot([e.to_dict() for e in rows]))
+    return snap
+
+
+async def list_especialidades(db_session, user):
+    snap = await _especialidades_snapshot(db_session)
+    if request.if_none_match.contains_weak(snap.etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(snap.body, mimetype='application/json')
+    response.set_etag(snap.etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+async def get_especialidade(db_session, user, esp_id):
+    esp = (await _especialidades_snapshot(db_session)).by_id.get(esp_id)
+    if esp is None:
+        esp = await db_session.get(Especialidades, esp_id)
+        if esp is None:
+            raise NotFound()
+        esp = esp.to_dict()
+    return content_conditional(jsonify(esp))
+
+
+async def get_user(db_session, user, user_id):
+    target = await db_session.get(Usuarios, user_id)
+    if target is None:
+        raise NotFound()
+    if user.id != target.id and user.cargo != 'admin':
+        return jsonify({'error': 'forbidden'}), 403
+    return content_conditional(jsonify(user_to_dict(target)))
+
+
+# endpoint -> (handler, tabelas do GET condicional)
+ASYNC_ROUTES = {
+    'atendimentos_route.list_atendimentos': (list_atendimentos, ('atendimentos',)),
+    'atendimentos_route.get_atendimento': (get_atendimento, ('atendimentos',)),
+    'pacientes_route.search_pacientes': (search_pacientes, ('pacientes',)),
+    'especialidades_route.list_especialidades': (list_especialidades, ()),
+    'especialidades_route.get_especialidade': (get_especialidade, ()),
+    'usuarios_route.get_user': (get_user, ()),
+}
+
+# alimentam o cache de especialidades do processo: sempre do primário
+PRIMARY_ROUTES = {'especialidades_route.list_especialidades', 'especialidades_route.get_especialidade'}
+
+
+def _wsgi_environ(scope) -> dict:
+    """Environ WSGI (sem corpo) equivalente ao scope HTTP do ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(b''),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _run_response(response, environ):
+    """Executa a Response como app WSGI (trata HEAD/304) e coleta status, headers e corpo."""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    app_iter = response(environ, start_response)
+    try:
+        body = b''.join(app_iter)
+    finally:
+        close = getattr(app_iter, 'close', None)
+        if close is not None:
+            close()
+    return started['status'], started['headers'], body
+
+
+class AsyncReadApp:
+    """App ASGI que atende ASYNC_ROUTES no loop e repassa o resto ao Flask."""
+
+    def __init__(self, flask_app, engine, replica_engine=None):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+        self.replica_engine = replica_engine
+        self.replica_sessions = (async_sessionmaker(replica_engine, expire_on_commit=False)
+                                 if replica_engine is not None else None)
+        self.wsgi = WsgiToAsgi(flask_app)
+        self._urls = flask_app.url_map.bind('localhost')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            endpoint, view_args = self._match(scope['path'])
+            if endpoint in ASYNC_ROUTES and await self._serve(scope, send, endpoint, view_args):
+                return
+        await self.wsgi(scope, receive, send)
+
+    def _match(self, path):
+        try:
+            return self._urls.match(path, method='GET')
+        except HTTPException:
+            # 404, 405 e redirecionamentos de barra final ficam com o Flask
+            return None, None
+
+    async def _serve(self, scope, send, endpoint, view_args) -> bool:
+        """Atende a requisição; False quando ela deve ir para o app WSGI."""
+        app = self.flask_app
+        with app.request_context(_wsgi_environ(scope)):
+            # sem usuário na sessão (anônimo, remember-me, token) o
+            # Flask-Login do app síncrono decide
+            if not session.get('_user_id'):
+                return False
+            # com o índice de autocomplete a busca nem vai ao banco
+            if endpoint == 'pacientes_route.search_pacientes' and autocomplete.enabled(app):
+                return False
+            try:
+                try:
+                    async with self.sessions() as db_session:
+                        # identidade sempre do primário, como em load_user_by_id
+                        await self._preload_identity(db_session, session['_user_id'])
+                        rv = app.preprocess_request()
+                        if rv is None:
+                            rv = await self._dispatch(db_session, endpoint, view_args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                response = app.finalize_request(app.handle_exception(e), from_error_handler=True)
+            status, headers, body = _run_response(response, request.environ)
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+        return True
+
+    @staticmethod
+    async def _preload_identity(db_session, user_id):
+        try:
+            uid = int(user_id)
+        except (TypeError, ValueError):
+            return
+        auth.preload_identity(uid, await db_session.get(Usuarios, uid))
+
+    async def _dispatch(self, primary_session, endpoint, view_args):
+        # já resolvido nos before_request, sem consulta
+        user = current_user._get_current_object()
+        if not user.is_authenticated:
+            # mesmo retorno do @login_required (unauthorized_handler -> 401)
+            return self.flask_app.login_manager.unauthorized()
+        if self.replica_sessions is None or endpoint in PRIMARY_ROUTES or recently_wrote():
+            return await self._dispatch_route(primary_session, user, endpoint, view_args)
+        async with self.replica_sessions() as db_session:
+            return await self._dispatch_route(db_session, user, endpoint, view_args)
+
+    async def _dispatch_route(self, db_session, user, endpoint, view_args):
+        handler, tabelas = ASYNC_ROUTES[endpoint]
+        if not tabelas:
+            return await handler(db_session, user, **view_args)
+
+        # mesmo fluxo de services.versoes.conditional
+        rows = await db_session.execute(versions_statement(tabelas))
+        versions = {nome: (versao, atualizado_em) for nome, versao, atualizado_em in rows}
+        etag, last_modified = validators(versions, tabelas)
+        if is_not_modified(etag, last_modified):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.make_response(await handler(db_session, user, **view_args))
+            if response.status_code != 200:
+                return response
+        return set_validators(response, etag, last_modified)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                if self.replica_engine is not None:
+                    await self.replica_engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config=None):
+    """Factory ASGI: o app de create_app(config) mais as rotas assíncronas.
+
+    A URL assíncrona vem de ASYNC_SQLALCHEMY_DATABASE_URI ou é derivada de
+    SQLALCHEMY_DATABASE_URI (pymysql -> aiomysql, sqlite -> aiosqlite). As
+    opções do pool são as mesmas do engine síncrono. A réplica, se houver,
+    segue a mesma regra com ASYNC_SQLALCHEMY_REPLICA_URI e
+    SQLALCHEMY_BINDS['replica'].
+    """
+    app = create_app(config)
+    uri = app.config.get('ASYNC_SQLALCHEMY_DATABASE_URI') or async_database_uri(
+        app.config['SQLALCHEMY_DATABASE_URI'])
+    # o pool instrumentado é síncrono; o engine assíncrono usa o adaptado padrão
+    options = {k: v for k, v in app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}).items() if k != 'poolclass'}
+    replica = (app.config.get('SQLALCHEMY_BINDS') or {}).get(REPLICA_BIND)
+    if isinstance(replica, dict):
+        replica = replica['url']
+    replica_uri = app.config.get('ASYNC_SQLALCHEMY_REPLICA_URI') or (replica and async_database_uri(replica))
+    engine = create_async_engine(uri, **options)
+    replica_engine = create_async_engine(replica_uri, **options) if replica_uri else None
+    if app.config.get('SQL_INSTRUMENTATION', True):
+        # as consultas assíncronas também entram no Server-Timing/log da requisição
+        for async_engine in (engine, replica_engine):
+            if async_engine is not None:
+                sql_metrics.instrument_engine(async_engine.sync_engine)
+    return AsyncReadApp(app, engine, replica_engine)
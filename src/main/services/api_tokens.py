@@ -0,0 +1,164 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+from src.main.repository.database import db
+from src.main.repository.replica import primary
+from src.main.models.api_tokens_model import ApiTokens
+from src.main.models.usuarios_model import Usuarios
+from src.main.services.versoes import table_versions
+
+TOKEN_PREFIX = 'clin_'
+# entradas do cache token -> usuário e segundos até reconsultar o banco
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 60
+
+# cada entrada guarda a versão destas tabelas (tabela_versoes) de quando foi
+# lida; revogar um token ou alterar/remover um usuário em qualquer processo
+# muda a versão e invalida as entradas de todos os workers na hora
+IDENTITY_TABLES = ('api_tokens', 'usuarios')
+
+# o que fica em cache: só valores simples, nunca a instância do ORM
+TokenIdentity = namedtuple('TokenIdentity', 'token_id usuario_id usuario cargo expira_em')
+
+
+class TokenCache:
+    """LRU com TTL e versão por entrada, protegido por lock (compartilhado pelas threads do worker)."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            identity, stored_version, stored_at = item
+            if stored_version != version or time.monotonic() - stored_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return identity
+
+    def put(self, key, identity: TokenIdentity, version=None):
+        with self._lock:
+            self._items[key] = (identity, version, time.monotonic())
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def discard_user(self, usuario_id: int):
+        with self._lock:
+            for key in [k for k, (i, _, _) in self._items.items() if i.usuario_id == usuario_id]:
+                del self._items[key]
+
+    def __len__(self):
+        return len(self._items)
+
+
+def token_cache() -> TokenCache:
+    cache = current_app.extensions.get('api_token_cache')
+    if cache is None:
+        cache = current_app.extensions.setdefault('api_token_cache', TokenCache(
+            current_app.config.get('API_TOKEN_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+            current_app.config.get('API_TOKEN_CACHE_TTL', DEFAULT_CACHE_TTL)))
+    return cache
+
+
+def hash_token(raw: str) -> str:
+    # tokens são aleatórios com 256 bits: SHA-256 basta, sem custo de KDF
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def bearer_token(request):
+    """O token do header Authorization: Bearer, ou None."""
+    scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not value.strip():
+        return None
+    return value.strip()
+
+
+def issue_token(usuario: Usuarios, nome: str, expira_em_dias=None):
+    """Cria um token para `usuario`. Retorna (ApiTokens, token em claro); não faz commit."""
+    raw = TOKEN_PREFIX + secrets.token_urlsafe(32)
+    token = ApiTokens(
+        usuario_id=usuario.id, nome=nome, token_hash=hash_token(raw), prefixo=raw[:12],
+        expira_em=datetime.now() + timedelta(days=expira_em_dias) if expira_em_dias else None)
+    db.session.add(token)
+    return token, raw
+
+
+def revoke_token(token: ApiTokens):
+    """Revoga o token e o tira do cache deste processo; não faz commit."""
+    token.revogado_em = datetime.now()
+    if has_app_context():
+        token_cache().discard(token.token_hash)
+
+
+def forget_user_tokens(usuario_id):
+    """Tira do cache os tokens do usuário (após alterar ou remover o usuário)."""
+    if has_app_context():
+        token_cache().discard_user(int(usuario_id))
+
+
+def _identity_version():
+    # lida antes do _lookup: uma escrita entre os dois deixa a entrada com a
+    # versão antiga, e ela é descartada no próximo acesso
+    with primary():
+        versions = table_versions(IDENTITY_TABLES)
+    return tuple(versions.get(t, (0, None))[0] for t in IDENTITY_TABLES)
+
+
+def _lookup(token_hash: str):
+    # sempre do primário: um token revogado lido de uma réplica atrasada
+    # voltaria ao cache por todo o TTL
+    with primary():
+        row = db.session.execute(
+            select(ApiTokens.id, Usuarios.id, Usuarios.usuario, Usuarios.cargo, ApiTokens.expira_em)
+            .join(Usuarios, Usuarios.id == ApiTokens.usuario_id)
+            .where(ApiTokens.token_hash == token_hash, ApiTokens.revogado_em.is_(None))).first()
+    if row is None:
+        return None
+    return TokenIdentity(*row)
+
+
+def _attach(identity: TokenIdentity) -> Usuarios:
+    # instância persistente montada a partir do cache, sem SELECT: merge com
+    # load=False só associa o objeto à sessão da requisição
+    user = Usuarios(id=identity.usuario_id, usuario=identity.usuario, cargo=identity.cargo)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def resolve_token(raw: str):
+    """Usuário dono do token (válido, não revogado, não expirado), ou None.
+
+    Acertos no cache só leem as versões de IDENTITY_TABLES (uma consulta
+    pela chave de tabela_versoes), sem ir a api_tokens/usuarios.
+    """
+    token_hash = hash_token(raw)
+    cache = token_cache()
+    version = _identity_version()
+    identity = cache.get(token_hash, version)
+    if identity is None:
+        identity = _lookup(token_hash)
+        if identity is None:
+            return None
+        cache.put(token_hash, identity, version)
+    if identity.expira_em is not None and identity.expira_em <= datetime.now():
+        cache.discard(token_hash)
+        return None
+    return _attach(identity)
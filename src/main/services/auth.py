@@ -1,16 +1,208 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
-from flask import session
+from flask import session, g, has_request_context, current_app, has_app_context, request
 from src.main.models.usuarios_model import Usuarios
+from src.main.services.api_tokens import forget_user_tokens
 from src.main.repository.database import db
+from src.main.repository.replica import primary
+
+# padrões do Werkzeug; trocáveis por PASSWORD_HASH_METHOD (ex.:
+# "pbkdf2:sha256:600000", "scrypt:16384:8:1") e PASSWORD_SALT_LENGTH
+DEFAULT_HASH_METHOD = 'scrypt'
+DEFAULT_SALT_LENGTH = 16
+
+# chave no environ: identidades já carregadas por fora do db.session (modo
+# ASGI, pela AsyncSession) que reset_identity_cache põe no cache da requisição
+PRELOADED_IDENTITIES = 'clinica.identities'
+
+
+class PasswordVerifierBusy(RuntimeError):
+    """Todas as vagas do pool de verificação estão ocupadas."""
+
+
+def _hash_settings():
+    if has_app_context():
+        config = current_app.config
+        return (config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD),
+                config.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH))
+    return DEFAULT_HASH_METHOD, DEFAULT_SALT_LENGTH
+
+
+@lru_cache(maxsize=8)
+def _sample_hash(method: str) -> str:
+    # custa um hash por método/processo
+    return generate_password_hash('', method=method, salt_length=1)
+
+
+def _canonical_method(method: str) -> str:
+    # "scrypt" -> "scrypt:32768:8:1": o Werkzeug completa os parâmetros e o
+    # prefixo gravado no hash é comparável
+    return _sample_hash(method).split('$', 1)[0]
+
+
+def validate_hash_settings(config):
+    """Confere PASSWORD_HASH_METHOD/PASSWORD_SALT_LENGTH na inicialização.
+
+    Método inválido ou hash maior que a coluna usuarios.senha levantam
+    ValueError aqui, e não como erro 500 no primeiro login (o rehash
+    regravaria um hash que o banco recusa ou trunca).
+    """
+    method = config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    salt_length = int(config.get('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH))
+    if salt_length < 1:
+        raise ValueError('PASSWORD_SALT_LENGTH deve ser >= 1')
+    length = len(_sample_hash(method)) - 1 + salt_length
+    limit = Usuarios.__table__.c.senha.type.length
+    if length > limit:
+        raise ValueError(f'hash de {method!r} com salt de {salt_length} tem {length} caracteres; '
+                         f'usuarios.senha comporta {limit}')
 
 
 def hash_password(password: str) -> str:
-    return generate_password_hash(password)
+    method, salt_length = _hash_settings()
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def needs_rehash(hash_pw: str) -> bool:
+    """True se o hash gravado não usa o método/custo/salt configurados."""
+    method, salt_length = _hash_settings()
+    parts = hash_pw.split('$')
+    if len(parts) != 3:
+        return True
+    return parts[0] != _canonical_method(method) or len(parts[1]) != salt_length
+
+
+class PasswordVerifier:
+    """Pool limitado para check_password_hash, fora da thread da requisição.
+
+    No máximo `workers` verificações rodam ao mesmo tempo e `queue` esperam;
+    além disso verify() levanta PasswordVerifierBusy em vez de enfileirar,
+    para que uma rajada de logins não ocupe todas as threads do servidor.
+    scrypt e pbkdf2 do hashlib liberam o GIL enquanto calculam.
+    """
+
+    def __init__(self, workers: int, queue: int = 0):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-verify')
+        self._slots = threading.BoundedSemaphore(workers + queue)
+
+    def verify(self, hash_pw: str, password: str) -> bool:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordVerifierBusy()
+        try:
+            return self._executor.submit(check_password_hash, hash_pw, password).result()
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+_verifier_lock = threading.Lock()
+
+
+def _verifier():
+    # criado sob demanda (também depois de um fork do servidor) e guardado
+    # em app.extensions; PASSWORD_VERIFY_WORKERS = 0 verifica na própria thread
+    if not has_app_context():
+        return None
+    workers = current_app.config.get('PASSWORD_VERIFY_WORKERS', 0)
+    if not workers:
+        return None
+    verifier = current_app.extensions.get('password_verifier')
+    if verifier is None:
+        with _verifier_lock:
+            verifier = current_app.extensions.get('password_verifier')
+            if verifier is None:
+                verifier = PasswordVerifier(workers, current_app.config.get('PASSWORD_VERIFY_QUEUE', 0))
+                current_app.extensions['password_verifier'] = verifier
+    return verifier
 
 
 def verify_password(hash_pw: str, password: str) -> bool:
-    return check_password_hash(hash_pw, password)
+    """Confere a senha; pode levantar PasswordVerifierBusy quando há pool."""
+    verifier = _verifier()
+    if verifier is None:
+        return check_password_hash(hash_pw, password)
+    return verifier.verify(hash_pw, password)
+
+
+def rehash_if_needed(user: Usuarios, password: str) -> bool:
+    """Regrava user.senha com os parâmetros atuais após um login válido.
+
+    Não faz commit. Retorna True se o hash foi trocado.
+    """
+    if not needs_rehash(user.senha):
+        return False
+    user.senha = hash_password(password)
+    return True
+
+
+def load_user_by_id(user_id):
+    """Return the Usuarios with this id (or None), resolved once per request.
+
+    Flask-Login's user_loader, the session fallback in create_app and
+    is_admin() all go through here, so an authenticated request costs a
+    single lookup. Misses are cached too. Always read from the primary, even
+    in @read_replica views: a deleted user or a demoted admin must not stay
+    authorized until the replica catches up.
+    """
+    try:
+        uid = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    if not has_request_context():
+        with primary():
+            return db.session.get(Usuarios, uid)
+    identities = g.setdefault('_identities', {})
+    if uid not in identities:
+        with primary():
+            u = db.session.get(Usuarios, uid)
+        # cargo é guardado já lido: após um commit a instância expira e
+        # acessar u.cargo dispararia um novo SELECT
+        identities[uid] = (u, u.cargo if u is not None else None)
+    return identities[uid][0]
+
+
+def _cargo_of(user_id):
+    # só chamado dentro de uma requisição (depende da session)
+    load_user_by_id(user_id)
+    return g._identities[int(user_id)][1]
+
+
+def forget_user(user_id):
+    """Drop the cached identity for user_id (call after changing or deleting the user).
+
+    Also drops the user's API tokens from the token cache.
+    """
+    g.setdefault('_identities', {}).pop(int(user_id), None)
+    forget_user_tokens(user_id)
+
+
+def reset_identity_cache():
+    """Start a fresh identity cache; registered as the first before_request hook.
+
+    The app context (and so `g`) may outlive a single request, e.g. when
+    one is already pushed by a CLI command or a test fixture. Identities
+    registered with preload_identity() start in the cache.
+    """
+    g.pop('_identities', None)
+    preloaded = request.environ.get(PRELOADED_IDENTITIES) if has_request_context() else None
+    if preloaded:
+        g._identities = dict(preloaded)
+
+
+def preload_identity(user_id, user):
+    """Register `user` (or None) as the lookup result for user_id in this request.
+
+    Call before the before_request hooks run: load_user_by_id (and so the
+    Flask-Login user_loader and is_admin) then skips its db.session query.
+    """
+    identities = request.environ.setdefault(PRELOADED_IDENTITIES, {})
+    identities[int(user_id)] = (user, user.cargo if user is not None else None)
 
 
 def perform_login(user: Usuarios, remember: bool = False):
@@ -31,9 +223,9 @@ def is_admin() -> bool:
         uid = session.get('_user_id') or session.get('user_id')
         if uid:
             try:
-                u = db.session.get(Usuarios, int(uid))
-                if u is not None:
-                    return getattr(u, 'cargo', '') == 'admin'
+                cargo = _cargo_of(uid)
+                if cargo is not None:
+                    return cargo == 'admin'
             except Exception:
                 pass
 
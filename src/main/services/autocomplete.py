@@ -0,0 +1,529 @@
+"""Índice em memória para o autocomplete de pacientes (nome e CPF/cartão SUS).
+
+Opcional (PACIENTES_AUTOCOMPLETE_INDEX = True). Com ele ligado,
+/pacientes/search responde da memória do processo, sem consulta ao banco:
+
+- nomes: cada palavra do nome, sem acento e em minúsculas, aponta para a
+  lista ordenada dos ids que a contêm (array de inteiros de 32 bits). As
+  palavras distintas ficam numa lista ordenada e um prefixo vira um bisect
+  nela; palavras se repetem muito entre pacientes (Maria, Silva, ...),
+  então o custo por paciente é quase só o dos ids;
+- CPF (11 dígitos) e cartão SUS (15 dígitos) viram inteiros em arrays
+  ordenados, e um prefixo de dígitos vira um intervalo [123000..., 124000...);
+- o resultado de cada paciente já fica serializado (o mesmo JSON de
+  Pacientes.to_dict), então a resposta é só juntar strings.
+
+O índice é montado na inicialização (com o preload_app do gunicorn, uma
+vez no master e compartilhado com os workers) ou, se o banco ainda não
+estiver pronto, numa thread disparada pela primeira busca: nenhuma
+requisição lê a tabela inteira. Enquanto a montagem não termina, e se ela
+falhar, a busca vai ao banco. Escritas do próprio processo entram no commit via
+eventos after_insert/after_update/after_delete. Escritas de outros
+processos e importações em lote são detectadas pela versão da tabela
+(services.versoes), conferida no máximo a cada
+PACIENTES_AUTOCOMPLETE_REFRESH segundos; se mudou, uma thread relê só as
+linhas com atualizado_em desde a última leitura (menos SYNC_MARGIN), pelo
+índice da coluna. Remoções não aparecem nessa releitura: elas incrementam
+a versão 'pacientes_remocoes', e aí o índice é remontado inteiro, no
+máximo uma vez a cada PACIENTES_AUTOCOMPLETE_REBUILD_INTERVAL segundos
+(até lá o paciente removido por outro processo ainda pode aparecer).
+
+Ordem: os resultados vêm em ordem de id (ordem de cadastro). A busca no
+banco ordena buscas por nome pela relevância do índice textual (bm25 no
+SQLite, MATCH no MySQL), então com mais de `limit` resultados os
+pacientes devolvidos podem ser outros ao ligar o índice. Documentos com
+outra quantidade de dígitos não entram no índice.
+"""
+import heapq
+import json
+import re
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context, jsonify
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from src.main.repository.database import db
+from src.main.repository.replica import primary
+from src.main.models.pacientes_model import Pacientes
+from src.main.services.documentos import CARTAO_SUS_LENGTH, CPF_LENGTH, digits_only, document_digits
+from src.main.services.serializacao import json_encoder
+from src.main.services.versoes import mark_changed, table_versions
+
+DEFAULT_REFRESH = 30
+DEFAULT_REBUILD_INTERVAL = 600
+BUILD_BATCH_SIZE = 5000
+# folga da releitura incremental: relógios de servidores diferentes e
+# transações que gravam atualizado_em e só fazem commit depois
+SYNC_MARGIN = timedelta(minutes=5)
+# versão incrementada a cada remoção de paciente (a releitura incremental não as vê)
+REMOVALS = 'pacientes_remocoes'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_COLUMNS = (Pacientes.id, Pacientes.nome, Pacientes.data_nascimento, Pacientes.cpf, Pacientes.cartao_sus,
+            Pacientes.endereco)
+
+
+def name_tokens(text):
+    """'João da Silva' -> ['joao', 'da', 'silva'] (sem acento, casefold)."""
+    if not text:
+        return []
+    decomposed = unicodedata.normalize('NFKD', text)
+    plain = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(plain.casefold())
+
+
+class _DigitsIndex:
+    """Documentos de tamanho fixo como inteiros ordenados, com o id ao lado."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.keys = array('Q')
+        self.ids = array('I')
+
+    def key(self, value):
+        digits = digits_only(value)
+        return int(digits) if digits and len(digits) == self.length else None
+
+    def load(self, pairs):
+        pairs.sort()
+        self.keys = array('Q', (k for k, _ in pairs))
+        self.ids = array('I', (i for _, i in pairs))
+
+    def add(self, key, pid):
+        pos = bisect_right(self.keys, key)
+        self.keys.insert(pos, key)
+        self.ids.insert(pos, pid)
+
+    def remove(self, key, pid):
+        pos = bisect_left(self.keys, key)
+        while pos < len(self.keys) and self.keys[pos] == key:
+            if self.ids[pos] == pid:
+                del self.keys[pos]
+                del self.ids[pos]
+                return
+            pos += 1
+
+    def prefix(self, digits):
+        """Ids cujo documento começa com `digits`."""
+        if len(digits) > self.length:
+            return []
+        scale = 10 ** (self.length - len(digits))
+        lo = bisect_left(self.keys, int(digits) * scale)
+        hi = bisect_left(self.keys, (int(digits) + 1) * scale)
+        return self.ids[lo:hi]
+
+    def nbytes(self):
+        return sys.getsizeof(self.keys) + sys.getsizeof(self.ids)
+
+
+def _intersect(streams):
+    """Interseção de iteradores de ids crescentes (sem repetição)."""
+    iters = [iter(s) for s in streams]
+    try:
+        current = [next(it) for it in iters]
+        while True:
+            high = max(current)
+            if all(c == high for c in current):
+                yield high
+                current = [next(it) for it in iters]
+                continue
+            for i, it in enumerate(iters):
+                while current[i] < high:
+                    current[i] = next(it)
+    except StopIteration:
+        return
+
+
+def _unique(ids):
+    last = None
+    for i in ids:
+        if i != last:
+            yield i
+            last = i
+
+
+class AutocompleteIndex:
+    def __init__(self, encoder=None):
+        # encoder do app.json usado nos docs; com ele a resposta é só a junção
+        self.encoder = encoder
+        self.docs = {}          # id -> JSON de Pacientes.to_dict
+        self.postings = {}      # palavra -> array('I') de ids, crescente
+        self.words = []         # palavras distintas, ordenadas (para prefixo)
+        self.cpf = _DigitsIndex(CPF_LENGTH)
+        self.cartao_sus = _DigitsIndex(CARTAO_SUS_LENGTH)
+        self.version = 0
+        self.removals_version = 0
+        self.synced_at = None   # relógio do processo no início da última leitura
+        self.built_at = None
+        self.build_ms = None
+
+    def _encode(self, doc):
+        if self.encoder is not None:
+            return self.encoder.encode(doc)
+        return json.dumps(doc, sort_keys=True, separators=(',', ':'))
+
+    def load(self, docs):
+        """Montagem em lote a partir de dicts (to_dict) em ordem crescente de id."""
+        postings, cpf, sus = {}, [], []
+        for doc in docs:
+            pid = doc['id']
+            self.docs[pid] = self._encode(doc)
+            for word in set(name_tokens(doc['nome'])):
+                ids = postings.get(word)
+                if ids is None:
+                    ids = postings[word] = array('I')
+                ids.append(pid)
+            for index, pairs, value in ((self.cpf, cpf, doc['cpf']), (self.cartao_sus, sus, doc['cartao_sus'])):
+                key = index.key(value)
+                if key is not None:
+                    pairs.append((key, pid))
+        self.postings = postings
+        self.words = sorted(postings)
+        self.cpf.load(cpf)
+        self.cartao_sus.load(sus)
+
+    def add(self, doc):
+        pid = doc['id']
+        self.remove(pid)
+        self.docs[pid] = self._encode(doc)
+        for word in set(name_tokens(doc['nome'])):
+            ids = self.postings.get(word)
+            if ids is None:
+                self.postings[word] = array('I', [pid])
+                insort(self.words, word)
+            else:
+                ids.insert(bisect_left(ids, pid), pid)
+        for index, value in ((self.cpf, doc['cpf']), (self.cartao_sus, doc['cartao_sus'])):
+            key = index.key(value)
+            if key is not None:
+                index.add(key, pid)
+
+    def remove(self, pid):
+        encoded = self.docs.pop(pid, None)
+        if encoded is None:
+            return
+        doc = json.loads(encoded)
+        for word in set(name_tokens(doc['nome'])):
+            ids = self.postings[word]
+            del ids[bisect_left(ids, pid)]
+            if not ids:
+                del self.postings[word]
+                del self.words[bisect_left(self.words, word)]
+        for index, value in ((self.cpf, doc['cpf']), (self.cartao_sus, doc['cartao_sus'])):
+            key = index.key(value)
+            if key is not None:
+                index.remove(key, pid)
+
+    def _word_ids(self, prefix):
+        # ids (crescentes, sem repetição) com alguma palavra começando por `prefix`
+        lo = bisect_left(self.words, prefix)
+        hi = lo
+        while hi < len(self.words) and self.words[hi].startswith(prefix):
+            hi += 1
+        return _unique(heapq.merge(*(self.postings[w] for w in self.words[lo:hi])))
+
+    def search(self, query: str, limit: int = 10):
+        """JSONs (strings) dos primeiros `limit` pacientes, em ordem de id."""
+        digits = document_digits(query)
+        if digits:
+            ids = heapq.nsmallest(limit, set(self.cpf.prefix(digits)) | set(self.cartao_sus.prefix(digits)))
+        else:
+            words = set(name_tokens(query))
+            if not words:
+                return []
+            matches = _intersect([self._word_ids(w) for w in words])
+            ids = [pid for _, pid in zip(range(limit), matches)]
+        return [self.docs[pid] for pid in ids]
+
+    def memory(self) -> dict:
+        """Bytes ocupados por parte do índice (sys.getsizeof, objetos contados uma vez)."""
+        docs = sys.getsizeof(self.docs) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self.docs.items())
+        words = (sys.getsizeof(self.postings) + sys.getsizeof(self.words)
+                 + sum(sys.getsizeof(w) + sys.getsizeof(ids) for w, ids in self.postings.items()))
+        documentos = self.cpf.nbytes() + self.cartao_sus.nbytes()
+        total = docs + words + documentos
+        n = len(self.docs)
+        return {
+            'pacientes': n,
+            'palavras': len(self.words),
+            'cpfs': len(self.cpf.keys),
+            'cartoes_sus': len(self.cartao_sus.keys),
+            'bytes': {'docs': docs, 'nomes': words, 'documentos': documentos, 'total': total},
+            'bytes_por_paciente': round(total / n, 1) if n else None,
+        }
+
+
+class _State:
+    """Estado por app: índice atual, mudanças a reaplicar e a remontagem em curso."""
+
+    def __init__(self):
+        self.index = None
+        self.lock = threading.RLock()
+        self.checked_at = 0.0
+        self.rebuilt_at = None      # time.monotonic() da última montagem completa
+        self.rebuilding = None      # lista de mudanças a reaplicar após a leitura
+        self.error = None
+        self.build_started_at = None  # time.monotonic() da última montagem disparada por uma busca
+
+
+def enabled(app=None) -> bool:
+    app = app or current_app
+    return bool(app.config.get('PACIENTES_AUTOCOMPLETE_INDEX'))
+
+
+def _state(app=None) -> _State:
+    app = app or current_app
+    return app.extensions.setdefault('pacientes_autocomplete', _State())
+
+
+def _versions():
+    versions = table_versions(['pacientes', REMOVALS])
+    return versions.get('pacientes', (0, None))[0], versions.get(REMOVALS, (0, None))[0]
+
+
+def build_index() -> AutocompleteIndex:
+    """Lê todos os pacientes (em lotes, sem instâncias do ORM) e monta um índice novo."""
+    start = time.perf_counter()
+    index = AutocompleteIndex(json_encoder())
+    # sempre do primário: as escritas locais aplicadas depois partem dele
+    with primary():
+        index.synced_at = datetime.now()
+        # a versão na mesma transação das linhas: mudanças posteriores serão
+        # notadas pela diferença de versão
+        index.version, index.removals_version = _versions()
+        rows = db.session.execute(select(*_COLUMNS).order_by(Pacientes.id)
+                                  .execution_options(yield_per=BUILD_BATCH_SIZE))
+        # as linhas têm os mesmos atributos do modelo: to_dict serve direto
+        index.load(Pacientes.to_dict(row) for row in rows)
+        db.session.commit()
+    index.built_at = time.time()
+    index.build_ms = round((time.perf_counter() - start) * 1000, 1)
+    return index
+
+
+def read_changes(since: datetime):
+    """(versões, momento da leitura, dicts dos pacientes gravados desde `since`), do primário."""
+    with primary():
+        started = datetime.now()
+        versions = _versions()
+        rows = db.session.execute(select(*_COLUMNS).where(Pacientes.atualizado_em >= since)
+                                  .execution_options(yield_per=BUILD_BATCH_SIZE))
+        docs = [Pacientes.to_dict(row) for row in rows]
+        db.session.commit()
+    return versions, started, docs
+
+
+def _update(full: bool):
+    """Remonta (full) ou relê as linhas alteradas e aplica no índice atual.
+
+    Mudanças locais com commit durante a leitura são reaplicadas no fim.
+    """
+    state = _state()
+    with state.lock:
+        if state.rebuilding is not None:
+            return state.index
+        state.rebuilding = []
+        current = state.index
+    try:
+        if full or current is None:
+            index, changes = build_index(), None
+        else:
+            index, changes = current, read_changes(current.synced_at - SYNC_MARGIN)
+    except Exception as e:
+        with state.lock:
+            state.rebuilding = None
+            state.error = repr(e)
+            state.checked_at = time.monotonic()
+        raise
+    with state.lock:
+        if changes is None:
+            state.rebuilt_at = time.monotonic()
+        else:
+            (index.version, _), index.synced_at, docs = changes
+            for doc in docs:
+                index.add(doc)
+        for kind, value in state.rebuilding:
+            # na releitura o índice é o mesmo: as versões locais já foram somadas nele
+            if changes is None or kind in ('add', 'remove'):
+                _apply(index, kind, value)
+        state.rebuilding = None
+        state.index = index
+        state.error = None
+        state.checked_at = time.monotonic()
+    return index
+
+
+def rebuild():
+    """Remonta o índice e troca pelo atual; mudanças locais feitas no meio são reaplicadas."""
+    return _update(full=True)
+
+
+def refresh():
+    """Aplica no índice atual só os pacientes gravados desde a última leitura."""
+    return _update(full=False)
+
+
+def _run_update(app, full: bool):
+    with app.app_context():
+        try:
+            _update(full)
+        except Exception:
+            app.logger.exception('falha ao atualizar o índice de autocomplete')
+        finally:
+            db.session.remove()
+
+
+def _update_in_background(app, full: bool):
+    threading.Thread(target=_run_update, args=(app, full), name='pacientes-autocomplete', daemon=True).start()
+
+
+def init_autocomplete(app):
+    """Monta o índice na inicialização, se ligado; sem as tabelas ainda, fica para a primeira busca."""
+    if not enabled(app):
+        return
+    with app.app_context():
+        try:
+            rebuild()
+        except SQLAlchemyError as e:
+            app.logger.info('índice de autocomplete adiado: %s', e.__class__.__name__)
+        finally:
+            db.session.remove()
+
+
+def active_index():
+    """O índice pronto para busca, ou None (desligado, ainda em montagem ou
+    com a montagem falhando): aí a busca vai ao banco."""
+    if not enabled():
+        return None
+    state = _state()
+    config = current_app.config
+    refresh_every = config.get('PACIENTES_AUTOCOMPLETE_REFRESH', DEFAULT_REFRESH)
+    now = time.monotonic()
+    if state.index is None:
+        # a montagem lê a tabela inteira: numa thread, nunca nesta requisição.
+        # Depois de uma falha, nova tentativa só a cada REFRESH segundos
+        if state.rebuilding is None and (
+                state.build_started_at is None or now - state.build_started_at >= refresh_every):
+            state.build_started_at = now
+            _update_in_background(current_app._get_current_object(), full=True)
+        return None
+    if now - state.checked_at >= refresh_every and state.rebuilding is None:
+        state.checked_at = now
+        with primary():
+            version, removals_version = _versions()
+        index = state.index
+        interval = config.get('PACIENTES_AUTOCOMPLETE_REBUILD_INTERVAL', DEFAULT_REBUILD_INTERVAL)
+        app = current_app._get_current_object()
+        if removals_version != index.removals_version and (
+                state.rebuilt_at is None or now - state.rebuilt_at >= interval):
+            _update_in_background(app, full=True)
+        elif version != index.version:
+            _update_in_background(app, full=False)
+    return state.index
+
+
+def search_response(index: AutocompleteIndex, query: str, limit: int = 10):
+    """Mesma resposta de jsonify([p.to_dict() for p in pacientes])."""
+    state = _state()
+    with state.lock:
+        docs = index.search(query, limit)
+    encoder = json_encoder()
+    if encoder is None or encoder is not index.encoder:
+        return jsonify([json.loads(d) for d in docs])
+    body = '[' + ','.join(docs) + ']\n'
+    return current_app.response_class(body, mimetype=current_app.json.mimetype)
+
+
+def memory_report() -> dict:
+    state = _state()
+    index = state.index
+    report = {'enabled': enabled(), 'built': index is not None, 'rebuilding': state.rebuilding is not None,
+              'error': state.error}
+    if index is not None:
+        with state.lock:
+            report.update(index.memory())
+        report.update(version=index.version, built_at=index.built_at, build_ms=index.build_ms)
+    return report
+
+
+# --- manutenção pelos eventos do ORM ---
+# after_insert/after_update/after_delete anotam as mudanças na sessão; elas
+# só entram no índice no commit (um rollback as descarta), junto com os
+# incrementos das versões de 'pacientes' e de REMOVALS feitos nesse commit
+
+def _pending(session):
+    return session.info.setdefault('autocomplete_pending', {'changes': [], 'bumps': 0, 'removals': 0})
+
+
+def _record(target, change):
+    session = Session.object_session(target)
+    if session is not None and has_app_context() and enabled():
+        _pending(session)['changes'].append(change)
+
+
+@event.listens_for(Pacientes, 'after_insert')
+@event.listens_for(Pacientes, 'after_update')
+def _record_upsert(mapper, connection, target):
+    _record(target, ('add', target.to_dict()))
+
+
+@event.listens_for(Pacientes, 'after_delete')
+def _record_delete(mapper, connection, target):
+    _record(target, ('remove', target.id))
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_version_bump(session, flush_context):
+    # remoções: versão própria, incrementada em todo processo (com o índice
+    # ligado ou não), para os índices dos demais saberem que devem remontar
+    removed = any(isinstance(o, Pacientes) for o in session.deleted)
+    if removed:
+        mark_changed(session, [REMOVALS])
+    # mesmo critério de versoes._collect_flushed_tables; cada versão sobe
+    # uma vez por commit, não importa quantos flushes
+    if 'autocomplete_pending' not in session.info:
+        return
+    pending = _pending(session)
+    if removed:
+        pending['removals'] = 1
+    if removed or any(isinstance(o, Pacientes) for o in session.new) or any(
+            isinstance(o, Pacientes) and session.is_modified(o) for o in session.dirty):
+        pending['bumps'] = 1
+
+
+def _apply(index, kind, value):
+    if kind == 'add':
+        index.add(value)
+    elif kind == 'remove':
+        index.remove(value)
+    elif kind == 'removals':
+        index.removals_version += value
+    else:
+        index.version += value
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_pending(session):
+    pending = session.info.pop('autocomplete_pending', None)
+    if not pending or not has_app_context():
+        return
+    state = _state()
+    changes = pending['changes'] + [('bump', pending['bumps']), ('removals', pending['removals'])]
+    with state.lock:
+        if state.index is not None:
+            for change in changes:
+                _apply(state.index, *change)
+        if state.rebuilding is not None:
+            state.rebuilding.extend(changes)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop('autocomplete_pending', None)
@@ -0,0 +1,125 @@
+import gzip
+import zlib
+
+from flask import current_app, request
+
+try:  # brotli é opcional; sem ele só gzip é oferecido
+    import brotli
+except ImportError:
+    brotli = None
+
+# respostas menores que isto (bytes) não compensam a compressão
+DEFAULT_MIN_SIZE = 500
+# nível do gzip (1-9) e qualidade do brotli (0-11)
+DEFAULT_LEVEL = 6
+DEFAULT_BR_LEVEL = 4
+DEFAULT_MIMETYPES = frozenset({
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/csv',
+    'text/plain',
+    'text/javascript',
+})
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        # sync flush: cada pedaço sai na hora, sem esperar o buffer do zlib
+        return self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._obj.process(chunk) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+def _choose_encoding():
+    accept = request.accept_encodings
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = accept.best_match(candidates)
+    return best if best and accept[best] > 0 else None
+
+
+def _compress_stream(chunks, original, stream):
+    try:
+        for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+    finally:
+        close = getattr(original, 'close', None)
+        if close is not None:
+            close()
+
+
+def _compress_response(response):
+    config = current_app.config
+    if (request.method == 'HEAD'
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)):
+        return response
+
+    # o conteúdo passa a depender do Accept-Encoding, comprimido ou não
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    if encoding == 'br':
+        level = config.get('COMPRESS_BR_LEVEL', DEFAULT_BR_LEVEL)
+    else:
+        level = config.get('COMPRESS_LEVEL', DEFAULT_LEVEL)
+
+    if response.is_streamed:
+        # tamanho desconhecido: comprime sempre, pedaço a pedaço
+        original = response.response
+        stream = _BrotliStream(level) if encoding == 'br' else _GzipStream(level)
+        response.response = _compress_stream(response.iter_encoded(), original, stream)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE):
+            return response
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=level))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=level, mtime=0))
+
+    response.headers['Content-Encoding'] = encoding
+    # os bytes mudaram: uma ETag forte deixaria de valer, a fraca continua
+    # (If-None-Match usa comparação fraca, então o 304 segue funcionando)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Comprime (gzip ou brotli, conforme Accept-Encoding) as respostas.
+
+    Só tipos em COMPRESS_MIMETYPES e, fora do streaming, a partir de
+    COMPRESS_MIN_SIZE bytes. COMPRESS_LEVEL / COMPRESS_BR_LEVEL trocam CPU
+    por banda. Respostas em streaming são comprimidas pedaço a pedaço, sem
+    perder o envio incremental. Desligue com COMPRESSION = False (ex.:
+    quando o proxy reverso já comprime).
+    """
+    if not app.config.get('COMPRESSION', True):
+        return
+    app.after_request(_compress_response)
@@ -0,0 +1,46 @@
+"""CPF e cartão SUS normalizados (só dígitos) para busca por índice.
+
+Os valores ficam gravados como digitados (com ou sem pontuação) em cpf,
+cartao_sus e atendimentos.paciente_cpf; as colunas *_digits guardam só os
+dígitos e são as usadas nas buscas por igualdade e por prefixo.
+"""
+import re
+
+from sqlalchemy import and_, false
+
+CPF_LENGTH = 11
+CARTAO_SUS_LENGTH = 15
+
+_NON_DIGITS = re.compile(r'[^0-9]')
+# o que um CPF/cartão digitado pode ter além dos dígitos
+_DOCUMENT_RE = re.compile(r'^[0-9.\-/\s]+$')
+
+
+def digits_only(value):
+    """'123.456.789-09' -> '12345678909'; None ou sem dígitos -> None."""
+    if value is None:
+        return None
+    return _NON_DIGITS.sub('', str(value)) or None
+
+
+def document_digits(query: str):
+    """Dígitos de uma busca que parece CPF/cartão SUS (só dígitos e pontuação), ou None."""
+    if not query or not _DOCUMENT_RE.match(query):
+        return None
+    return digits_only(query)
+
+
+def digits_lookup(column, digits, full_length: int):
+    """Condição de busca em uma coluna *_digits.
+
+    Com o documento completo é uma igualdade; com menos dígitos, um prefixo
+    escrito como intervalo (col >= '123' AND col < '124'), que vira range
+    scan no índice B-tree em qualquer banco, ao contrário de LIKE '123%'
+    (que o SQLite só otimiza com case_sensitive_like).
+    """
+    if not digits:
+        return false()
+    if len(digits) >= full_length:
+        return column == digits
+    upper = digits[:-1] + chr(ord(digits[-1]) + 1)
+    return and_(column >= digits, column < upper)
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+
+from flask import current_app, has_app_context
+from src.main.repository.replica import primary
+from src.main.models.especialidades_model import Especialidades
+
+# segundos até recarregar do banco; a invalidação explícita só alcança o
+# processo que fez a escrita, então o TTL limita a defasagem dos demais.
+# Por isso o cache serve só leituras: quem grava (ex.: o nome copiado em
+# atendimentos) consulta o banco.
+DEFAULT_TTL = 300
+
+_lock = threading.Lock()
+
+
+class _Snapshot:
+    def __init__(self, items, body, etag, loaded_at):
+        self.items = items                       # lista de dicts (to_dict), por id
+        self.by_id = {e['id']: e for e in items}
+        self.body = body                         # JSON já serializado (mesmo formato do jsonify)
+        self.etag = etag
+        self.loaded_at = loaded_at
+
+
+def build_snapshot(items) -> _Snapshot:
+    """Monta o snapshot a partir da lista de dicts (to_dict) ordenada por id."""
+    body = f"{current_app.json.dumps(items)}\n"
+    etag = hashlib.sha1(body.encode()).hexdigest()[:20]
+    return _Snapshot(items, body, etag, time.monotonic())
+
+
+def _load() -> _Snapshot:
+    # o cache vale para o processo todo: lido do primário, não de uma réplica atrasada
+    with primary():
+        return build_snapshot([e.to_dict() for e in Especialidades.query.order_by(Especialidades.id).all()])
+
+
+def cached_snapshot():
+    """O snapshot em cache se ainda estiver no TTL, sem ir ao banco; senão None."""
+    ttl = current_app.config.get('ESPECIALIDADES_CACHE_TTL', DEFAULT_TTL)
+    snap = current_app.extensions.get('especialidades_cache')
+    if snap is None or time.monotonic() - snap.loaded_at > ttl:
+        return None
+    return snap
+
+
+def store(snap: _Snapshot) -> _Snapshot:
+    """Guarda um snapshot carregado por fora (ex.: sessão assíncrona do modo ASGI)."""
+    current_app.extensions['especialidades_cache'] = snap
+    return snap
+
+
+def snapshot() -> _Snapshot:
+    """Retorna as especialidades em cache, recarregando se o TTL expirou.
+
+    O cache fica em app.extensions, um por instância da aplicação.
+    """
+    snap = cached_snapshot()
+    if snap is None:
+        with _lock:
+            snap = cached_snapshot()
+            if snap is None:
+                snap = store(_load())
+    return snap
+
+
+def invalidate():
+    """Descarta o cache; chamar após criar/alterar/remover especialidades."""
+    if has_app_context():
+        current_app.extensions.pop('especialidades_cache', None)
+
+
+def especialidades_by_nome():
+    """Lista (dicts) ordenada por nome, para selects e telas."""
+    return sorted(snapshot().items, key=lambda e: e['nome_especialidade'] or '')
+
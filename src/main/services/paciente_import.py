@@ -0,0 +1,157 @@
+import csv
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from src.main.repository.database import db
+from src.main.models.pacientes_model import Pacientes
+from src.main.services.versoes import bump_versions
+from src.main.services.documentos import digits_only
+
+IMPORT_COLUMNS = ('nome', 'data_nascimento', 'cpf', 'cartao_sus', 'endereco')
+DEFAULT_CHUNK_SIZE = 1000
+# limite de erros detalhados no relatório (o total continua sendo contado)
+MAX_REPORTED_ERRORS = 1000
+
+_MAX_LENGTHS = {
+    col: Pacientes.__table__.c[col].type.length
+    for col in ('nome', 'cpf', 'cartao_sus', 'endereco')
+}
+
+
+def _clean_row(raw: dict) -> dict:
+    """Normaliza uma linha do CSV e aplica as regras de Pacientes.from_dict.
+
+    Levanta ValueError com o motivo da rejeição.
+    """
+    row = {}
+    for col in IMPORT_COLUMNS:
+        value = (raw.get(col) or '').strip()
+        row[col] = value or None
+    if not row['nome']:
+        raise ValueError('nome is required')
+    for col, max_len in _MAX_LENGTHS.items():
+        if row[col] and len(row[col]) > max_len:
+            raise ValueError(f'{col} longer than {max_len} characters')
+    if row['data_nascimento']:
+        row['data_nascimento'] = Pacientes._parse_date(row['data_nascimento'])
+    # o insert é Core: as colunas normalizadas vão junto (como no @validates do modelo)
+    row['cpf_digits'] = digits_only(row['cpf'])
+    row['cartao_sus_digits'] = digits_only(row['cartao_sus'])
+    return row
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': error})
+
+    def to_dict(self):
+        return {
+            'processed': self.processed,
+            'inserted': self.inserted,
+            'rejected': self.rejected,
+            'errors': self.errors,
+        }
+
+
+def _existing(column, values):
+    if not values:
+        return set()
+    return set(db.session.execute(select(column).where(column.in_(values))).scalars())
+
+
+def _flush_chunk(chunk, report: ImportReport):
+    """Remove do lote os CPFs/cartões já cadastrados e insere o resto.
+
+    Uma consulta IN por coluna única e um INSERT executemany por lote.
+    """
+    # compara só os dígitos: '123.456.789-09' e '12345678909' são o mesmo CPF
+    existing_cpf = _existing(Pacientes.cpf_digits, {r['cpf_digits'] for _, r in chunk if r['cpf_digits']})
+    existing_sus = _existing(Pacientes.cartao_sus_digits,
+                             {r['cartao_sus_digits'] for _, r in chunk if r['cartao_sus_digits']})
+
+    rows = []
+    for line, row in chunk:
+        if row['cpf_digits'] and row['cpf_digits'] in existing_cpf:
+            report.reject(line, f"cpf {row['cpf']} already registered")
+        elif row['cartao_sus_digits'] and row['cartao_sus_digits'] in existing_sus:
+            report.reject(line, f"cartao_sus {row['cartao_sus']} already registered")
+        else:
+            rows.append((line, row))
+    if not rows:
+        return
+
+    try:
+        db.session.execute(insert(Pacientes.__table__), [r for _, r in rows])
+        bump_versions(db.session.connection(), ['pacientes'])
+        db.session.commit()
+        report.inserted += len(rows)
+    except IntegrityError:
+        # outro processo cadastrou um dos CPFs entre a consulta e o insert:
+        # refaz o lote linha a linha para rejeitar só as conflitantes
+        db.session.rollback()
+        for line, row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(Pacientes.__table__), row)
+                report.inserted += 1
+            except IntegrityError as e:
+                report.reject(line, f'duplicate cpf/cartao_sus ({e.orig})')
+        bump_versions(db.session.connection(), ['pacientes'])
+        db.session.commit()
+
+
+def import_pacientes_csv(stream, chunk_size: int = DEFAULT_CHUNK_SIZE, delimiter: str = ',', progress=None):
+    """Importa pacientes de um CSV (texto) em lotes.
+
+    O CSV precisa de cabeçalho com as colunas de IMPORT_COLUMNS (só `nome` é
+    obrigatória). Datas seguem Pacientes._parse_date. CPFs e cartões SUS
+    repetidos no arquivo ou já cadastrados são rejeitados. `progress`, se
+    informado, é chamado com o ImportReport após cada lote gravado.
+
+    Retorna o ImportReport.
+    """
+    report = ImportReport()
+    reader = csv.DictReader(stream, delimiter=delimiter)
+    if not reader.fieldnames or 'nome' not in reader.fieldnames:
+        raise ValueError('CSV header must include the "nome" column')
+
+    seen_cpf, seen_sus = set(), set()
+    chunk = []
+    for raw in reader:
+        report.processed += 1
+        line = reader.line_num
+        try:
+            row = _clean_row(raw)
+        except ValueError as e:
+            report.reject(line, str(e))
+            continue
+        if row['cpf_digits'] and row['cpf_digits'] in seen_cpf:
+            report.reject(line, f"cpf {row['cpf']} duplicated in file")
+            continue
+        if row['cartao_sus_digits'] and row['cartao_sus_digits'] in seen_sus:
+            report.reject(line, f"cartao_sus {row['cartao_sus']} duplicated in file")
+            continue
+        if row['cpf_digits']:
+            seen_cpf.add(row['cpf_digits'])
+        if row['cartao_sus_digits']:
+            seen_sus.add(row['cartao_sus_digits'])
+
+        chunk.append((line, row))
+        if len(chunk) >= chunk_size:
+            _flush_chunk(chunk, report)
+            chunk = []
+            if progress:
+                progress(report)
+    if chunk:
+        _flush_chunk(chunk, report)
+        if progress:
+            progress(report)
+    return report
@@ -0,0 +1,77 @@
+import re
+
+from sqlalchemy import or_, select, text
+from src.main.repository.database import db
+from src.main.models.pacientes_model import Pacientes
+from src.main.services.documentos import CARTAO_SUS_LENGTH, CPF_LENGTH, digits_lookup, document_digits
+
+# \w já cobre letras acentuadas; pontuação do CPF separa os tokens
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _tokens(query: str):
+    return _TOKEN_RE.findall(query or '')
+
+
+def _sqlite_match(tokens) -> str:
+    # cada termo vira uma busca por prefixo ("joa"* casa com joão); AND implícito
+    return ' '.join(f'"{t}"*' for t in tokens)
+
+
+def _mysql_match(tokens) -> str:
+    # no parser ngram um termo entre aspas vira busca de frase pelos n-gramas;
+    # termos de 1 caractere (menores que ngram_token_size) usam o curinga
+    return ' '.join(f'+"{t}"' if len(t) > 1 else f'+{t}*' for t in tokens)
+
+
+def search_statement(query: str, dialect: str, limit: int = 10):
+    """Monta (statement, params) da busca para o dialeto do banco.
+
+    Retorna None quando a busca não tem termos. Compartilhado pela rota
+    síncrona e pelo modo ASGI. Buscas só com dígitos e pontuação vão aos
+    índices de cpf_digits/cartao_sus_digits (igualdade ou prefixo).
+    """
+    digits = document_digits(query)
+    if digits:
+        return select(Pacientes).where(or_(
+            digits_lookup(Pacientes.cpf_digits, digits, CPF_LENGTH),
+            digits_lookup(Pacientes.cartao_sus_digits, digits, CARTAO_SUS_LENGTH),
+        )).order_by(Pacientes.id).limit(limit), {}
+
+    tokens = _tokens(query)
+    if not tokens:
+        return None
+
+    if dialect == 'sqlite':
+        stmt = text(
+            "SELECT pacientes.* FROM pacientes_fts "
+            "JOIN pacientes ON pacientes.id = pacientes_fts.rowid "
+            "WHERE pacientes_fts MATCH :q ORDER BY pacientes_fts.rank LIMIT :limit")
+        params = {'q': _sqlite_match(tokens), 'limit': limit}
+    elif dialect == 'mysql':
+        stmt = text(
+            "SELECT * FROM pacientes "
+            "WHERE MATCH(nome, cpf) AGAINST (:q IN BOOLEAN MODE) "
+            "ORDER BY MATCH(nome, cpf) AGAINST (:q IN BOOLEAN MODE) DESC LIMIT :limit")
+        params = {'q': _mysql_match(tokens), 'limit': limit}
+    else:
+        return select(Pacientes).where(
+            or_(Pacientes.nome.ilike(f'%{query}%'), Pacientes.cpf.ilike(f'%{query}%'))
+        ).limit(limit), {}
+
+    return select(Pacientes).from_statement(stmt), params
+
+
+def find_pacientes(query: str, limit: int = 10):
+    """Busca pacientes por nome/CPF usando o índice textual do banco.
+
+    Os resultados vêm ordenados por relevância (bm25 no SQLite, score do
+    MATCH no MySQL). Em outros bancos cai no ilike('%q%') antigo. CPF e
+    cartão SUS (com ou sem pontuação, completos ou prefixo) usam os
+    índices das colunas *_digits, em ordem de id.
+    """
+    built = search_statement(query, db.session.get_bind().dialect.name, limit)
+    if built is None:
+        return []
+    stmt, params = built
+    return db.session.execute(stmt, params).scalars().all()
@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def parse_limit(raw, default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    """Converte o parâmetro `limit` da query string, limitado a `maximum`.
+
+    Levanta ValueError para valores não inteiros ou menores que 1.
+    """
+    if raw is None or raw == '':
+        return default
+    limit = int(raw)
+    if limit < 1:
+        raise ValueError('limit must be >= 1')
+    return min(limit, maximum)
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values) -> str:
+    """Gera um cursor opaco (base64 url-safe) a partir dos valores da chave de ordenação."""
+    raw = json.dumps([_to_json(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    """Decodifica um cursor gerado por `encode_cursor` para as colunas dadas.
+
+    Levanta ValueError se o cursor estiver malformado.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError('invalid cursor') from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('invalid cursor')
+    try:
+        return [_from_json(col, v) for col, v in zip(columns, values)]
+    except (ValueError, TypeError) as e:
+        raise ValueError('invalid cursor') from e
+
+
+def keyset_condition(columns, values, descending: bool = False):
+    """Monta a condição "depois de `values`" para a ordenação composta em `columns`.
+
+    Expande (a, b) > (x, y) em `a > x OR (a = x AND b > y)`, forma que os
+    otimizadores de MySQL e SQLite resolvem com range scan no índice.
+    """
+    clauses = []
+    for i, col in enumerate(columns):
+        prefix = [columns[j] == values[j] for j in range(i)]
+        step = col < values[i] if descending else col > values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
+
+
+def keyset_paginate(stmt, columns, cursor=None, limit: int = DEFAULT_LIMIT, descending: bool = False):
+    """Aplica ordenação, cursor e limite de uma página keyset a um `select()`/`Query`.
+
+    Busca `limit + 1` linhas para saber se existe uma próxima página sem
+    precisar de COUNT. O custo de cada página é o mesmo, seja ela a primeira
+    ou a milésima.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        stmt = stmt.filter(keyset_condition(columns, values, descending))
+    order = [c.desc() for c in columns] if descending else list(columns)
+    return stmt.order_by(*order).limit(limit + 1)
+
+
+def split_page(rows, limit: int, key):
+    """Separa as `limit` linhas da página e calcula o `next_cursor`.
+
+    `key` recebe a última linha da página e devolve os valores da chave de
+    ordenação. Retorna (linhas, next_cursor), com next_cursor None na última página.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
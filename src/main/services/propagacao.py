@@ -0,0 +1,88 @@
+from sqlalchemy import event, exists, func, inspect, select, update
+from sqlalchemy.orm import Session
+from src.main.repository.database import db
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.especialidades_model import Especialidades
+from src.main.models.pacientes_model import Pacientes
+from src.main.models.usuarios_model import Usuarios
+from src.main.services.versoes import mark_changed
+
+_atendimentos = Atendimentos.__table__
+
+# cópias desnormalizadas em atendimentos, lidas sem join na listagem:
+# (modelo de origem, FK em atendimentos, {coluna em atendimentos: atributo da origem})
+COPIES = (
+    (Pacientes, 'paciente_id', {'paciente_nome': 'nome', 'paciente_cpf': 'cpf', 'paciente_cpf_digits': 'cpf_digits'}),
+    (Especialidades, 'especialidade_id', {'especialidade': 'nome_especialidade'}),
+    (Usuarios, 'criado_por_id', {'criado_por': 'usuario'}),
+)
+
+DEFAULT_REPAIR_CHUNK_SIZE = 5000
+
+
+def _changed_copies(obj):
+    """(fk, {coluna em atendimentos: novo valor}) dos atributos alterados de `obj`, ou None."""
+    for model, fk, mapping in COPIES:
+        if isinstance(obj, model):
+            state = inspect(obj)
+            values = {col: getattr(obj, attr) for col, attr in mapping.items()
+                      if state.attrs[attr].history.has_changes()}
+            if values:
+                return fk, values
+    return None
+
+
+@event.listens_for(Session, 'after_flush')
+def _propagate_copies(session, flush_context):
+    # o histórico dos atributos ainda está disponível aqui; o UPDATE roda na
+    # mesma transação do flush, então a origem e as cópias mudam juntas. A
+    # versão de atendimentos só é incrementada no commit (mark_changed)
+    connection = None
+    changed = 0
+    for obj in session.dirty:
+        found = _changed_copies(obj)
+        if found is None:
+            continue
+        fk, values = found
+        connection = connection or session.connection()
+        result = connection.execute(
+            update(_atendimentos)
+            .where(_atendimentos.c[fk] == obj.id)
+            .values(values))
+        changed += result.rowcount
+    if changed:
+        mark_changed(session, ['atendimentos'])
+
+
+def repair_copies(chunk_size: int = DEFAULT_REPAIR_CHUNK_SIZE, progress=None) -> dict:
+    """Corrige cópias divergentes de atendimentos em lotes de ids, com commit por lote.
+
+    Para cada lote roda um UPDATE por tabela de origem (com subconsulta
+    correlacionada) só nas linhas cuja cópia difere da origem. Atendimentos
+    cuja origem foi removida ficam como estão. Retorna as linhas corrigidas
+    por coluna de FK.
+    """
+    fixed = {fk: 0 for _, fk, _ in COPIES}
+    max_id = db.session.scalar(select(func.max(_atendimentos.c.id))) or 0
+    for lo in range(1, max_id + 1, chunk_size):
+        hi = lo + chunk_size
+        in_chunk = [_atendimentos.c.id >= lo, _atendimentos.c.id < hi]
+        chunk_changed = 0
+        for model, fk, mapping in COPIES:
+            source = model.__table__
+            matches = source.c.id == _atendimentos.c[fk]
+            values = {col: select(source.c[attr]).where(matches).scalar_subquery()
+                      for col, attr in mapping.items()}
+            drift = [_atendimentos.c[col].is_distinct_from(value) for col, value in values.items()]
+            result = db.session.execute(
+                update(_atendimentos)
+                .where(*in_chunk, exists().where(matches), db.or_(*drift))
+                .values(values))
+            fixed[fk] += result.rowcount
+            chunk_changed += result.rowcount
+        if chunk_changed:
+            mark_changed(db.session(), ['atendimentos'])
+        db.session.commit()
+        if progress:
+            progress(min(hi - 1, max_id), max_id, fixed)
+    return fixed
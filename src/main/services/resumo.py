@@ -0,0 +1,130 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import bindparam, delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from src.main.repository.database import db
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.atendimentos_resumo_model import AtendimentosResumo
+
+_resumo = AtendimentosResumo.__table__
+_KEY_COLUMNS = ('dia', 'especialidade_id', 'criado_por_id')
+
+
+def resumo_key(criado_em, especialidade_id, criado_por_id):
+    """Chave (dia, especialidade_id, criado_por_id) de um atendimento no resumo."""
+    if isinstance(criado_em, datetime):
+        criado_em = criado_em.date()
+    return (criado_em, especialidade_id or 0, criado_por_id)
+
+
+def deltas_for_rows(rows, sign: int = 1) -> Counter:
+    """Deltas do resumo para linhas gravadas fora do ORM (ex.: insert em lote)."""
+    return Counter({k: sign * n for k, n in Counter(
+        resumo_key(r['criado_em'], r.get('especialidade_id'), r['criado_por_id']) for r in rows).items()})
+
+
+def apply_deltas(connection, deltas: Counter):
+    """Soma os deltas no resumo com um único upsert multi-linha.
+
+    Usa ON CONFLICT (SQLite) / ON DUPLICATE KEY (MySQL); em outros bancos
+    cai em UPDATE seguido de INSERT por chave. Linhas que chegam a zero
+    são apagadas.
+    """
+    values = [dict(zip(_KEY_COLUMNS, key), total=n) for key, n in deltas.items() if n]
+    if not values:
+        return
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        stmt = sqlite_insert(_resumo).values(values)
+        stmt = stmt.on_conflict_do_update(index_elements=list(_KEY_COLUMNS),
+                                          set_={'total': _resumo.c.total + stmt.excluded.total})
+        connection.execute(stmt)
+    elif dialect == 'mysql':
+        stmt = mysql_insert(_resumo).values(values)
+        connection.execute(stmt.on_duplicate_key_update(total=_resumo.c.total + stmt.inserted.total))
+    else:
+        for v in values:
+            where = [_resumo.c[c] == v[c] for c in _KEY_COLUMNS]
+            result = connection.execute(update(_resumo).where(*where).values(total=_resumo.c.total + v['total']))
+            if result.rowcount == 0:
+                connection.execute(insert(_resumo).values(**v))
+    emptied = [{f'_{c}': v[c] for c in _KEY_COLUMNS} for v in values if v['total'] < 0]
+    if emptied:
+        connection.execute(
+            delete(_resumo).where(*(_resumo.c[c] == bindparam(f'_{c}') for c in _KEY_COLUMNS),
+                                  _resumo.c.total <= 0),
+            emptied)
+
+
+# active_history: ao alterar a chave de um atendimento já expirado (ex.: após
+# um commit) o SQLAlchemy carrega o valor antigo, para o histórico ter de
+# qual linha do resumo descontar
+for _attr in (Atendimentos.criado_em, Atendimentos.especialidade_id, Atendimentos.criado_por_id):
+    event.listen(_attr, 'set', lambda target, value, oldvalue, initiator: value,
+                 active_history=True, retval=True)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_changes(session, flush_context, instances):
+    # remoções e alterações são lidas antes do flush, enquanto a linha
+    # antiga ainda existe e o histórico dos atributos está disponível.
+    # Um Counter novo a cada flush: o que sobrou de um flush que falhou
+    # não é somado no próximo
+    deltas = session.info['resumo_deltas'] = Counter()
+    for obj in session.deleted:
+        if isinstance(obj, Atendimentos):
+            deltas[resumo_key(obj.criado_em, obj.especialidade_id, obj.criado_por_id)] -= 1
+    for obj in session.dirty:
+        if not isinstance(obj, Atendimentos) or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        old = []
+        for attr in ('criado_em', 'especialidade_id', 'criado_por_id'):
+            hist = state.attrs[attr].history
+            old.append(hist.deleted[0] if hist.deleted else getattr(obj, attr))
+        old_key = resumo_key(*old)
+        new_key = resumo_key(obj.criado_em, obj.especialidade_id, obj.criado_por_id)
+        if old_key != new_key:
+            deltas[old_key] -= 1
+            deltas[new_key] += 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_changes(session, flush_context):
+    # inserts são contados depois do flush, quando criado_em já tem o default
+    deltas = session.info.pop('resumo_deltas', None) or Counter()
+    for obj in session.new:
+        if isinstance(obj, Atendimentos):
+            deltas[resumo_key(obj.criado_em, obj.especialidade_id, obj.criado_por_id)] += 1
+    apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_changes(session, previous_transaction):
+    session.info.pop('resumo_deltas', None)
+
+
+def rebuild_resumo(start=None, end=None) -> int:
+    """Recalcula o resumo a partir da tabela atendimentos.
+
+    Com start/end (datas) reconstrói só esse intervalo de dias. Não faz commit.
+    Retorna o número de linhas do resumo gravadas.
+    """
+    dia = func.date(Atendimentos.criado_em)
+    where_resumo, where_att = [], []
+    if start:
+        where_resumo.append(_resumo.c.dia >= start)
+        where_att.append(Atendimentos.criado_em >= datetime.combine(start, time.min))
+    if end:
+        where_resumo.append(_resumo.c.dia <= end)
+        where_att.append(Atendimentos.criado_em < datetime.combine(end + timedelta(days=1), time.min))
+
+    db.session.execute(delete(_resumo).where(*where_resumo))
+    source = (select(dia, func.coalesce(Atendimentos.especialidade_id, 0), Atendimentos.criado_por_id, func.count())
+              .where(*where_att)
+              .group_by(dia, func.coalesce(Atendimentos.especialidade_id, 0), Atendimentos.criado_por_id))
+    result = db.session.execute(insert(_resumo).from_select([*_KEY_COLUMNS, 'total'], source))
+    return result.rowcount
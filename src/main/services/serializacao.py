@@ -0,0 +1,108 @@
+"""Serialização rápida das respostas JSON de listas.
+
+Mesma saída, byte a byte, de jsonify / app.json.dumps com o provider
+padrão do Flask, com menos trabalho por linha:
+
+- datas formatadas com %-format dos campos (cerca de metade do custo do
+  strftime) e, para colunas Date, com cache por valor;
+- um json.JSONEncoder montado uma vez por app com as opções do provider,
+  em vez de um novo a cada json.dumps(..., **kwargs);
+- arrays escritos em blocos de JSON_ARRAY_CHUNK_SIZE itens, cada bloco
+  numa chamada só ao encoder em C: listas grandes saem em streaming, sem
+  montar a lista de dicts inteira nem a string inteira.
+
+Com JSON_FAST_PATH = False, ou se o app trocar o app.json por outro
+provider, tudo volta para jsonify.
+"""
+import json
+from functools import lru_cache
+
+from flask import current_app, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+DATETIME_FORMAT = "%d-%m-%Y %H:%M:%S"
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def format_datetime(value):
+    """Igual a value.strftime("%d-%m-%Y %H:%M:%S"); None fica None."""
+    if value is None:
+        return None
+    if value.year < 1000:
+        # o preenchimento do ano com zeros no strftime varia por plataforma
+        return value.strftime(DATETIME_FORMAT)
+    return '%02d-%02d-%d %02d:%02d:%02d' % (
+        value.day, value.month, value.year, value.hour, value.minute, value.second)
+
+
+@lru_cache(maxsize=8192)
+def date_strings(value):
+    """(DD-MM-YYYY, YYYY-MM-DD) de uma data; datas de nascimento se repetem
+    muito, então o resultado fica em cache."""
+    if value.year < 1000:
+        return value.strftime("%d-%m-%Y"), value.strftime("%Y-%m-%d")
+    s = value.isoformat()
+    return f'{s[8:10]}-{s[5:7]}-{s[:4]}', s
+
+
+def json_encoder(compact: bool = True):
+    """Encoder equivalente ao app.json do app atual, ou None sem o caminho rápido.
+
+    compact=True reproduz jsonify (separadores sem espaço); compact=False,
+    app.json.dumps sem argumentos (usado no NDJSON da exportação).
+    """
+    app = current_app
+    provider = app.json
+    if not app.config.get('JSON_FAST_PATH', True) or type(provider) is not DefaultJSONProvider:
+        return None
+    if compact and ((provider.compact is None and app.debug) or provider.compact is False):
+        # jsonify indentado (debug): fica com o caminho normal
+        return None
+    key = (compact, provider.ensure_ascii, provider.sort_keys)
+    encoders = app.extensions.setdefault('json_encoders', {})
+    encoder = encoders.get(key)
+    if encoder is None:
+        encoder = encoders[key] = json.JSONEncoder(
+            default=provider.default, ensure_ascii=provider.ensure_ascii, sort_keys=provider.sort_keys,
+            separators=(',', ':') if compact else None)
+    return encoder
+
+
+def iter_json_array(items, to_dict, encoder, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Gera o texto de um array JSON compacto (com o \\n final do jsonify) em blocos.
+
+    Cada bloco é codificado como uma lista numa chamada só ao encoder (o
+    custo por chamada de JSONEncoder.encode é alto) e perde os colchetes.
+    """
+    encode = encoder.encode
+    sep = '['
+    for start in range(0, len(items), chunk_size):
+        chunk = encode([to_dict(i) for i in items[start:start + chunk_size]])
+        yield sep + chunk[1:-1]
+        sep = ','
+    yield ']\n' if sep == ',' else '[]\n'
+
+
+def json_array_response(items, to_dict=None):
+    """Mesma resposta de jsonify([to_dict(i) for i in items]).
+
+    Listas de até JSON_ARRAY_CHUNK_SIZE itens viram um corpo só; maiores
+    saem em streaming, bloco a bloco.
+    """
+    if to_dict is None:
+        to_dict = _identity
+    encoder = json_encoder()
+    if encoder is None:
+        return jsonify([to_dict(i) for i in items])
+
+    app = current_app
+    chunk_size = app.config.get('JSON_ARRAY_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    if len(items) <= chunk_size:
+        body = ''.join(iter_json_array(items, to_dict, encoder, chunk_size))
+    else:
+        body = stream_with_context(iter_json_array(items, to_dict, encoder, chunk_size))
+    return app.response_class(body, mimetype=app.json.mimetype)
+
+
+def _identity(item):
+    return item
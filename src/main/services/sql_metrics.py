@@ -0,0 +1,122 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from src.main.repository.database import db
+
+logger = logging.getLogger('clinica.sql')
+
+# consultas por requisição acima disso geram um warning
+DEFAULT_QUERY_BUDGET = 30
+# a mesma instrução repetida este número de vezes indica um N+1
+DEFAULT_REPEAT_THRESHOLD = 5
+
+# "IN (?, ?, ?)" e "IN (%s, %s)" viram "IN (?)" para agrupar a mesma consulta
+_PARAM_LIST_RE = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s)(?:\s*,\s*(?:\?|%s|%\(\w+\)s))+\s*\)')
+
+
+class RequestSQLMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold: int):
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n >= threshold]
+
+
+def _normalize(statement: str) -> str:
+    return _PARAM_LIST_RE.sub('(?)', ' '.join(statement.split()))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_metrics' in g:
+        conn.info.setdefault('sql_metrics_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('sql_metrics_start')
+    if not starts or not has_request_context() or 'sql_metrics' not in g:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    metrics = g.sql_metrics
+    metrics.count += 1
+    metrics.db_time += elapsed
+    metrics.statements[_normalize(statement)] += 1
+
+
+def _handle_error(exception_context):
+    # a instrução falhou e o after_cursor_execute não vem: descarta o início
+    # dela, senão as próximas durações são pareadas com o início errado
+    conn = exception_context.connection
+    starts = conn.info.get('sql_metrics_start') if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def _start_request():
+    g.sql_metrics = RequestSQLMetrics()
+
+
+def _finish_request(response):
+    metrics = g.pop('sql_metrics', None)
+    if metrics is None:
+        return response
+    config = current_app.config
+    total_ms = (time.perf_counter() - metrics.started) * 1000
+    db_ms = metrics.db_time * 1000
+    repeated = metrics.repeated(config.get('SQL_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD))
+
+    timing = f'db;dur={db_ms:.2f};desc="{metrics.count} queries", app;dur={total_ms:.2f}'
+    if response.headers.get('Server-Timing'):
+        timing = f"{response.headers['Server-Timing']}, {timing}"
+    response.headers['Server-Timing'] = timing
+
+    record = {
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'queries': metrics.count,
+        'db_ms': round(db_ms, 2),
+        'total_ms': round(total_ms, 2),
+        'repeated': [{'statement': stmt[:200], 'count': n} for stmt, n in repeated],
+    }
+    budget = config.get('SQL_QUERY_BUDGET', DEFAULT_QUERY_BUDGET)
+    if metrics.count > budget or repeated:
+        record['budget'] = budget
+        logger.warning(json.dumps(record, ensure_ascii=False))
+    else:
+        logger.info(json.dumps(record, ensure_ascii=False))
+    return response
+
+
+def instrument_engine(engine):
+    """Conta as consultas de engine (síncrono; do assíncrono, o sync_engine)."""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+def init_sql_instrumentation(app):
+    """Liga a contagem de consultas/tempo de banco por requisição.
+
+    Cada resposta recebe um header Server-Timing (db e app) e uma linha de
+    log JSON no logger 'clinica.sql'; vira warning quando passa de
+    SQL_QUERY_BUDGET consultas ou quando uma mesma instrução se repete
+    SQL_REPEAT_THRESHOLD vezes (sinal de N+1). Desligue com
+    SQL_INSTRUMENTATION = False. Em respostas em streaming só é contado o
+    que rodou antes do início do corpo.
+    """
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
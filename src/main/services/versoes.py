@@ -0,0 +1,176 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from werkzeug.http import is_resource_modified
+from src.main.repository.database import db
+from src.main.models.tabela_versoes_model import TabelaVersoes
+
+_versoes = TabelaVersoes.__table__
+
+# tabelas cuja versão alguém lê: as dos GETs condicionais (@conditional e
+# ASYNC_ROUTES), a de remoções do autocomplete e as que validam o cache de
+# tokens de API (services.api_tokens). Escritas nas demais (especialidades,
+# resumo, ...) não tocam tabela_versoes
+VERSIONED_TABLES = frozenset({'atendimentos', 'pacientes', 'pacientes_remocoes', 'api_tokens', 'usuarios'})
+
+
+def bump_versions(connection, nomes):
+    """Incrementa a versão das tabelas indicadas, na transação de `connection`.
+
+    Escritas feitas pelo ORM já passam pelo after_flush abaixo; chamar isto
+    explicitamente só em caminhos Core (insert em lote, importação, UPDATEs
+    set-based). A linha de cada tabela fica bloqueada até o commit, então
+    escritas concorrentes na mesma tabela se serializam nela.
+    """
+    nomes = sorted(set(nomes))
+    if not nomes:
+        return
+    now = datetime.now()
+    values = [{'nome': n, 'versao': 1, 'atualizado_em': now} for n in nomes]
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        stmt = sqlite_insert(_versoes).values(values)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['nome'],
+            set_={'versao': _versoes.c.versao + 1, 'atualizado_em': stmt.excluded.atualizado_em}))
+    elif dialect == 'mysql':
+        stmt = mysql_insert(_versoes).values(values)
+        connection.execute(stmt.on_duplicate_key_update(
+            versao=_versoes.c.versao + 1, atualizado_em=stmt.inserted.atualizado_em))
+    else:
+        for v in values:
+            result = connection.execute(update(_versoes).where(_versoes.c.nome == v['nome'])
+                                        .values(versao=_versoes.c.versao + 1, atualizado_em=now))
+            if result.rowcount == 0:
+                connection.execute(insert(_versoes).values(**v))
+
+
+def mark_changed(session, nomes):
+    """Anota tabelas para incrementar a versão no commit da transação de `session`."""
+    session.info.setdefault('versoes_pendentes', set()).update(nomes)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    # new/dirty/deleted ainda mostram o estado de antes do flush aqui
+    nomes = set()
+    for obj in (*session.new, *session.deleted):
+        nomes.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            nomes.add(obj.__table__.name)
+    nomes &= VERSIONED_TABLES
+    if nomes:
+        mark_changed(session, nomes)
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_pending_tables(session):
+    # o incremento fica para o commit: a linha de cada tabela fica bloqueada
+    # só até o fim da transação, e não desde o primeiro flush. O before_commit
+    # vem antes do flush final do commit, então o flush é feito aqui
+    session.flush()
+    nomes = session.info.pop('versoes_pendentes', None)
+    if nomes:
+        bump_versions(session.connection(), nomes)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending_tables(session, previous_transaction):
+    session.info.pop('versoes_pendentes', None)
+
+
+def versions_statement(nomes):
+    return (select(_versoes.c.nome, _versoes.c.versao, _versoes.c.atualizado_em)
+            .where(_versoes.c.nome.in_(nomes)))
+
+
+def table_versions(nomes) -> dict:
+    """{nome: (versao, atualizado_em)}; tabelas nunca alteradas ficam de fora."""
+    rows = db.session.execute(versions_statement(nomes))
+    return {nome: (versao, atualizado_em) for nome, versao, atualizado_em in rows}
+
+
+def validators(versions: dict, tabelas):
+    """(etag, last_modified) de uma resposta que depende de `tabelas`."""
+    etag = 'v' + '.'.join(str(versions.get(t, (0, None))[0]) for t in tabelas)
+    last_modified = max((dt for _, dt in versions.values() if dt), default=None)
+    if last_modified is not None:
+        # Last-Modified tem resolução de segundos: uma escrita no mesmo
+        # segundo passaria despercebida, então só anuncia a data depois que
+        # o segundo fechou (a ETag continua valendo)
+        if (datetime.now() - last_modified).total_seconds() < 1:
+            last_modified = None
+        else:
+            last_modified = last_modified.astimezone(timezone.utc)
+    return etag, last_modified
+
+
+def is_not_modified(etag, last_modified) -> bool:
+    """True se o If-None-Match / If-Modified-Since da requisição ainda vale."""
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # sempre revalidar: sem isto o navegador pode aplicar cache heurístico
+    # a partir do Last-Modified e deixar de ver mudanças
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def content_conditional(response):
+    """GET condicional pelo conteúdo: ETag = hash do corpo, 304 se o cliente já o tem.
+
+    Para detalhes baratos de montar cujas tabelas não têm versão
+    (especialidades vêm do cache do processo; a de usuarios muda a cada
+    escrita em qualquer usuário): economiza a transferência, não a consulta. Mesma
+    comparação fraca de list_especialidades (com compressão a ETag volta
+    como W/"...").
+    """
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+    etag = hashlib.sha1(response.get_data()).hexdigest()[:20]
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional(*tabelas):
+    """GET condicional pela versão das tabelas das quais a resposta depende.
+
+    Antes de chamar a view lê só as versões (uma consulta pela chave) e, se
+    o If-None-Match / If-Modified-Since do cliente ainda vale, responde 304
+    sem buscar nem serializar linhas. A ETag é fraca e vale para a URL
+    inteira (inclusive a query string), não para o conteúdo em bytes.
+    """
+    unknown = set(tabelas) - VERSIONED_TABLES
+    if unknown:
+        raise ValueError(f'tabelas sem versão (VERSIONED_TABLES): {sorted(unknown)}')
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            etag, last_modified = validators(table_versions(tabelas), tabelas)
+            if is_not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            return set_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
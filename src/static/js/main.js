@@ -14,7 +14,7 @@ document.addEventListener('DOMContentLoaded', function() {
       }
   
       try {
-        const response = await fetch(`/pacientes/search?q=${query}`);
+        const response = await fetch(`/pacientes/search?q=${encodeURIComponent(query)}`);
         const pacientes = await response.json();
   
         // Limpa os resultados anteriores
@@ -43,9 +43,41 @@ document.addEventListener('DOMContentLoaded', function() {
       }
     }
   
-    // Adiciona o "ouvinte" de eventos no campo de busca
-    pacienteSearchInput.addEventListener('input', () => {
-      searchPacientes(pacienteSearchInput.value);
+    // Adiciona o "ouvinte" de eventos no campo de busca (só existe na aba de atendimentos).
+    // O debounce evita uma requisição por tecla enquanto o usuário ainda está digitando.
+    if (pacienteSearchInput) {
+      let searchTimer = null;
+      pacienteSearchInput.addEventListener('input', () => {
+        pacienteIdInput.value = '';
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => searchPacientes(pacienteSearchInput.value), 250);
+      });
+    }
+
+    // BOTÕES "CARREGAR MAIS": buscam o próximo fragmento (<tr>) da tabela
+    document.querySelectorAll('.load-more-btn').forEach(button => {
+      button.addEventListener('click', async () => {
+        button.disabled = true;
+        try {
+          const url = `${button.dataset.url}?cursor=${encodeURIComponent(button.dataset.cursor)}`;
+          const response = await fetch(url);
+          if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+          }
+          document.querySelector(button.dataset.target).insertAdjacentHTML('beforeend', await response.text());
+
+          const nextCursor = response.headers.get('X-Next-Cursor');
+          if (nextCursor) {
+            button.dataset.cursor = nextCursor;
+            button.disabled = false;
+          } else {
+            button.remove(); // última página
+          }
+        } catch (error) {
+          console.error('Erro ao carregar mais linhas:', error);
+          button.disabled = false;
+        }
+      });
     });
   
     // LÓGICA PARA O MODAL DE EDIÇÃO DE PACIENTES
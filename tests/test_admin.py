@@ -0,0 +1,180 @@
+import pytest
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.repository.pool import engine_options_from_env
+from src.main.models.usuarios_model import Usuarios
+from src.main.models.atendimentos_model import Atendimentos
+
+
+@pytest.fixture
+def app(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'clinica.db'}"
+
+    class TestConfig:
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = uri
+        SQLALCHEMY_ENGINE_OPTIONS = engine_options_from_env(uri)
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SECRET_KEY = 'test-secret'
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(username, cargo='user'):
+    u = Usuarios(usuario=username, senha='hash', cargo=cargo)
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+def test_engine_options_from_env(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '12')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    opts = engine_options_from_env('mysql+pymysql://u:p@db/clinica')
+    assert opts['pool_size'] == 12
+    assert opts['pool_pre_ping'] is False
+    assert opts['pool_recycle'] == 1800
+    assert engine_options_from_env('sqlite:///:memory:') == {}
+
+
+def test_gunicorn_pools_fit_max_connections(monkeypatch):
+    import importlib.util
+    import os
+    from pathlib import Path
+    for name in ('DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_MAX_CONNECTIONS'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('GUNICORN_WORKERS', '17')  # 2 x 8 núcleos + 1
+    path = Path(__file__).resolve().parents[1] / 'gunicorn.conf.py'
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', path)
+    conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(conf)
+    per_worker = int(os.environ['DB_POOL_SIZE']) + int(os.environ['DB_MAX_OVERFLOW'])
+    assert conf.workers * per_worker <= 140 < 151
+    assert conf.pool_defaults(2, 140) == {'DB_POOL_SIZE': 5, 'DB_MAX_OVERFLOW': 10}
+
+
+def test_pool_stats_admin_only(client):
+    user = make_user('normal')
+    admin = make_user('admin', 'admin')
+
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+    assert client.get('/admin/pool').status_code == 403
+
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+    r = client.get('/admin/pool')
+    assert r.status_code == 200
+    stats = r.get_json()['default']
+    assert stats['class'] == 'InstrumentedQueuePool'
+    assert stats['size'] == 5
+    assert stats['checkouts'] >= 1
+    assert stats['timeouts'] == 0
+    assert {'checked_out', 'overflow', 'wait_avg_ms', 'wait_max_ms'} <= set(stats)
+
+
+def test_dispose_engines_starts_worker_with_empty_pool(app):
+    from src.main.repository.database import dispose_engines
+    db.session.execute(db.text('SELECT 1'))
+    db.session.remove()
+    engine = db.engine
+    inherited = engine.pool
+    assert inherited.checkedin() == 1
+
+    dispose_engines(app)  # o que o post_fork do gunicorn faz em cada worker
+    assert engine.pool is not inherited
+    assert engine.pool.checkedin() == 0
+    # os contadores do /admin/pool continuam acumulando
+    assert engine.pool.stats is inherited.stats
+
+
+def request_as(client, method, path, token=None, **kwargs):
+    # a fixture mantém o app context aberto entre requisições; sem isto o
+    # current_user da requisição anterior continuaria em g
+    from flask import g
+    g.pop('_login_user', None)
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    return client.open(path, method=method, headers=headers, **kwargs)
+
+
+def bearer(client, method, path, token, **kwargs):
+    return request_as(client, method, path, token, **kwargs)
+
+
+def test_api_token_lifecycle(client, app):
+    from sqlalchemy import event
+    admin = make_user('admin', 'admin')
+    integracao = make_user('integracao')
+    app.config['WTF_CSRF_ENABLED'] = False
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+    r = client.post('/admin/tokens', json={'usuario_id': integracao.id, 'nome': 'laboratório'})
+    assert r.status_code == 201
+    issued = r.get_json()
+    token = issued['token']
+    listed = client.get('/admin/tokens').get_json()
+    assert [t['prefixo'] for t in listed] == [token[:12]]
+    assert 'token' not in listed[0] and 'token_hash' not in listed[0]
+
+    # cliente de máquina: sem cookie de sessão e com o CSRF ligado
+    app.config['WTF_CSRF_ENABLED'] = True
+    api = app.test_client()
+    assert bearer(api, 'GET', '/atendimentos/', token).status_code == 200
+    statements = []
+    listener = lambda conn, cur, stmt, params, ctx, many: statements.append(stmt)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    r = bearer(api, 'POST', '/atendimentos/bulk', token, json=[{'paciente_nome': 'Via API'}])
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    assert r.status_code == 201
+    # token já em cache: nenhuma consulta a api_tokens/usuarios
+    assert not any('FROM api_tokens' in s or 'FROM usuarios' in s for s in statements)
+
+    # cookie de sessão + token: a requisição roda como o usuário do cookie,
+    # então o token não dispensa o CSRF
+    r = bearer(client, 'POST', '/atendimentos/bulk', token, json=[{'paciente_nome': 'Cookie'}])
+    assert r.status_code == 400
+    assert Atendimentos.query.filter_by(paciente_nome='Cookie').count() == 0
+
+    # token inválido não autentica nem dispensa o CSRF
+    assert bearer(api, 'GET', '/atendimentos/', 'clin_invalido').status_code == 401
+    assert bearer(api, 'POST', '/atendimentos/bulk', 'clin_invalido', json=[{}]).status_code == 400
+
+    # alterar o usuário invalida o cache; revogar derruba o token na hora
+    app.config['WTF_CSRF_ENABLED'] = False
+    assert bearer(api, 'GET', '/admin/tokens', token).status_code == 403
+    assert request_as(client, 'PUT', f'/usuarios/{integracao.id}', json={'cargo': 'admin'}).status_code == 200
+    assert bearer(api, 'GET', '/admin/tokens', token).status_code == 200
+    assert request_as(client, 'DELETE', f"/admin/tokens/{issued['id']}").get_json()['revogado'] is True
+    assert bearer(api, 'GET', '/atendimentos/', token).status_code == 401
+
+
+def test_token_cache_follows_writes_from_other_workers(client, app):
+    from datetime import datetime
+    from src.main.models.api_tokens_model import ApiTokens
+    from src.main.services.api_tokens import issue_token, token_cache
+    user = make_user('worker', 'admin')
+    token, raw = issue_token(user, 'integração')
+    db.session.commit()
+    api = app.test_client()
+    assert bearer(api, 'GET', '/admin/tokens', raw).status_code == 200
+    assert len(token_cache()) == 1
+
+    # escritas direto pelo ORM, como num outro worker: o cache deste
+    # processo não é avisado, só a versão em tabela_versoes muda
+    user.cargo = 'user'
+    db.session.commit()
+    assert bearer(api, 'GET', '/admin/tokens', raw).status_code == 403
+    db.session.get(ApiTokens, token.id).revogado_em = datetime.now()
+    db.session.commit()
+    assert bearer(api, 'GET', '/atendimentos/', raw).status_code == 401
@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event as sa_event
+
+pytest.importorskip('asgiref')
+pytest.importorskip('aiosqlite')
+pytest.importorskip('greenlet')
+
+from src.main.server.asgi import create_asgi_app
+from src.main.repository.database import db
+from src.main.models.usuarios_model import Usuarios
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.especialidades_model import Especialidades
+from src.main.models.pacientes_model import Pacientes
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    # arquivo, não :memory:, para os engines síncrono e assíncrono verem o mesmo banco
+    class TestConfig:
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'asgi.db'}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SECRET_KEY = 'test-secret'
+
+    asgi_app = create_asgi_app(TestConfig)
+    app = asgi_app.flask_app
+    with app.app_context():
+        db.create_all()
+        admin = Usuarios(usuario='admin', senha='hash', cargo='admin')
+        db.session.add_all([admin, Especialidades(nome_especialidade='Cardiologia'),
+                            Pacientes(nome='João Souza', cpf='123.456.789-00')])
+        db.session.commit()
+        for i in range(5):
+            db.session.add(Atendimentos(paciente_nome=f'P{i}', criado_por='admin', criado_por_id=admin.id))
+        db.session.commit()
+    yield asgi_app
+    asyncio.run(asgi_app.engine.dispose())
+    with app.app_context():
+        db.drop_all()
+
+
+def session_cookie(app, user_id):
+    value = app.session_interface.get_signing_serializer(app).dumps({'_user_id': str(user_id), '_fresh': True})
+    return f'session={value}'
+
+
+def call(asgi_app, path, method='GET', headers=()):
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'method': method, 'path': path, 'root_path': '', 'scheme': 'http',
+             'query_string': query.encode(), 'http_version': '1.1', 'server': ('localhost', 80),
+             'client': ('127.0.0.1', 1234),
+             'headers': [(k.lower().encode(), v.encode()) for k, v in headers]}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    start = messages[0]
+    body = b''.join(m.get('body', b'') for m in messages[1:])
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body
+
+
+@pytest.mark.parametrize('path', [
+    '/atendimentos/?limit=2',
+    '/atendimentos/?limit=2&start=lixo',
+    '/atendimentos/1',
+    '/atendimentos/999',
+    '/pacientes/search?q=joa',
+    '/especialidades/',
+    '/especialidades/1',
+    '/usuarios/1',
+])
+def test_async_routes_match_sync_responses(asgi_app, path):
+    app = asgi_app.flask_app
+    cookie = session_cookie(app, 1)
+    status, headers, body = call(asgi_app, path, headers=[('Cookie', cookie)])
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+        sess['_fresh'] = True
+    expected = client.get(path)
+    assert status == expected.status_code
+    assert body == expected.get_data()
+    for header in ('Content-Type', 'ETag', 'X-Next-Cursor', 'Link'):
+        assert headers.get(header.lower()) == expected.headers.get(header)
+
+
+def test_async_conditional_get_and_delegation(asgi_app):
+    app = asgi_app.flask_app
+    cookie = session_cookie(app, 1)
+    status, headers, _ = call(asgi_app, '/atendimentos/', headers=[('Cookie', cookie)])
+    assert status == 200
+    status, _, body = call(asgi_app, '/atendimentos/', headers=[('Cookie', cookie), ('If-None-Match', headers['etag'])])
+    assert status == 304 and body == b''
+
+    # sem sessão vai para o Flask-Login do app síncrono; usuário inexistente também é 401
+    assert call(asgi_app, '/atendimentos/')[0] == 401
+    assert call(asgi_app, '/atendimentos/', headers=[('Cookie', session_cookie(app, 42))])[0] == 401
+    # rotas fora de ASYNC_ROUTES seguem no WSGI
+    status, headers, _ = call(asgi_app, '/usuarios/login')
+    assert status == 200 and headers['content-type'].startswith('text/html')
+
+
+def test_async_routes_run_before_request_hooks(asgi_app):
+    app = asgi_app.flask_app
+    cookie = session_cookie(app, 1)
+    # o usuário vem da AsyncSession antes dos hooks: nada no engine síncrono;
+    # Server-Timing do after_request conta versões e página
+    sync_statements = []
+    listener = lambda conn, cur, stmt, params, ctx, many: sync_statements.append(stmt)
+    with app.app_context():
+        sa_event.listen(db.engine, 'before_cursor_execute', listener)
+        status, headers, _ = call(asgi_app, '/atendimentos/?limit=2', headers=[('Cookie', cookie)])
+        sa_event.remove(db.engine, 'before_cursor_execute', listener)
+    assert status == 200
+    assert sync_statements == []
+    assert 'desc="2 queries"' in headers['server-timing']
+
+    # um before_request que responde encerra a requisição antes da rota
+    @app.before_request
+    def _manutencao():
+        return {'error': 'manutenção'}, 503
+
+    status, _, body = call(asgi_app, '/atendimentos/1', headers=[('Cookie', cookie)])
+    assert status == 503 and b'manuten' in body
+
+
+def test_async_routes_read_from_replica(tmp_path):
+    import shutil
+    import time
+
+    from src.main.repository.replica import SESSION_KEY
+
+    class TestConfig:
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primario.db'}"
+        SQLALCHEMY_BINDS = {'replica': f"sqlite:///{tmp_path / 'replica.db'}"}
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SECRET_KEY = 'test-secret'
+
+    asgi_app = create_asgi_app(TestConfig)
+    app = asgi_app.flask_app
+    with app.app_context():
+        db.create_all()
+        db.session.add(Usuarios(usuario='admin', senha='hash', cargo='admin'))
+        db.session.commit()
+        shutil.copyfile(tmp_path / 'primario.db', tmp_path / 'replica.db')
+        db.session.add(Pacientes(nome='Bruno Atrasado'))
+        db.session.commit()
+        db.session.remove()
+
+    serializer = app.session_interface.get_signing_serializer(app)
+    status, _, body = call(asgi_app, '/pacientes/search?q=bruno', headers=[('Cookie', session_cookie(app, 1))])
+    assert (status, body) == (200, b'[]\n')
+    # logo depois de uma escrita do usuário, do primário
+    sticky = serializer.dumps({'_user_id': '1', '_fresh': True, SESSION_KEY: time.time() + 5})
+    status, _, body = call(asgi_app, '/pacientes/search?q=bruno', headers=[('Cookie', f'session={sticky}')])
+    assert status == 200 and b'Bruno Atrasado' in body
+
+    asyncio.run(asgi_app.engine.dispose())
+    asyncio.run(asgi_app.replica_engine.dispose())
@@ -146,3 +146,354 @@ def test_list_filters(client):
     assert r3.status_code == 200
     # should match a2 and a3
     assert len(r3.get_json()) == 2
+
+
+def test_list_keyset_pagination(client):
+    from datetime import datetime
+    u = make_user('pager', 'user')
+    # dois registros com o mesmo criado_em para exercitar o desempate por id
+    stamps = ['2025-10-01 09:00', '2025-10-02 09:00', '2025-10-02 09:00', '2025-10-03 09:00', '2025-10-04 09:00']
+    for i, s in enumerate(stamps):
+        db.session.add(Atendimentos(paciente_nome=f'P{i}', criado_por='pager', criado_por_id=u.id,
+                                    criado_em=datetime.strptime(s, '%Y-%m-%d %H:%M')))
+    db.session.commit()
+
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+
+    seen = []
+    r = client.get('/atendimentos/?limit=2')
+    while True:
+        assert r.status_code == 200
+        seen.extend(a['paciente_nome'] for a in r.get_json())
+        cursor = r.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        assert 'rel="next"' in r.headers['Link']
+        r = client.get(f'/atendimentos/?limit=2&cursor={cursor}')
+
+    # mais recentes primeiro, sem repetições nem buracos
+    assert seen == ['P4', 'P3', 'P2', 'P1', 'P0']
+
+    assert client.get('/atendimentos/?cursor=lixo').status_code == 400
+    assert client.get('/atendimentos/?limit=0').status_code == 400
+
+
+def test_list_fields_projection(client):
+    from datetime import datetime
+    u = make_user('proj', 'user')
+    for i in range(3):
+        db.session.add(Atendimentos(paciente_nome=f'P{i}', paciente_cpf=f'{i}', criado_por='proj',
+                                    criado_por_id=u.id, criado_em=datetime(2025, 10, i + 1, 9, 30)))
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+
+    # a listagem completa continua igual ao detalhe (mesmo formato de atendimento_to_dict)
+    full = client.get('/atendimentos/').get_json()
+    assert full[0] == client.get(f"/atendimentos/{full[0]['id']}").get_json()
+    assert full[0]['criado_em'] == '03-10-2025 09:30:00'
+
+    r = client.get('/atendimentos/?fields=paciente_nome,paciente_id&limit=2')
+    assert r.status_code == 200
+    assert r.get_json() == [{'paciente_nome': 'P2', 'paciente_id': None},
+                            {'paciente_nome': 'P1', 'paciente_id': None}]
+    # a chave da paginação é buscada mesmo fora de fields
+    cursor = r.headers['X-Next-Cursor']
+    assert 'fields=' in r.headers['Link']
+    r = client.get(f'/atendimentos/?fields=paciente_nome,paciente_id&limit=2&cursor={cursor}')
+    assert r.get_json() == [{'paciente_nome': 'P0', 'paciente_id': None}]
+
+    assert client.get('/atendimentos/?fields=id,senha').status_code == 400
+    assert client.get('/atendimentos/?fields=,').status_code == 400
+
+
+def test_cpf_filter_ignores_punctuation(client):
+    from src.main.models.pacientes_model import Pacientes
+    u = make_user('cpf', 'user')
+    p = Pacientes(nome='Ana', cpf='123.456.789-09')
+    db.session.add(p)
+    db.session.commit()
+    db.session.add_all([
+        Atendimentos.from_dict({'paciente_id': p.id, 'criado_por_id': u.id}),
+        Atendimentos(paciente_nome='Ana', paciente_cpf='12345678909', criado_por='cpf', criado_por_id=u.id),
+        Atendimentos(paciente_nome='Outro', paciente_cpf='98765432100', criado_por='cpf', criado_por_id=u.id),
+    ])
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+
+    def count(cpf):
+        r = client.get(f'/atendimentos/?paciente_cpf={cpf}')
+        assert r.status_code == 200
+        return len(r.get_json())
+
+    assert count('123.456.789-09') == 2
+    assert count('12345678909') == 2
+    assert count('123.456') == 2  # prefixo
+    assert count('9') == 1
+    assert count('abc') == 0
+
+    # a cópia normalizada acompanha a mudança de CPF do paciente
+    p.cpf = '555.666.777-88'
+    db.session.commit()
+    assert count('55566677788') == 1
+    assert count('12345678909') == 1
+
+
+def test_date_range_filter_uses_criado_em_index(client):
+    from sqlalchemy import text
+    u = make_user('u4', 'user')
+    for s in ['2025-10-01 09:00', '2025-10-31 23:59', '2025-11-01 00:00']:
+        db.session.add(Atendimentos.from_dict({'paciente_nome': s, 'criado_por_id': u.id, 'data_hora': s}))
+    db.session.commit()
+
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+
+    # end só com data inclui o dia inteiro
+    r = client.get('/atendimentos/?start=2025-10-02&end=2025-10-31')
+    assert [a['paciente_nome'] for a in r.get_json()] == ['2025-10-31 23:59']
+    r2 = client.get('/atendimentos/?start=01-10-2025 09:00&end=2025-11-01 00:00')
+    assert len(r2.get_json()) == 3
+    assert client.get('/atendimentos/?start=ontem').status_code == 400
+
+    plan = db.session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM atendimentos WHERE especialidade_id = 1 "
+        "AND criado_em >= '2025-10-01' ORDER BY criado_em DESC")).all()
+    assert 'ix_atendimentos_especialidade_id_criado_em' in str(plan)
+
+
+def test_bulk_create_batches_lookups(client, app):
+    from sqlalchemy import event
+    from src.main.models.pacientes_model import Pacientes
+    from src.main.models.especialidades_model import Especialidades
+    app.config['WTF_CSRF_ENABLED'] = False
+    u = make_user('triagem', 'user')
+    pacientes = [Pacientes(nome=f'Pac {i}', cpf=f'{i:03d}') for i in range(3)]
+    esp = Especialidades(nome_especialidade='Clínica Geral')
+    db.session.add_all(pacientes + [esp])
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+
+    payload = [{'paciente_id': p.id, 'especialidade_id': esp.id} for p in pacientes]
+    payload.append({'paciente_nome': 'Avulso', 'data_hora': '2025-10-01 08:00'})
+
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cur, stmt, params, ctx, many: statements.append(stmt))
+    r = client.post('/atendimentos/bulk', json=payload)
+    assert r.status_code == 201
+    assert r.get_json() == {'created': 4}
+    # uma consulta IN por tabela e um único INSERT
+    assert sum('FROM pacientes' in s for s in statements) == 1
+    assert sum('FROM especialidades' in s for s in statements) == 1
+    assert sum(s.startswith('INSERT INTO atendimentos ') for s in statements) == 1
+
+    rows = Atendimentos.query.filter_by(criado_por='triagem').order_by(Atendimentos.id).all()
+    assert [a.paciente_nome for a in rows] == ['Pac 0', 'Pac 1', 'Pac 2', 'Avulso']
+    assert rows[0].especialidade == 'Clínica Geral' and rows[0].paciente_cpf == '000'
+    # o resumo de relatórios também recebe o lote
+    from src.main.models.atendimentos_resumo_model import AtendimentosResumo
+    assert sum(r.total for r in AtendimentosResumo.query.all()) == 4
+
+    # erros por linha, nada é gravado
+    r2 = client.post('/atendimentos/bulk', json=[{'paciente_nome': 'Ok'}, {'paciente_id': 999}, {}])
+    assert r2.status_code == 400
+    assert [e['index'] for e in r2.get_json()['errors']] == [1, 2]
+    assert Atendimentos.query.count() == 4
+
+
+def test_export_streams_ndjson_and_csv(client):
+    import csv
+    import io
+    import json
+    u = make_user('secretaria', 'user')
+    for s, esp in [('2025-09-30 10:00', 'Cardio'), ('2025-10-01 10:00', 'Cardio'), ('2025-10-02 10:00', 'Dermato')]:
+        db.session.add(Atendimentos.from_dict({'paciente_nome': s, 'especialidade': esp,
+                                               'criado_por_id': u.id, 'data_hora': s}))
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+
+    r = client.get('/atendimentos/export?start=2025-10-01')
+    assert r.status_code == 200
+    assert r.is_streamed
+    assert r.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert [d['paciente_nome'] for d in lines] == ['2025-10-01 10:00', '2025-10-02 10:00']
+    assert lines[0]['criado_em'] == '01-10-2025 10:00:00'
+    assert lines[0]['criado_por_id'] == u.id
+
+    r2 = client.get('/atendimentos/export?format=csv&especialidade=Cardio')
+    rows = list(csv.DictReader(io.StringIO(r2.get_data(as_text=True))))
+    assert [row['paciente_nome'] for row in rows] == ['2025-09-30 10:00', '2025-10-01 10:00']
+
+    assert client.get('/atendimentos/export?format=xml').status_code == 400
+
+
+def test_conditional_get_returns_304_without_fetching_rows(client, app):
+    from sqlalchemy import event
+    app.config['WTF_CSRF_ENABLED'] = False
+    u = make_user('poller', 'admin')
+    db.session.add(Atendimentos(paciente_nome='Primeiro', criado_por='poller', criado_por_id=u.id))
+    db.session.commit()
+    att_id = Atendimentos.query.first().id
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+
+    r = client.get('/atendimentos/')
+    assert r.status_code == 200
+    etag = r.headers['ETag']
+    assert etag.startswith('W/')
+    assert 'no-cache' in r.headers['Cache-Control']
+
+    statements = []
+    listener = lambda conn, cur, stmt, params, ctx, many: statements.append(stmt)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    r2 = client.get('/atendimentos/', headers={'If-None-Match': etag})
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    assert r2.status_code == 304
+    assert r2.get_data() == b''
+    assert not any('FROM atendimentos' in s for s in statements)
+
+    detail = client.get(f'/atendimentos/{att_id}')
+    assert client.get(f'/atendimentos/{att_id}', headers={'If-None-Match': detail.headers['ETag']}).status_code == 304
+
+    # qualquer escrita na tabela muda a versão (ORM e insert em lote)
+    client.put(f'/atendimentos/{att_id}', json={'paciente_nome': 'Alterado'})
+    r3 = client.get('/atendimentos/', headers={'If-None-Match': etag})
+    assert r3.status_code == 200
+    assert r3.get_json()[0]['paciente_nome'] == 'Alterado'
+
+    client.post('/atendimentos/bulk', json=[{'paciente_nome': 'Lote'}])
+    r4 = client.get('/atendimentos/', headers={'If-None-Match': r3.headers['ETag']})
+    assert r4.status_code == 200 and len(r4.get_json()) == 2
+
+
+def test_source_changes_propagate_to_copies(client, app):
+    from sqlalchemy import event
+    from src.main.models.pacientes_model import Pacientes
+    from src.main.models.especialidades_model import Especialidades
+    u = make_user('recepcao', 'admin')
+    p = Pacientes(nome='Maria Silva', cpf='111.222.333-44')
+    esp = Especialidades(nome_especialidade='Cardio')
+    db.session.add_all([p, esp])
+    db.session.commit()
+    for _ in range(3):
+        db.session.add(Atendimentos.from_dict({'paciente_id': p.id, 'especialidade_id': esp.id,
+                                               'criado_por_id': u.id}))
+    db.session.commit()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+    etag = client.get('/atendimentos/').headers['ETag']
+
+    statements = []
+    listener = lambda conn, cur, stmt, params, ctx, many: statements.append(stmt)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    client.post(f'/pacientes/{p.id}/update', data={'nome': 'Maria Souza', 'cpf': '111.222.333-45'})
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    # um único UPDATE set-based para todos os atendimentos do paciente
+    assert sum(s.startswith('UPDATE atendimentos ') for s in statements) == 1
+
+    client.put(f'/especialidades/{esp.id}', json={'nome_especialidade': 'Cardiologia'})
+    u.usuario = 'recepcao2'
+    db.session.commit()
+
+    rows = Atendimentos.query.all()
+    assert {(a.paciente_nome, a.paciente_cpf, a.especialidade, a.criado_por) for a in rows} == {
+        ('Maria Souza', '111.222.333-45', 'Cardiologia', 'recepcao2')}
+    # a listagem condicional enxerga a mudança
+    assert client.get('/atendimentos/', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_repair_copies_command_fixes_drift(app):
+    from sqlalchemy import update
+    from src.main.models.pacientes_model import Pacientes
+    u = make_user('sys', 'admin')
+    p = Pacientes(nome='Carlos Lima', cpf='999')
+    db.session.add(p)
+    db.session.commit()
+    for _ in range(5):
+        db.session.add(Atendimentos.from_dict({'paciente_id': p.id, 'criado_por_id': u.id}))
+    db.session.add(Atendimentos(paciente_nome='Avulso', criado_por='sys', criado_por_id=u.id))
+    db.session.commit()
+    # divergência antiga, de antes da propagação
+    db.session.execute(update(Atendimentos.__table__).where(Atendimentos.id <= 3)
+                       .values(paciente_nome='Carlos', paciente_cpf=None, criado_por='antigo'))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['atendimentos', 'repair-copies', '--chunk-size', '2'])
+    assert result.exit_code == 0, result.output
+    assert 'paciente_id: 3' in result.output and 'criado_por_id: 3' in result.output
+    db.session.expire_all()
+    vinculados = Atendimentos.query.filter(Atendimentos.paciente_id.is_not(None)).all()
+    assert {(a.paciente_nome, a.paciente_cpf) for a in vinculados} == {('Carlos Lima', '999')}
+    assert Atendimentos.query.filter_by(paciente_nome='Avulso').count() == 1
+
+
+def test_versions_bumped_once_at_commit_and_only_for_versioned_tables(app):
+    from src.main.models.tabela_versoes_model import TabelaVersoes
+    from src.main.models.especialidades_model import Especialidades
+    from src.main.services.versoes import table_versions
+
+    def versoes():
+        return {v.nome: v.versao for v in db.session.query(TabelaVersoes).all()}
+
+    u = make_user('lote', 'user')
+    assert versoes() == {'usuarios': 1}
+    db.session.add(Especialidades(nome_especialidade='Sem versão'))
+    db.session.commit()
+    assert versoes() == {'usuarios': 1}
+
+    db.session.add(Atendimentos(paciente_nome='A', criado_por='lote', criado_por_id=u.id))
+    db.session.flush()
+    db.session.add(Atendimentos(paciente_nome='B', criado_por='lote', criado_por_id=u.id))
+    db.session.flush()
+    assert versoes() == {'usuarios': 1}  # nada bloqueado em tabela_versoes antes do commit
+    db.session.commit()
+    assert versoes() == {'usuarios': 1, 'atendimentos': 1}
+
+    # rollback descarta; escritas ainda não enviadas entram no commit
+    db.session.add(Atendimentos(paciente_nome='C', criado_por='lote', criado_por_id=u.id))
+    db.session.flush()
+    db.session.rollback()
+    Atendimentos.query.filter_by(paciente_nome='A').one().paciente_nome = 'A2'
+    db.session.commit()
+    assert table_versions(['atendimentos'])['atendimentos'][0] == 2
+
+
+def test_propagation_bumps_atendimentos_version_at_commit(app):
+    from src.main.models.pacientes_model import Pacientes
+    from src.main.services.versoes import table_versions
+    u = make_user('prop', 'user')
+    p = Pacientes(nome='Lia Rocha')
+    db.session.add(p)
+    db.session.commit()
+    db.session.add(Atendimentos.from_dict({'paciente_id': p.id, 'criado_por_id': u.id}))
+    db.session.commit()
+    before = table_versions(['atendimentos'])['atendimentos'][0]
+
+    # a cópia muda no flush, a versão só no commit; rollback descarta
+    p.nome = 'Lia R.'
+    db.session.flush()
+    assert Atendimentos.query.one().paciente_nome == 'Lia R.'
+    assert table_versions(['atendimentos'])['atendimentos'][0] == before
+    db.session.rollback()
+    db.session.commit()
+    assert table_versions(['atendimentos'])['atendimentos'][0] == before
+
+    p.nome = 'Lia Rocha Lima'
+    db.session.commit()
+    assert table_versions(['atendimentos'])['atendimentos'][0] == before + 1
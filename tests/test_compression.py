@@ -0,0 +1,87 @@
+import gzip
+import json
+
+import pytest
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.usuarios_model import Usuarios
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.especialidades_model import Especialidades
+
+
+class TestConfig:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'test-secret'
+    COMPRESS_MIN_SIZE = 1000
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    u = Usuarios(usuario='recepcao', senha='hash', cargo='admin')
+    db.session.add(u)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+    return client
+
+
+def add_atendimentos(n):
+    for i in range(n):
+        db.session.add(Atendimentos(paciente_nome=f'Paciente {i}', criado_por='recepcao', criado_por_id=1))
+    db.session.commit()
+
+
+def test_gzip_negotiated_above_threshold(client):
+    add_atendimentos(20)
+    plain = client.get('/atendimentos/')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    r = client.get('/atendimentos/', headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert int(r.headers['Content-Length']) < len(plain.get_data())
+    assert json.loads(gzip.decompress(r.get_data())) == plain.get_json()
+
+    # abaixo do limite e tipos fora da lista seguem sem compressão
+    small = client.get('/atendimentos/?limit=1', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    refused = client.get('/atendimentos/', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in refused.headers
+
+
+def test_streaming_export_is_compressed_incrementally(client):
+    add_atendimentos(5)
+    r = client.get('/atendimentos/export', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert r.is_streamed
+    assert r.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in r.headers
+    lines = gzip.decompress(r.get_data()).decode().splitlines()
+    assert len(lines) == 5
+
+
+def test_strong_etag_becomes_weak_and_304_still_works(client):
+    db.session.add_all([Especialidades(nome_especialidade=f'Especialidade {i:02d}') for i in range(20)])
+    db.session.commit()
+    r = client.get('/especialidades/', headers={'Accept-Encoding': 'gzip'})
+    assert r.headers['Content-Encoding'] == 'gzip'
+    etag = r.headers['ETag']
+    assert etag.startswith('W/')
+
+    r2 = client.get('/especialidades/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert r2.status_code == 304
+    assert 'Content-Encoding' not in r2.headers
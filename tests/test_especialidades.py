@@ -119,3 +119,71 @@ def test_update_and_delete_admin_only(client):
     # ensure deleted
     r4 = client.get(f'/especialidades/{e.id}')
     assert r4.status_code in (404,)
+
+
+def test_list_is_cached_with_etag_and_invalidated_on_write(client, app):
+    from sqlalchemy import event
+    app.config['WTF_CSRF_ENABLED'] = False
+    admin = make_user('admin3', 'admin')
+    e = Especialidades(nome_especialidade='Neuro')
+    db.session.add(e)
+    db.session.commit()
+    esp_id = e.id
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+        sess['_fresh'] = True
+
+    r1 = client.get('/especialidades/')
+    assert r1.get_json() == [{'id': esp_id, 'nome_especialidade': 'Neuro'}]
+    etag = r1.headers['ETag']
+
+    queries = []
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda conn, cur, stmt, params, ctx, many: queries.append(stmt))
+    r2 = client.get('/especialidades/', headers={'If-None-Match': etag})
+    assert r2.status_code == 304
+    assert not any('FROM especialidades' in q for q in queries)
+
+    # escrita invalida: nova lista e novo ETag
+    client.put(f'/especialidades/{esp_id}', json={'nome_especialidade': 'Neurologia'})
+    r3 = client.get('/especialidades/', headers={'If-None-Match': etag})
+    assert r3.status_code == 200
+    assert r3.get_json()[0]['nome_especialidade'] == 'Neurologia'
+    assert r3.headers['ETag'] != etag
+
+    # detalhe: ETag pelo conteúdo
+    d1 = client.get(f'/especialidades/{esp_id}')
+    assert client.get(f'/especialidades/{esp_id}', headers={'If-None-Match': d1.headers['ETag']}).status_code == 304
+    client.put(f'/especialidades/{esp_id}', json={'nome_especialidade': 'Neuro 2'})
+    assert client.get(f'/especialidades/{esp_id}', headers={'If-None-Match': d1.headers['ETag']}).status_code == 200
+
+
+def test_atendimento_writes_ignore_stale_cache(app):
+    from src.main.models.atendimentos_model import Atendimentos
+    from src.main.services import especialidades_cache
+    admin = make_user('admin4', 'admin')
+    e = Especialidades(nome_especialidade='Orto')
+    db.session.add(e)
+    db.session.commit()
+    esp_id, admin_id = e.id, admin.id
+    assert especialidades_cache.snapshot().by_id[esp_id]['nome_especialidade'] == 'Orto'
+
+    # renomeada por outro processo: o snapshot deste continua com o nome antigo
+    db.session.execute(Especialidades.__table__.update().values(nome_especialidade='Ortopedia'))
+    db.session.commit()
+    db.session.expire_all()
+    att = Atendimentos.from_dict({'paciente_nome': 'Ana', 'especialidade_id': esp_id, 'criado_por_id': admin_id})
+    assert att.especialidade == 'Ortopedia'
+    rows, errors = Atendimentos.bulk_rows_from_dicts(
+        [{'paciente_nome': 'Ana', 'especialidade_id': esp_id}], admin_id, 'admin4')
+    assert not errors and rows[0]['especialidade'] == 'Ortopedia'
+
+    # removida por outro processo: o id deixa de ser aceito
+    db.session.execute(Especialidades.__table__.delete())
+    db.session.commit()
+    db.session.expire_all()
+    with pytest.raises(ValueError):
+        Atendimentos.from_dict({'paciente_nome': 'Ana', 'especialidade_id': esp_id, 'criado_por_id': admin_id})
+    rows, errors = Atendimentos.bulk_rows_from_dicts(
+        [{'paciente_nome': 'Ana', 'especialidade_id': esp_id}], admin_id, 'admin4')
+    assert not rows and len(errors) == 1
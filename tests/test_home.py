@@ -0,0 +1,78 @@
+import pytest
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.usuarios_model import Usuarios
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.pacientes_model import Pacientes
+
+
+class TestConfig:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'test-secret'
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login_as(client, username):
+    u = Usuarios(usuario=username, senha='hash', cargo='user')
+    db.session.add(u)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+    return u
+
+
+def test_home_renders_first_page_and_fragments(client):
+    from src.main.routes.home import HOME_PAGE_SIZE
+    u = login_as(client, 'recepcao')
+    total = HOME_PAGE_SIZE + 5
+    db.session.add_all([Atendimentos(paciente_nome=f'Paciente {i:03d}', criado_por='recepcao', criado_por_id=u.id)
+                        for i in range(total)])
+    db.session.commit()
+
+    r = client.get('/')
+    assert r.status_code == 200
+    html = r.get_data(as_text=True)
+    assert html.count('<td>Paciente ') == HOME_PAGE_SIZE
+    assert 'load-more-btn' in html
+    assert 'id="pacienteSearch"' in html
+
+    cursor = html.split('data-cursor="')[1].split('"')[0]
+    r2 = client.get(f'/fragments/atendimentos?cursor={cursor}')
+    assert r2.status_code == 200
+    assert r2.get_data(as_text=True).count('<tr>') == 5
+    assert 'X-Next-Cursor' not in r2.headers
+
+
+def test_home_pacientes_view_is_paginated(client):
+    from src.main.routes.home import HOME_PAGE_SIZE
+    login_as(client, 'recepcao2')
+    db.session.add_all([Pacientes(nome=f'Nome {i:03d}') for i in range(HOME_PAGE_SIZE + 1)])
+    db.session.commit()
+
+    r = client.get('/?view=pacientes')
+    assert r.status_code == 200
+    html = r.get_data(as_text=True)
+    assert html.count('edit-btn') == HOME_PAGE_SIZE
+    assert 'Nome 000' in html
+
+    cursor = html.split('data-cursor="')[1].split('"')[0]
+    r2 = client.get(f'/fragments/pacientes?cursor={cursor}')
+    assert 'Nome %03d' % HOME_PAGE_SIZE in r2.get_data(as_text=True)
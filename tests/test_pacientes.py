@@ -124,3 +124,250 @@ def test_get_paciente_requires_auth(client):
         sess['_fresh'] = True
     r2 = client.get(f'/pacientes/{p.id}')
     assert r2.status_code == 200
+
+
+def test_search_uses_text_index_and_stays_in_sync(client):
+    user = make_user('recepcao', 'user')
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+
+    joao = Pacientes.from_dict({'nome': 'João da Silva', 'cpf': '123.456.789-00'})
+    maria = Pacientes.from_dict({'nome': 'Maria Silva Souza', 'cpf': '987.654.321-00'})
+    db.session.add_all([joao, maria])
+    db.session.commit()
+
+    # sem acento, por prefixo e por pedaço do CPF
+    r = client.get('/pacientes/search?q=joa sil')
+    assert [p['nome'] for p in r.get_json()] == ['João da Silva']
+    r = client.get('/pacientes/search?q=987.654')
+    assert [p['nome'] for p in r.get_json()] == ['Maria Silva Souza']
+    assert len(client.get('/pacientes/search?q=silva').get_json()) == 2
+    assert client.get('/pacientes/search?q=!!').get_json() == []
+
+    # update e delete atualizam o índice
+    maria.nome = 'Maria Oliveira'
+    db.session.commit()
+    assert client.get('/pacientes/search?q=souza').get_json() == []
+    assert len(client.get('/pacientes/search?q=olive').get_json()) == 1
+    db.session.delete(joao)
+    db.session.commit()
+    assert client.get('/pacientes/search?q=joao').get_json() == []
+
+
+def test_cpf_and_cartao_sus_lookup_by_digits(client):
+    from sqlalchemy import event
+    from sqlalchemy.exc import IntegrityError
+    user = make_user('recepcao', 'user')
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user.id)
+        sess['_fresh'] = True
+
+    ana = Pacientes.from_dict({'nome': 'Ana', 'cpf': '123.456.789-09', 'cartao_sus': '700 0012 3456 7890'})
+    bia = Pacientes.from_dict({'nome': 'Bia', 'cpf': '12345000011'})
+    db.session.add_all([ana, bia])
+    db.session.commit()
+    assert (ana.cpf_digits, ana.cartao_sus_digits) == ('12345678909', '700001234567890')
+
+    def nomes(q):
+        return [p['nome'] for p in client.get(f'/pacientes/search?q={q}').get_json()]
+
+    statements = []
+    listener = lambda conn, cur, stmt, params, ctx, many: statements.append(stmt)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    # com ou sem pontuação, completo ou prefixo
+    assert nomes('12345678909') == ['Ana']
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    assert not any('pacientes_fts' in s or 'LIKE' in s for s in statements)
+    assert nomes('123.456.789-09') == ['Ana']
+    assert nomes('12345') == ['Ana', 'Bia']
+    assert nomes('700 0012') == ['Ana']
+    assert nomes('999') == []
+
+    # update_from_dict mantém a coluna normalizada
+    ana.update_from_dict({'cpf': '111.222.333-44'})
+    db.session.commit()
+    assert nomes('123456789') == []
+    assert nomes('111.222') == ['Ana']
+
+    # o mesmo CPF com outra pontuação é duplicado
+    db.session.add(Pacientes.from_dict({'nome': 'Outra', 'cpf': '11122233344'}))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_import_csv_dedupes_and_reports(app):
+    import io
+    from src.main.services.paciente_import import import_pacientes_csv
+    db.session.add(Pacientes.from_dict({'nome': 'Existente', 'cpf': '111', 'cartao_sus': 'S1'}))
+    db.session.commit()
+
+    csv_data = io.StringIO(
+        "nome,data_nascimento,cpf,cartao_sus,endereco\n"
+        "Ana,15-08-1990,222,S2,Rua A\n"
+        "Bruno,1985-01-31,333,,\n"
+        "Repetido no banco,,111,S9,\n"
+        "Repetido no arquivo,,222,S3,\n"
+        ",,444,,\n"
+        "Data ruim,31/02/2000,555,,\n"
+        "Carla,,,S4,\n"
+    )
+    progress = []
+    report = import_pacientes_csv(csv_data, chunk_size=2, progress=lambda r: progress.append(r.inserted))
+
+    assert report.processed == 7
+    assert report.inserted == 3
+    assert sorted(e['line'] for e in report.errors) == [4, 5, 6, 7]
+    assert progress[-1] == 3
+    assert Pacientes.query.count() == 4
+    ana = Pacientes.query.filter_by(cpf='222').one()
+    assert ana.to_dict()['data_nascimento'] == '15-08-1990'
+
+    # linhas importadas em lote também entram no índice de busca
+    from src.main.services.paciente_search import find_pacientes
+    assert [p.nome for p in find_pacientes('bru')] == ['Bruno']
+
+
+def test_import_cli_command(app, tmp_path):
+    path = tmp_path / 'pacientes.csv'
+    path.write_text("nome;cpf\nDiego;999\nElisa;999\n", encoding='utf-8')
+    result = app.test_cli_runner().invoke(args=['pacientes', 'import', str(path), '--delimiter', ';'])
+    assert result.exit_code == 0, result.output
+    assert '1 inseridos, 1 rejeitados' in result.output
+
+
+def test_autocomplete_index_answers_from_memory(monkeypatch):
+    from sqlalchemy import event, insert
+    from src.main.services import autocomplete
+    from src.main.services.versoes import bump_versions
+
+    class AutocompleteConfig(TestConfig):
+        PACIENTES_AUTOCOMPLETE_INDEX = True
+        PACIENTES_AUTOCOMPLETE_REFRESH = 3600
+
+    app = create_app(AutocompleteConfig)  # sem tabelas ainda: monta na primeira busca
+    with app.app_context():
+        db.create_all()
+        admin = make_user('admin', 'admin')
+        db.session.add_all([
+            Pacientes.from_dict({'nome': 'João da Silva', 'cpf': '123.456.789-09'}),
+            Pacientes.from_dict({'nome': 'Maria Silva Souza', 'cpf': '98765432100', 'cartao_sus': '700001234567890'}),
+            Pacientes.from_dict({'nome': 'Mário Souza'}),
+        ])
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(admin.id)
+            sess['_fresh'] = True
+
+        def nomes(q):
+            return [p['nome'] for p in client.get(f'/pacientes/search?q={q}').get_json()]
+
+        # a primeira busca dispara a montagem (aqui síncrona, fora da thread) e
+        # é respondida pelo banco
+        updates = []
+
+        def update_now(app, full):
+            updates.append('completa' if full else 'incremental')
+            autocomplete._run_update(app, full)
+        monkeypatch.setattr(autocomplete, '_update_in_background', update_now)
+        assert sorted(nomes('silva')) == ['João da Silva', 'Maria Silva Souza']
+        assert updates == ['completa']
+        updates.clear()
+
+        assert nomes('silva') == ['João da Silva', 'Maria Silva Souza']
+        statements = []
+        listener = lambda conn, cur, stmt, params, ctx, many: statements.append(stmt)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        assert nomes('JOA sil') == ['João da Silva']
+        assert nomes('mar sou') == ['Maria Silva Souza', 'Mário Souza']
+        assert nomes('123.456') == ['João da Silva']
+        assert nomes('7000012') == ['Maria Silva Souza']
+        assert nomes('xyz') == []
+        event.remove(db.engine, 'before_cursor_execute', listener)
+        assert not any('pacientes' in s for s in statements)
+        # mesmo JSON da busca no banco
+        maria = Pacientes.query.filter_by(cpf='98765432100').one()
+        assert client.get('/pacientes/search?q=maria').get_json() == [maria.to_dict()]
+
+        # escritas do processo entram no commit; rollback não
+        maria.nome = 'Maria Oliveira'
+        db.session.commit()
+        assert nomes('souza') == ['Mário Souza']
+        assert nomes('olive') == ['Maria Oliveira']
+        db.session.add(Pacientes(nome='Temporário'))
+        db.session.flush()
+        db.session.rollback()
+        assert nomes('tempor') == []
+        db.session.delete(Pacientes.query.filter_by(nome='Mário Souza').one())
+        db.session.commit()
+        assert nomes('mario') == []
+
+        # as versões das escritas locais foram contadas: nada a atualizar
+        app.config['PACIENTES_AUTOCOMPLETE_REFRESH'] = 0
+        index = autocomplete.active_index()
+        assert autocomplete.active_index() is index
+        assert updates == []
+
+        # escrita de outro processo: a versão mudou e só as linhas novas são relidas
+        db.session.execute(insert(Pacientes.__table__), [{'nome': 'Importado Silva'}])
+        bump_versions(db.session.connection(), ['pacientes'])
+        db.session.commit()
+        nomes('x')  # confere a versão e relê
+        assert nomes('importado') == ['Importado Silva']
+        assert updates == ['incremental'] and autocomplete.active_index() is index
+
+        # remoção por outro processo: remontagem completa, no máximo uma por intervalo
+        app.config['PACIENTES_AUTOCOMPLETE_REBUILD_INTERVAL'] = 3600
+        db.session.execute(Pacientes.__table__.delete().where(Pacientes.nome == 'Importado Silva'))
+        bump_versions(db.session.connection(), ['pacientes', autocomplete.REMOVALS])
+        db.session.commit()
+        nomes('x')
+        assert updates[-1] == 'incremental' and nomes('importado') == ['Importado Silva']
+        app.config['PACIENTES_AUTOCOMPLETE_REBUILD_INTERVAL'] = 0
+        nomes('x')
+        assert updates[-1] == 'completa' and nomes('importado') == []
+
+        report = client.get('/admin/autocomplete').get_json()
+        assert report['built'] and report['pacientes'] == 2
+        assert report['bytes']['total'] > 0 and report['bytes_por_paciente'] > 0
+        db.session.remove()
+        db.drop_all()
+
+
+def test_autocomplete_falls_back_to_database_when_build_fails(monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    from src.main.services import autocomplete
+
+    class AutocompleteConfig(TestConfig):
+        PACIENTES_AUTOCOMPLETE_INDEX = True
+
+    app = create_app(AutocompleteConfig)
+    with app.app_context():
+        db.create_all()
+        admin = make_user('admin', 'admin')
+        db.session.add(Pacientes(nome='Ana Lima'))
+        db.session.commit()
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['_user_id'] = str(admin.id)
+
+        def broken():
+            raise OperationalError('SELECT', {}, Exception('banco fora do ar'))
+        attempts = []
+
+        def update_now(app, full):
+            attempts.append(full)
+            autocomplete._run_update(app, full)
+        monkeypatch.setattr(autocomplete, 'build_index', broken)
+        monkeypatch.setattr(autocomplete, '_update_in_background', update_now)
+        r = client.get('/pacientes/search?q=ana')
+        assert r.status_code == 200
+        assert [p['nome'] for p in r.get_json()] == ['Ana Lima']
+        assert attempts == [True] and autocomplete.memory_report()['error']
+        # sem nova tentativa até passar PACIENTES_AUTOCOMPLETE_REFRESH
+        assert autocomplete.active_index() is None
+        assert attempts == [True]
+        db.session.remove()
+        db.drop_all()
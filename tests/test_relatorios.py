@@ -0,0 +1,124 @@
+from datetime import date
+
+import pytest
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.usuarios_model import Usuarios
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.atendimentos_resumo_model import AtendimentosResumo
+from src.main.models.especialidades_model import Especialidades
+
+
+class TestConfig:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'test-secret'
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(username, cargo='user'):
+    u = Usuarios(usuario=username, senha='hash', cargo=cargo)
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+def resumo():
+    return {(r.dia.isoformat(), r.especialidade_id, r.criado_por_id): r.total
+            for r in AtendimentosResumo.query.all() if r.total}
+
+
+def make_atendimento(user, data_hora, especialidade_id=None):
+    return Atendimentos.from_dict({'paciente_nome': 'P', 'criado_por_id': user.id,
+                                   'especialidade_id': especialidade_id, 'data_hora': data_hora})
+
+
+def test_resumo_follows_inserts_updates_and_deletes(app):
+    u = make_user('recepcao')
+    esp = Especialidades(nome_especialidade='Cardio')
+    db.session.add(esp)
+    db.session.commit()
+
+    a1 = make_atendimento(u, '2025-10-01 08:00', esp.id)
+    a2 = make_atendimento(u, '2025-10-01 09:00', esp.id)
+    a3 = make_atendimento(u, '2025-10-02 09:00')
+    db.session.add_all([a1, a2, a3])
+    db.session.commit()
+    assert resumo() == {('2025-10-01', esp.id, u.id): 2, ('2025-10-02', 0, u.id): 1}
+
+    a2.update_from_dict({'data_hora': '2025-10-02 10:00'})
+    db.session.delete(a3)
+    db.session.commit()
+    assert resumo() == {('2025-10-01', esp.id, u.id): 1, ('2025-10-02', esp.id, u.id): 1}
+
+    # o rebuild chega ao mesmo resultado
+    result = app.test_cli_runner().invoke(args=['relatorios', 'rebuild'])
+    assert result.exit_code == 0, result.output
+    assert resumo() == {('2025-10-01', esp.id, u.id): 1, ('2025-10-02', esp.id, u.id): 1}
+
+
+def test_failed_flush_does_not_leak_into_resumo(app):
+    from sqlalchemy.exc import IntegrityError
+
+    u = make_user('falha')
+    a1, a2 = make_atendimento(u, '2025-10-01 08:00'), make_atendimento(u, '2025-10-03 08:00')
+    db.session.add_all([a1, a2])
+    db.session.commit()
+
+    # a remoção é contada no before_flush, mas o flush falha (usuário repetido)
+    db.session.delete(a1)
+    db.session.add(Usuarios(usuario='falha', senha='hash', cargo='user'))
+    with pytest.raises(IntegrityError):
+        db.session.flush()
+    db.session.rollback()
+
+    db.session.add(make_atendimento(u, '2025-10-02 08:00'))
+    db.session.commit()
+    assert resumo() == {('2025-10-01', 0, u.id): 1, ('2025-10-02', 0, u.id): 1, ('2025-10-03', 0, u.id): 1}
+
+    # linhas que chegam a zero somem do resumo
+    db.session.delete(a2)
+    db.session.commit()
+    assert AtendimentosResumo.query.filter_by(dia=date(2025, 10, 3)).count() == 0
+    assert AtendimentosResumo.query.count() == 2
+
+
+def test_relatorio_reads_from_resumo(client):
+    admin = make_user('gestao', 'admin')
+    esp = Especialidades(nome_especialidade='Dermato')
+    db.session.add(esp)
+    db.session.commit()
+    db.session.add_all([make_atendimento(admin, '2025-10-01 08:00', esp.id),
+                        make_atendimento(admin, '2025-10-20 08:00', esp.id),
+                        make_atendimento(admin, '2025-11-03 08:00')])
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+        sess['_fresh'] = True
+
+    r = client.get('/relatorios/atendimentos?periodo=mes&start=2025-10-01&end=2025-11-30')
+    assert r.status_code == 200
+    assert r.get_json() == [
+        {'periodo': '2025-10', 'especialidade_id': esp.id, 'especialidade': 'Dermato', 'total': 2},
+        {'periodo': '2025-11', 'especialidade_id': None, 'especialidade': None, 'total': 1},
+    ]
+    r2 = client.get('/relatorios/atendimentos?periodo=semana&por=criado_por')
+    assert [i['total'] for i in r2.get_json()] == [1, 1, 1]
+    assert r2.get_json()[0]['criado_por'] == 'gestao'
+    assert client.get('/relatorios/atendimentos?periodo=ano').status_code == 400
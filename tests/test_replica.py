@@ -0,0 +1,128 @@
+import shutil
+import time
+
+import pytest
+from flask import session
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.repository.replica import SESSION_KEY, primary
+from src.main.models.usuarios_model import Usuarios
+from src.main.models.pacientes_model import Pacientes
+
+
+@pytest.fixture
+def app(tmp_path):
+    # dois arquivos SQLite: a réplica é uma cópia do primário feita antes
+    # das últimas escritas, ou seja, uma réplica atrasada
+    class TestConfig:
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primario.db'}"
+        SQLALCHEMY_BINDS = {'replica': f"sqlite:///{tmp_path / 'replica.db'}"}
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SECRET_KEY = 'test-secret'
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([Usuarios(usuario='rep', senha='hash', cargo='admin'),
+                            Pacientes(nome='Ana Replicada', cpf='111.222.333-44')])
+        db.session.commit()
+        shutil.copyfile(tmp_path / 'primario.db', tmp_path / 'replica.db')
+        db.session.add(Pacientes(nome='Bruno Atrasado'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+        sess['_fresh'] = True
+    return client
+
+
+def names(response):
+    assert response.status_code == 200
+    return [p['nome'] for p in response.get_json()]
+
+
+def test_read_routes_use_replica_until_own_write(app, client):
+    # leitura: da réplica, que ainda não tem o Bruno
+    assert names(client.get('/pacientes/search?q=ana')) == ['Ana Replicada']
+    assert names(client.get('/pacientes/search?q=bruno')) == []
+    # fora de requisição (CLI, testes, threads) é sempre o primário
+    assert Pacientes.query.filter_by(nome='Bruno Atrasado').count() == 1
+
+    # a escrita vai para o primário e o usuário passa a ler de lá por um tempo
+    r = client.post('/pacientes/', data={'nome': 'Carla Nova', 'data_nascimento': '01-02-1990'})
+    assert r.status_code == 302
+    with client.session_transaction() as sess:
+        assert sess[SESSION_KEY] > time.time()
+    assert names(client.get('/pacientes/search?q=carla')) == ['Carla Nova']
+    assert names(client.get('/pacientes/search?q=bruno')) == ['Bruno Atrasado']
+
+    # passada a janela, volta para a réplica
+    with client.session_transaction() as sess:
+        sess[SESSION_KEY] = time.time() - 1
+    assert names(client.get('/pacientes/search?q=carla')) == []
+
+    # outro usuário, sem escrita recente, lê da réplica; rotas de escrita e
+    # primary() ficam no primário
+    with app.test_request_context('/pacientes/search'):
+        app.preprocess_request()
+        assert db.session.get_bind(Pacientes) is db.engines['replica']
+        with primary():
+            assert db.session.get_bind(Pacientes) is db.engine
+    with app.test_request_context('/pacientes/1/update', method='POST'):
+        assert db.session.get_bind(Pacientes) is db.engine
+
+
+def test_write_inside_read_route_stays_on_primary(app):
+    with app.test_request_context('/pacientes/search'):
+        app.preprocess_request()
+        p = db.session.get(Pacientes, 1)
+        p.endereco = 'Rua Nova, 1'
+        db.session.flush()
+        # depois da escrita, a mesma transação lê do primário
+        assert db.session.get_bind(Pacientes) is db.engine
+        db.session.commit()
+        # e o commit abre a janela de leitura no primário para o usuário
+        assert session[SESSION_KEY] > time.time()
+        assert db.session.get_bind(Pacientes) is db.engine
+    with primary():
+        assert db.session.get(Pacientes, 1).endereco == 'Rua Nova, 1'
+
+
+def _replicate(app, tmp_path):
+    # nova cópia do primário; o engine da réplica reabre o arquivo
+    db.session.commit()
+    db.engines['replica'].dispose()
+    shutil.copyfile(tmp_path / 'primario.db', tmp_path / 'replica.db')
+
+
+def test_auth_lookups_ignore_stale_replica(app, client, tmp_path):
+    from src.main.models.api_tokens_model import ApiTokens
+    from src.main.services.api_tokens import issue_token, token_cache
+
+    token, raw = issue_token(db.session.get(Usuarios, 1), 'integração')
+    _replicate(app, tmp_path)
+
+    # revogado no primário (por outro processo: o cache deste não sabe);
+    # a réplica ainda mostra o token válido
+    db.session.execute(ApiTokens.__table__.update().values(revogado_em=db.func.now()))
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {raw}'}
+    r = app.test_client().get('/pacientes/search?q=ana', headers=headers)
+    assert r.status_code == 401
+    assert len(token_cache()) == 0
+
+    # admin rebaixado no primário deixa de ver o relatório na hora
+    assert client.get('/relatorios/atendimentos').status_code == 200
+    db.session.execute(Usuarios.__table__.update().values(cargo='user'))
+    db.session.commit()
+    assert client.get('/relatorios/atendimentos').status_code == 403
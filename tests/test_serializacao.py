@@ -0,0 +1,83 @@
+from datetime import date, datetime
+
+import pytest
+from flask import jsonify
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.usuarios_model import Usuarios
+from src.main.models.atendimentos_model import Atendimentos
+from src.main.models.pacientes_model import Pacientes
+from src.main.services.serializacao import date_strings, format_datetime, json_array_response, json_encoder
+
+
+class TestConfig:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'test-secret'
+    COMPRESSION = False
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_date_formatting_matches_strftime():
+    for dt in (datetime(2025, 1, 2, 3, 4, 5), datetime(2025, 12, 31, 23, 59, 59, 999999),
+               datetime(999, 1, 1), datetime(1, 1, 1, 0, 0, 1, 5)):
+        assert format_datetime(dt) == dt.strftime("%d-%m-%Y %H:%M:%S")
+    assert format_datetime(None) is None
+    for d in (date(1990, 7, 9), date(12, 3, 4)):
+        assert date_strings(d) == (d.strftime("%d-%m-%Y"), d.strftime("%Y-%m-%d"))
+
+
+def test_json_array_response_is_byte_identical_to_jsonify(app):
+    items = [{'id': i, 'nome': f'José {i}', 'b': None, 'a': [1.5, True], 'quando': date(2025, 1, i + 1)}
+             for i in range(7)]
+    expected = jsonify(items).get_data()
+
+    with app.test_request_context():
+        assert json_array_response(items).get_data() == expected
+        assert json_array_response([]).get_data() == jsonify([]).get_data()
+        # acima do limite o corpo sai em blocos (streaming), com o mesmo conteúdo
+        app.config['JSON_ARRAY_CHUNK_SIZE'] = 3
+        response = json_array_response(items)
+        assert response.is_streamed
+        chunks = list(response.response)
+        assert len(chunks) == 4  # 3 + 3 + 1 itens e o "]"
+        assert ''.join(chunks).encode() == expected
+
+        app.config['JSON_FAST_PATH'] = False
+        assert json_encoder() is None
+        assert json_array_response(items).get_data() == expected
+
+
+def test_list_responses_keep_format(app):
+    u = Usuarios(usuario='fmt', senha='hash', cargo='admin')
+    db.session.add(u)
+    db.session.add(Pacientes(nome='Ana Ávila', data_nascimento=date(1980, 2, 3), cpf='111'))
+    db.session.commit()
+    db.session.add(Atendimentos(paciente_nome='Ana Ávila', criado_por='fmt', criado_por_id=u.id,
+                                criado_em=datetime(2025, 10, 20, 8, 5, 9)))
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+
+    from src.main.routes.atendimentos import atendimento_to_dict
+    att = Atendimentos.query.one()
+    r = client.get('/atendimentos/')
+    assert r.get_data() == jsonify([atendimento_to_dict(att)]).get_data()
+    assert r.get_json()[0]['criado_em'] == '20-10-2025 08:05:09'
+
+    p = Pacientes.query.one()
+    assert p.to_dict()['data_nascimento'] == '03-02-1980'
+    assert p.to_dict()['data_nascimento_form'] == '1980-02-03'
@@ -0,0 +1,84 @@
+import logging
+
+import pytest
+
+from src.main.server import create_app
+from src.main.repository.database import db
+from src.main.models.usuarios_model import Usuarios
+
+
+class TestConfig:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'test-secret'
+    SQL_QUERY_BUDGET = 3
+    SQL_REPEAT_THRESHOLD = 3
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_server_timing_header_and_log(client, caplog):
+    u = Usuarios(usuario='u1', senha='hash', cargo='admin')
+    db.session.add(u)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+
+    with caplog.at_level(logging.INFO, logger='clinica.sql'):
+        r = client.get('/usuarios/')
+    assert r.status_code == 200
+    timing = r.headers['Server-Timing']
+    assert timing.startswith('db;dur=') and ' queries"' in timing and 'app;dur=' in timing
+    record = caplog.records[-1]
+    assert record.levelname == 'INFO'
+    assert '"endpoint": "usuarios_route.list_users"' in record.getMessage()
+
+
+def test_repeated_statements_are_flagged(app, client, caplog):
+    from src.main.models.pacientes_model import Pacientes
+
+    @app.route('/n-plus-one')
+    def n_plus_one():
+        for i in range(1, 5):
+            db.session.get(Pacientes, i)
+        return 'ok'
+
+    with caplog.at_level(logging.INFO, logger='clinica.sql'):
+        client.get('/n-plus-one')
+    record = caplog.records[-1]
+    assert record.levelname == 'WARNING'
+    assert '"count": 4' in record.getMessage()
+    assert 'FROM pacientes WHERE pacientes.id = ?' in record.getMessage()
+
+
+def test_failed_statement_does_not_leak_start_time(app, client):
+    from flask import jsonify
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    @app.route('/erro-sql')
+    def erro_sql():
+        try:
+            db.session.execute(text('SELECT * FROM nao_existe'))
+        except OperationalError:
+            db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+        return jsonify(pendentes=len(db.session.connection().info.get('sql_metrics_start', [])))
+
+    r = client.get('/erro-sql')
+    assert r.get_json() == {'pendentes': 0}
+    assert 'desc="1 queries"' in r.headers['Server-Timing']
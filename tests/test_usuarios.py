@@ -105,3 +105,133 @@ def test_user_permissions(client, app):
     assert r2.status_code in (403, 401)
 
 
+
+
+def _count_user_lookups(app):
+    from sqlalchemy import event
+    lookups = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM usuarios' in statement and 'usuarios.id = ?' in statement:
+            lookups.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return lookups
+
+
+def test_identity_resolved_once_per_request(client, app):
+    admin = Usuarios(usuario='admin', senha='hash', cargo='admin')
+    db.session.add(admin)
+    db.session.commit()
+    lookups = _count_user_lookups(app)
+
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin.id)
+    # user_loader + is_admin() compartilham a mesma consulta
+    assert client.get('/usuarios/').status_code == 200
+    assert len(lookups) == 1
+
+    # id de sessão de um usuário removido: a falha também fica em cache.
+    # (a fixture mantém o app context aberto, então o current_user da
+    # requisição anterior continuaria em g)
+    from flask import g
+    g.pop('_login_user', None)
+    lookups.clear()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '999'
+    assert client.get('/usuarios/').status_code == 401
+    assert len(lookups) == 1
+
+
+def test_login_rehashes_when_hash_method_changes(client, app):
+    from werkzeug.security import generate_password_hash
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    app.config['PASSWORD_SALT_LENGTH'] = 8
+    u = Usuarios(usuario='antigo', senha=generate_password_hash('segredo', method='pbkdf2:sha256:500'), cargo='user')
+    db.session.add(u)
+    db.session.commit()
+
+    r = client.post('/usuarios/login', data={'usuario': 'antigo', 'senha': 'segredo'})
+    assert r.status_code == 302
+    db.session.refresh(u)
+    method, salt, _ = u.senha.split('$')
+    assert method == 'pbkdf2:sha256:1000' and len(salt) == 8
+
+    # já no formato atual: nada muda; senha errada nunca regrava
+    current = u.senha
+    client.post('/usuarios/login', data={'usuario': 'antigo', 'senha': 'segredo'})
+    client.post('/usuarios/login', data={'usuario': 'antigo', 'senha': 'errada'})
+    db.session.refresh(u)
+    assert u.senha == current
+
+
+def test_login_survives_failed_rehash(client, app, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+    from werkzeug.security import generate_password_hash
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+    u = Usuarios(usuario='antigo', senha=generate_password_hash('segredo', method='pbkdf2:sha256:500'), cargo='user')
+    db.session.add(u)
+    db.session.commit()
+    old = u.senha
+
+    def fail():
+        raise OperationalError('UPDATE usuarios', {}, Exception('database is locked'))
+    monkeypatch.setattr(db.session, 'commit', fail)
+
+    # a senha conferiu: o login segue com o hash antigo
+    r = client.post('/usuarios/login', data={'usuario': 'antigo', 'senha': 'segredo'})
+    assert r.status_code == 302
+    monkeypatch.undo()
+    db.session.refresh(u)
+    assert u.senha == old
+
+
+def test_hash_settings_must_fit_password_column():
+    class LongSalt(TestConfig):
+        PASSWORD_SALT_LENGTH = 200
+
+    class UnknownMethod(TestConfig):
+        PASSWORD_HASH_METHOD = 'md5'
+
+    with pytest.raises(ValueError, match='usuarios.senha'):
+        create_app(LongSalt)
+    with pytest.raises(ValueError):
+        create_app(UnknownMethod)
+
+
+def test_login_returns_503_when_verifier_pool_is_full(client, app):
+    from src.main.services.auth import PasswordVerifier, hash_password
+    app.config['WTF_CSRF_ENABLED'] = False
+    db.session.add(Usuarios(usuario='turno', senha=hash_password('senha'), cargo='user'))
+    db.session.commit()
+    app.config['PASSWORD_VERIFY_WORKERS'] = 1
+    verifier = PasswordVerifier(workers=1, queue=0)
+    app.extensions['password_verifier'] = verifier
+    try:
+        assert client.post('/usuarios/login', data={'usuario': 'turno', 'senha': 'senha'}).status_code == 302
+
+        verifier._slots.acquire()  # simula uma verificação em andamento
+        r = client.post('/usuarios/login', data={'usuario': 'turno', 'senha': 'senha'})
+        assert r.status_code == 503
+        assert r.headers['Retry-After'] == '1'
+        verifier._slots.release()
+    finally:
+        verifier.shutdown()
+
+
+def test_get_user_conditional(client, app):
+    u = Usuarios(usuario='detalhe', senha='hash', cargo='user')
+    db.session.add(u)
+    db.session.commit()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(u.id)
+        sess['_fresh'] = True
+    r = client.get(f'/usuarios/{u.id}')
+    assert r.status_code == 200 and 'no-cache' in r.headers['Cache-Control']
+    r2 = client.get(f'/usuarios/{u.id}', headers={'If-None-Match': r.headers['ETag']})
+    assert r2.status_code == 304 and r2.get_data() == b''
+    u.cargo = 'admin'
+    db.session.commit()
+    assert client.get(f'/usuarios/{u.id}', headers={'If-None-Match': r.headers['ETag']}).status_code == 200
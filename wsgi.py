@@ -0,0 +1,7 @@
+from src.main.server import create_app
+
+# Ponto de entrada WSGI de produção (ver gunicorn.conf.py):
+#     gunicorn -c gunicorn.conf.py wsgi:app
+# Com preload_app o app é criado uma vez no processo mestre e os workers
+# herdam o código já importado (páginas compartilhadas por copy-on-write).
+app = create_app()